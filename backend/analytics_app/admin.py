@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from analytics_app.models import ClickEvent, Event, PageView
+from analytics_app.models import ClickEvent, DailyDimension, DailyStats, Event, PageView
 
 
 @admin.register(Event)
@@ -19,11 +19,13 @@ class PageViewAdmin(admin.ModelAdmin):
         "visitor_id",
         "session_id",
         "pathname",
+        "source",
+        "channel",
         "duration_seconds",
         "max_scroll_depth",
         "created_at",
     )
-    list_filter = ("created_at",)
+    list_filter = ("channel", "created_at")
     search_fields = ("session_id", "pathname", "url", "client__name")
     ordering = ("-created_at",)
 
@@ -34,3 +36,19 @@ class ClickEventAdmin(admin.ModelAdmin):
     list_filter = ("created_at",)
     search_fields = ("session_id", "page_pathname", "element_text", "element_id", "client__name")
     ordering = ("-created_at",)
+
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    list_display = ("id", "client", "day", "visits", "unique_visitors", "forms", "leads", "updated_at")
+    list_filter = ("day",)
+    search_fields = ("client__name",)
+    ordering = ("-day",)
+
+
+@admin.register(DailyDimension)
+class DailyDimensionAdmin(admin.ModelAdmin):
+    list_display = ("id", "client", "day", "dimension", "key", "count", "leads", "duration_seconds")
+    list_filter = ("dimension", "day")
+    search_fields = ("client__name", "key")
+    ordering = ("-day",)
@@ -0,0 +1,50 @@
+"""Async versions of /api/public/event/ and /api/analytics/event/ (TRACK_API_VIEWS=async)."""
+import logging
+
+from asgiref.sync import sync_to_async
+
+from analytics_app.lean_views import LeanPublicAnalyticsEventCreateView, LeanPublicApiView, LeanPublicEventCreateView
+from clients.tenancy import get_active_client
+from core.lean_api import BadRequestBody, acheck_throttle, bad_request_body, error_response, json_response, parse_body
+from core.tenant_cache import client_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPublicApiView(LeanPublicApiView):
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+    async def post(self, request):
+        try:
+            raw = parse_body(request)
+        except BadRequestBody as exc:
+            return bad_request_body(exc)
+        api_key = self.get_api_key(request, raw)
+        client = None
+        if api_key:
+            found, client = client_cache.peek(api_key)
+            if not found:
+                client = await sync_to_async(get_active_client)(api_key)
+        response = self.check_client(request, api_key, client)
+        if response is None:
+            response = await acheck_throttle(request, self.throttle_scope)
+        if response is not None:
+            return response
+        data, errors = self.schema.validate(raw, context={"client": client})
+        if errors is not None:
+            return json_response(errors, status=400)
+        try:
+            result = await sync_to_async(self.save)(data, client)
+        except Exception:
+            logger.exception(self.save_failed_message)
+            return error_response("Internal server error.", 500)
+        return self.created(request, client, raw, result)
+
+
+class AsyncPublicEventCreateView(AsyncPublicApiView, LeanPublicEventCreateView):
+    pass
+
+
+class AsyncPublicAnalyticsEventCreateView(AsyncPublicApiView, LeanPublicAnalyticsEventCreateView):
+    pass
@@ -0,0 +1,7 @@
+from rest_framework.exceptions import APIException
+
+
+class ReportUnavailable(APIException):
+    status_code = 503
+    default_detail = "Отчёт сейчас строится слишком долго. Попробуйте позже."
+    default_code = "report_unavailable"
@@ -0,0 +1,133 @@
+"""/api/public/event/ and /api/analytics/event/ without the DRF request cycle (TRACK_API_VIEWS=lean).
+
+Same API-key check, throttle scope, validation and response bodies as
+PublicEventCreateView / PublicAnalyticsEventCreateView, in the order DRF
+applies them.
+"""
+import logging
+
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from analytics_app.models import Event
+from analytics_app.schemas import PUBLIC_ANALYTICS_EVENT, PUBLIC_EVENT
+from clients.permissions import HasValidApiKey
+from clients.tenancy import get_active_client
+from core.lean_api import (
+    BadRequestBody,
+    bad_request_body,
+    check_throttle,
+    error_response,
+    json_response,
+    not_authenticated,
+    parse_body,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _mask(api_key):
+    return (api_key[:6] + "***") if isinstance(api_key, str) and len(api_key) >= 6 else "***"
+
+
+class LeanPublicApiView(View):
+    http_method_names = ["post", "options"]
+    throttle_scope = None
+    schema = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def get_api_key(self, request, data):
+        api_key = request.META.get(HasValidApiKey.header_name) or request.GET.get("api_key")
+        if not api_key and isinstance(data, dict):
+            api_key = data.get("api_key")
+        return api_key
+
+    def check_client(self, request, api_key, client):
+        """Log the outcome like HasValidApiKey; returns a 401 response or None."""
+        if not api_key:
+            logger.warning(
+                "Public API auth failed: missing api_key path=%s origin=%s",
+                request.path,
+                request.headers.get("Origin"),
+            )
+            return not_authenticated("Отсутствует API-ключ.")
+        if client is None:
+            logger.warning(
+                "Public API auth failed: invalid api_key=%s path=%s origin=%s",
+                _mask(api_key),
+                request.path,
+                request.headers.get("Origin"),
+            )
+            return not_authenticated("Недействительный API-ключ или клиент отключен.")
+        logger.info(
+            "Public API auth success: client_id=%s owner_id=%s api_key=%s path=%s",
+            client.id,
+            client.owner_id,
+            _mask(api_key),
+            request.path,
+        )
+        return None
+
+    def save(self, data, client):
+        serializer = self.schema.serializer_class(context={"client": client})
+        return serializer.create(dict(data))
+
+    def post(self, request):
+        try:
+            raw = parse_body(request)
+        except BadRequestBody as exc:
+            return bad_request_body(exc)
+        api_key = self.get_api_key(request, raw)
+        client = get_active_client(api_key) if api_key else None
+        response = self.check_client(request, api_key, client)
+        if response is None:
+            response = check_throttle(request, self.throttle_scope)
+        if response is not None:
+            return response
+        data, errors = self.schema.validate(raw, context={"client": client})
+        if errors is not None:
+            return json_response(errors, status=400)
+        try:
+            result = self.save(data, client)
+        except Exception:
+            logger.exception(self.save_failed_message)
+            return error_response("Internal server error.", 500)
+        return self.created(request, client, raw, result)
+
+
+class LeanPublicEventCreateView(LeanPublicApiView):
+    throttle_scope = "public_event"
+    schema = PUBLIC_EVENT
+    save_failed_message = "Failed to create public event"
+
+    def created(self, request, client, raw, event):
+        if event.event_type == Event.EventType.VISIT:
+            logger.info(
+                "Visit event stored: client_id=%s event_id=%s visitor_id=%s page_url=%s",
+                client.id,
+                event.id,
+                event.visitor_id,
+                event.page_url,
+            )
+        return json_response({"id": event.id}, status=201)
+
+
+class LeanPublicAnalyticsEventCreateView(LeanPublicApiView):
+    throttle_scope = "public_analytics_event"
+    schema = PUBLIC_ANALYTICS_EVENT
+    save_failed_message = "Failed to create analytics event"
+
+    def created(self, request, client, raw, result):
+        logger.info(
+            "analytics.event stored: client_id=%s type=%s visitor_id=%s session_id=%s result=%s",
+            client.id,
+            raw.get("event_type"),
+            raw.get("visitor_id"),
+            raw.get("session_id"),
+            result,
+        )
+        return json_response(result, status=201)
@@ -0,0 +1,17 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from analytics_app.services.report_cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print hit/miss counts and average compute time of the analytics result cache per section."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing them.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(cache_stats(), ensure_ascii=False))
+        if options["reset"]:
+            reset_cache_stats()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from analytics_app.services.engagement import backfill_pathnames
+
+
+class Command(BaseCommand):
+    help = "Fill Event.pathname on analytics events stored before it was set at ingest."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per UPDATE.")
+        parser.add_argument("--client", type=int, action="append", help="Limit to these client ids.")
+
+    def handle(self, *args, **options):
+        updated = backfill_pathnames(batch_size=options["batch_size"], client_ids=options["client"])
+        self.stdout.write(f"filled {updated} event pathnames")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from analytics_app.services.sources import backfill_sources
+
+
+class Command(BaseCommand):
+    help = "Fill PageView.source and PageView.channel on rows stored before ingest-time classification."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows classified per UPDATE.")
+        parser.add_argument("--client", type=int, action="append", help="Limit to these client ids.")
+
+    def handle(self, *args, **options):
+        updated = backfill_sources(batch_size=options["batch_size"], client_ids=options["client"])
+        self.stdout.write(f"classified {updated} page views")
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics_app.services.uniques import count_unique_exact, estimate_unique
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = "Compare HyperLogLog unique visitor estimates with the exact count: error and latency per period."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--client", type=int, action="append", help="Limit to these client ids.")
+        parser.add_argument(
+            "--days",
+            type=int,
+            action="append",
+            help="Period lengths ending today (default: 7, 30, 90, 365).",
+        )
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        value = func(*args)
+        return value, (time.perf_counter() - started) * 1000
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        clients = Client.objects.filter(is_active=True).order_by("id")
+        if options["client"]:
+            clients = clients.filter(id__in=options["client"])
+        for client in clients.iterator():
+            for days in options["days"] or [7, 30, 90, 365]:
+                date_from = today - timedelta(days=days - 1)
+                exact, exact_ms = self._timed(count_unique_exact, client, date_from, today)
+                estimate, estimate_ms = self._timed(estimate_unique, client, date_from, today)
+                error = (estimate - exact) / exact * 100 if exact else 0.0
+                self.stdout.write(
+                    f"client {client.id} days={days}: exact={exact} ({exact_ms:.1f} ms) "
+                    f"hll={estimate} ({estimate_ms:.1f} ms) error={error:+.2f}%"
+                )
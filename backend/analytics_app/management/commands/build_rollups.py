@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics_app.services.rollups import build_rollups
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = "Build (or rebuild) the daily analytics rollups for closed days, e.g. to backfill history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", required=True, help="First day to build, YYYY-MM-DD.")
+        parser.add_argument("--until", help="Last day to build, YYYY-MM-DD (default: yesterday).")
+        parser.add_argument("--client", type=int, action="append", help="Limit to these client ids.")
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options["since"])
+            date_to = date.fromisoformat(options["until"]) if options["until"] else timezone.localdate() - timedelta(days=1)
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}") from exc
+
+        clients = Client.objects.all().order_by("id")
+        if options["client"]:
+            clients = clients.filter(id__in=options["client"])
+        total = 0
+        for client in clients.iterator():
+            built = build_rollups(client, date_from, date_to)
+            total += built
+            self.stdout.write(f"client {client.id}: {built} days")
+        self.stdout.write(f"built {total} client-days")
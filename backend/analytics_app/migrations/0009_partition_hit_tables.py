@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from core.partitioning import convert_table, is_supported, unconvert_table
+
+TABLES = ("analytics_app_event", "analytics_app_pageview", "analytics_app_clickevent")
+
+
+def partition_tables(apps, schema_editor):
+    if not is_supported(schema_editor.connection):
+        return
+    for table in TABLES:
+        convert_table(schema_editor, table)
+
+
+def unpartition_tables(apps, schema_editor):
+    if not is_supported(schema_editor.connection):
+        return
+    for table in TABLES:
+        unconvert_table(schema_editor, table)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics_app", "0008_event_time_on_page"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -0,0 +1,88 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0002_localization"),
+        ("analytics_app", "0009_partition_hit_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(verbose_name="Day")),
+                ("visits", models.PositiveIntegerField(default=0, verbose_name="Visits")),
+                ("unique_visitors", models.PositiveIntegerField(default=0, verbose_name="Unique visitors")),
+                ("forms", models.PositiveIntegerField(default=0, verbose_name="Forms")),
+                ("leads", models.PositiveIntegerField(default=0, verbose_name="Leads")),
+                ("notifications_sent", models.PositiveIntegerField(default=0, verbose_name="Notifications sent")),
+                ("time_on_page_seconds", models.PositiveBigIntegerField(default=0, verbose_name="Time on page (sec)")),
+                ("time_on_page_events", models.PositiveIntegerField(default=0, verbose_name="Time on page events")),
+                ("page_views", models.PositiveIntegerField(default=0, verbose_name="Page views")),
+                ("clicks", models.PositiveIntegerField(default=0, verbose_name="Clicks")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Updated")),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="clients.client",
+                        verbose_name="Client",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily stats",
+                "verbose_name_plural": "Daily stats",
+                "ordering": ("-day",),
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyDimension",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(verbose_name="Day")),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("device", "Device"),
+                            ("os", "OS"),
+                            ("browser", "Browser"),
+                            ("path", "Path"),
+                            ("source", "Source"),
+                            ("engagement", "Engagement"),
+                            ("click", "Click"),
+                        ],
+                        max_length=16,
+                        verbose_name="Dimension",
+                    ),
+                ),
+                ("key", models.TextField(verbose_name="Key")),
+                ("count", models.PositiveIntegerField(default=0, verbose_name="Count")),
+                ("leads", models.PositiveIntegerField(default=0, verbose_name="Leads")),
+                ("duration_seconds", models.PositiveBigIntegerField(default=0, verbose_name="Duration (sec)")),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_dimensions",
+                        to="clients.client",
+                        verbose_name="Client",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily dimension",
+                "verbose_name_plural": "Daily dimensions",
+                "indexes": [models.Index(fields=["client", "dimension", "day"], name="analytics_a_client__59d610_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailystats",
+            constraint=models.UniqueConstraint(fields=("client", "day"), name="analytics_daily_stats_client_day_uniq"),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics_app", "0010_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailystats",
+            name="visitor_sketch",
+            field=models.BinaryField(blank=True, null=True, verbose_name="Visitor HyperLogLog sketch"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics_app", "0011_dailystats_visitor_sketch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pageview",
+            name="source",
+            field=models.CharField(blank=True, default="", max_length=255, verbose_name="Source"),
+        ),
+        migrations.AddField(
+            model_name="pageview",
+            name="channel",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("direct", "Direct"),
+                    ("search", "Search"),
+                    ("social", "Social"),
+                    ("ads", "Ads"),
+                    ("referral", "Referral"),
+                ],
+                default="",
+                max_length=16,
+                verbose_name="Channel",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="dailydimension",
+            name="dimension",
+            field=models.CharField(
+                choices=[
+                    ("device", "Device"),
+                    ("os", "OS"),
+                    ("browser", "Browser"),
+                    ("path", "Path"),
+                    ("source", "Source"),
+                    ("channel", "Channel"),
+                    ("engagement", "Engagement"),
+                    ("click", "Click"),
+                ],
+                max_length=16,
+                verbose_name="Dimension",
+            ),
+        ),
+    ]
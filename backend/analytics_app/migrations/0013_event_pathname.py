@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics_app", "0012_pageview_source_channel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="event",
+            name="pathname",
+            field=models.CharField(blank=True, default="", max_length=512, verbose_name="Pathname"),
+        ),
+    ]
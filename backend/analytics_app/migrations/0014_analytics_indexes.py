@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics_app", "0013_event_pathname"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pageview",
+            index=models.Index(fields=["client", "created_at"], name="analytics_pv_client_ts_idx"),
+        ),
+        migrations.RemoveIndex(
+            model_name="dailydimension",
+            name="analytics_a_client__59d610_idx",
+        ),
+        migrations.AddIndex(
+            model_name="dailydimension",
+            index=models.Index(
+                fields=["client", "dimension", "day"],
+                include=["key", "count", "leads", "duration_seconds"],
+                name="analytics_dim_covering_idx",
+            ),
+        ),
+    ]
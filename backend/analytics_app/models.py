@@ -15,6 +15,8 @@ class Event(models.Model):
     event_type = models.CharField(max_length=20, choices=EventType.choices, verbose_name="Event type")
     element_id = models.CharField(max_length=255, null=True, blank=True, verbose_name="Element ID")
     page_url = models.URLField(max_length=1000, verbose_name="Page URL")
+    # Path of page_url, set at ingest; empty on rows not backfilled yet.
+    pathname = models.CharField(max_length=512, blank=True, default="", verbose_name="Pathname")
     duration_seconds = models.PositiveIntegerField(default=0, verbose_name="Duration (sec)")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created at")
 
@@ -29,6 +31,13 @@ class Event(models.Model):
 
 
 class PageView(models.Model):
+    class Channel(models.TextChoices):
+        DIRECT = "direct", "Direct"
+        SEARCH = "search", "Search"
+        SOCIAL = "social", "Social"
+        ADS = "ads", "Ads"
+        REFERRAL = "referral", "Referral"
+
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="page_views", verbose_name="Client")
     visitor_id = models.CharField(max_length=64, blank=True, default="", db_index=True, verbose_name="Visitor ID")
     session_id = models.CharField(max_length=64, db_index=True, verbose_name="Session ID")
@@ -41,6 +50,9 @@ class PageView(models.Model):
     utm_campaign = models.CharField(max_length=255, blank=True, null=True, verbose_name="UTM Campaign")
     utm_term = models.CharField(max_length=255, blank=True, null=True, verbose_name="UTM Term")
     utm_content = models.CharField(max_length=255, blank=True, null=True, verbose_name="UTM Content")
+    # Classified at ingest by analytics_app.services.sources; empty on rows not backfilled yet.
+    source = models.CharField(max_length=255, blank=True, default="", verbose_name="Source")
+    channel = models.CharField(max_length=16, choices=Channel.choices, blank=True, default="", verbose_name="Channel")
     max_scroll_depth = models.PositiveSmallIntegerField(default=0, verbose_name="Max scroll depth")
     duration_seconds = models.PositiveIntegerField(default=0, verbose_name="Time on page (sec)")
     attributed_leads = models.PositiveIntegerField(default=0, verbose_name="Attributed leads")
@@ -55,6 +67,7 @@ class PageView(models.Model):
             models.Index(fields=["client", "session_id", "created_at"]),
             models.Index(fields=["client", "visitor_id", "created_at"]),
             models.Index(fields=["client", "pathname", "created_at"]),
+            models.Index(fields=["client", "created_at"], name="analytics_pv_client_ts_idx"),
         ]
 
 
@@ -77,3 +90,63 @@ class ClickEvent(models.Model):
             models.Index(fields=["client", "visitor_id", "created_at"]),
             models.Index(fields=["client", "page_pathname", "created_at"]),
         ]
+
+
+class DailyStats(models.Model):
+    """Per-(client, day) totals for a closed day, built by analytics_app.services.rollups."""
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="daily_stats", verbose_name="Client")
+    day = models.DateField(verbose_name="Day")
+    visits = models.PositiveIntegerField(default=0, verbose_name="Visits")
+    unique_visitors = models.PositiveIntegerField(default=0, verbose_name="Unique visitors")
+    forms = models.PositiveIntegerField(default=0, verbose_name="Forms")
+    leads = models.PositiveIntegerField(default=0, verbose_name="Leads")
+    notifications_sent = models.PositiveIntegerField(default=0, verbose_name="Notifications sent")
+    time_on_page_seconds = models.PositiveBigIntegerField(default=0, verbose_name="Time on page (sec)")
+    time_on_page_events = models.PositiveIntegerField(default=0, verbose_name="Time on page events")
+    page_views = models.PositiveIntegerField(default=0, verbose_name="Page views")
+    clicks = models.PositiveIntegerField(default=0, verbose_name="Clicks")
+    visitor_sketch = models.BinaryField(null=True, blank=True, verbose_name="Visitor HyperLogLog sketch")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated")
+
+    class Meta:
+        ordering = ("-day",)
+        verbose_name = "Daily stats"
+        verbose_name_plural = "Daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=["client", "day"], name="analytics_daily_stats_client_day_uniq"),
+        ]
+
+
+class DailyDimension(models.Model):
+    """Per-(client, day) counters broken down by device, OS, browser, path, source, channel, page or click target."""
+
+    class Dimension(models.TextChoices):
+        DEVICE = "device", "Device"
+        OS = "os", "OS"
+        BROWSER = "browser", "Browser"
+        PATH = "path", "Path"
+        SOURCE = "source", "Source"
+        CHANNEL = "channel", "Channel"
+        ENGAGEMENT = "engagement", "Engagement"
+        CLICK = "click", "Click"
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="daily_dimensions", verbose_name="Client")
+    day = models.DateField(verbose_name="Day")
+    dimension = models.CharField(max_length=16, choices=Dimension.choices, verbose_name="Dimension")
+    key = models.TextField(verbose_name="Key")
+    count = models.PositiveIntegerField(default=0, verbose_name="Count")
+    leads = models.PositiveIntegerField(default=0, verbose_name="Leads")
+    duration_seconds = models.PositiveBigIntegerField(default=0, verbose_name="Duration (sec)")
+
+    class Meta:
+        verbose_name = "Daily dimension"
+        verbose_name_plural = "Daily dimensions"
+        indexes = [
+            # Covering, so load_days and top_dimension read the counters with index-only scans.
+            models.Index(
+                fields=["client", "dimension", "day"],
+                include=["key", "count", "leads", "duration_seconds"],
+                name="analytics_dim_covering_idx",
+            ),
+        ]
@@ -0,0 +1,5 @@
+from analytics_app.serializers import PublicAnalyticsEventSerializer, PublicEventCreateSerializer
+from core.schema import CompiledSerializer
+
+PUBLIC_EVENT = CompiledSerializer(PublicEventCreateSerializer)
+PUBLIC_ANALYTICS_EVENT = CompiledSerializer(PublicAnalyticsEventSerializer)
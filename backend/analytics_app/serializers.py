@@ -1,6 +1,13 @@
-﻿from rest_framework import serializers
+﻿from django.db.models import Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from rest_framework import serializers
 
 from analytics_app.models import ClickEvent, Event, PageView
+from analytics_app.services.engagement import url_pathname
+from analytics_app.services.session_state import latest_page_view, remember_page_view
+from analytics_app.services.sources import classify as classify_source
+from core import data_version
 
 
 class PublicEventCreateSerializer(serializers.ModelSerializer):
@@ -29,7 +36,9 @@ class PublicEventCreateSerializer(serializers.ModelSerializer):
         validated_data.pop("utm_source", None)
         validated_data.pop("utm_medium", None)
         validated_data.pop("utm_campaign", None)
-        return Event.objects.create(client=client, **validated_data)
+        event = Event.objects.create(client=client, pathname=url_pathname(validated_data.get("page_url")), **validated_data)
+        data_version.bump(client.api_key)
+        return event
 
 
 class PublicAnalyticsEventSerializer(serializers.Serializer):
@@ -64,11 +73,7 @@ class PublicAnalyticsEventSerializer(serializers.Serializer):
     element_class = serializers.CharField(required=False, allow_blank=True, max_length=255)
 
     def _get_latest_page_view(self, client, session_id):
-        return (
-            PageView.objects.filter(client=client, session_id=session_id)
-            .order_by("-created_at")
-            .first()
-        )
+        return latest_page_view(client, session_id)
 
     def _normalize_referrer(self, value):
         value = (value or "").strip()
@@ -79,6 +84,11 @@ class PublicAnalyticsEventSerializer(serializers.Serializer):
         return value
 
     def create(self, validated_data):
+        result = self._store(validated_data)
+        data_version.bump(self.context["client"].api_key)
+        return result
+
+    def _store(self, validated_data):
         client = self.context["client"]
         event_type = validated_data["event_type"]
         session_id = validated_data["session_id"]
@@ -86,6 +96,13 @@ class PublicAnalyticsEventSerializer(serializers.Serializer):
 
         if event_type == self.EVENT_PAGE_VIEW:
             pathname = (validated_data.get("pathname") or "").strip() or "/"
+            referrer = self._normalize_referrer(validated_data.get("referrer"))
+            source, channel = classify_source(
+                validated_data.get("utm_source"),
+                validated_data.get("utm_medium"),
+                referrer,
+                validated_data.get("query_string"),
+            )
             page_view = PageView.objects.create(
                 client=client,
                 visitor_id=visitor_id,
@@ -93,14 +110,17 @@ class PublicAnalyticsEventSerializer(serializers.Serializer):
                 url=validated_data.get("url") or "",
                 pathname=pathname,
                 query_string=validated_data.get("query_string"),
-                referrer=self._normalize_referrer(validated_data.get("referrer")),
+                referrer=referrer,
                 utm_source=validated_data.get("utm_source"),
                 utm_medium=validated_data.get("utm_medium"),
                 utm_campaign=validated_data.get("utm_campaign"),
                 utm_term=validated_data.get("utm_term"),
                 utm_content=validated_data.get("utm_content"),
+                source=source,
+                channel=channel,
                 max_scroll_depth=validated_data.get("max_scroll_depth") or 0,
             )
+            remember_page_view(page_view)
             return {"kind": "page_view", "id": page_view.id}
 
         if event_type == self.EVENT_SESSION_END:
@@ -109,18 +129,16 @@ class PublicAnalyticsEventSerializer(serializers.Serializer):
                 return {"kind": "session_end", "id": None}
             max_scroll_depth = validated_data.get("max_scroll_depth")
             duration_seconds = validated_data.get("duration_seconds")
-            update_fields = []
-            if max_scroll_depth is not None and max_scroll_depth > latest.max_scroll_depth:
-                latest.max_scroll_depth = max_scroll_depth
-                update_fields.append("max_scroll_depth")
-            if duration_seconds is not None and duration_seconds > latest.duration_seconds:
-                latest.duration_seconds = duration_seconds
-                update_fields.append("duration_seconds")
-            if visitor_id and latest.visitor_id != visitor_id:
-                latest.visitor_id = visitor_id
-                update_fields.append("visitor_id")
-            if update_fields:
-                latest.save(update_fields=update_fields + ["updated_at"])
+            # Conditional UPDATE by id: no read of the row, and concurrent session_end hits cannot lower the values.
+            updates = {}
+            if max_scroll_depth is not None:
+                updates["max_scroll_depth"] = Greatest("max_scroll_depth", Value(max_scroll_depth))
+            if duration_seconds is not None:
+                updates["duration_seconds"] = Greatest("duration_seconds", Value(duration_seconds))
+            if visitor_id:
+                updates["visitor_id"] = visitor_id
+            if updates:
+                PageView.objects.filter(id=latest.id).update(**updates, updated_at=timezone.now())
             return {"kind": "session_end", "id": latest.id}
 
         if event_type == self.EVENT_CLICK:
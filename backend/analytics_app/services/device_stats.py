@@ -1,50 +1,24 @@
-from django.db.models import Count
+from analytics_app.services.rollups import Dimension, dimension_totals, load_days, total_stats
 
-from analytics_app.services.metrics import period_bounds
-from tracker.models import Visit
+DEVICE_DIMENSIONS = (Dimension.DEVICE, Dimension.OS, Dimension.BROWSER)
 
 
-def get_device_distribution(client, date_from, date_to):
-    from_dt, to_dt = period_bounds(date_from, date_to)
-    visits_qs = Visit.objects.filter(site__token=client.api_key, started_at__gte=from_dt, started_at__lte=to_dt)
+def _by_count(totals: dict) -> dict:
+    return {key: values[0] for key, values in sorted(totals.items(), key=lambda pair: pair[1][0], reverse=True)}
 
-    device_rows = (
-        visits_qs.values("device_type")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
-    os_rows = (
-        visits_qs.values("os")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
-    browser_rows = (
-        visits_qs.values("browser_family")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
+
+def get_device_distribution(client, date_from, date_to, days=None):
+    if days is None:
+        days = load_days(client, date_from, date_to, dimensions=DEVICE_DIMENSIONS)
 
     devices = {"mobile": 0, "desktop": 0, "tablet": 0}
-    for row in device_rows:
-        key = (row.get("device_type") or "").strip().lower()
+    for key, values in dimension_totals(days, Dimension.DEVICE).items():
         if key in devices:
-            devices[key] = int(row.get("count") or 0)
-
-    os_distribution = {}
-    for row in os_rows:
-        key = row.get("os") or "Unknown"
-        os_distribution[key] = int(row.get("count") or 0)
-
-    browsers = {}
-    for row in browser_rows:
-        key = row.get("browser_family") or "Unknown"
-        browsers[key] = int(row.get("count") or 0)
-
-    total_visits = visits_qs.count()
+            devices[key] += values[0]
 
     return {
         "devices": devices,
-        "browsers": browsers,
-        "os": os_distribution,
-        "total_visits": total_visits,
+        "browsers": _by_count(dimension_totals(days, Dimension.BROWSER)),
+        "os": _by_count(dimension_totals(days, Dimension.OS)),
+        "total_visits": total_stats(days)["visits"],
     }
@@ -0,0 +1,33 @@
+"""Page pathnames of analytics events, stored at ingest so engagement groups by them in SQL."""
+from urllib.parse import urlparse
+
+from analytics_app.models import Event
+from clients.models import Client
+from core import data_version
+
+
+def url_pathname(url) -> str:
+    return (urlparse(url or "").path or "/")[:512]
+
+
+def backfill_pathnames(batch_size=1000, client_ids=None) -> int:
+    """Fill ``Event.pathname`` on rows stored before it existed; returns the rows updated."""
+    pending = Event.objects.filter(pathname="")
+    if client_ids:
+        pending = pending.filter(client_id__in=client_ids)
+    updated = 0
+    last_id = 0
+    touched = set()
+    while True:
+        rows = list(pending.filter(id__gt=last_id).order_by("id").values_list("id", "client_id", "page_url")[:batch_size])
+        if not rows:
+            # Historical events changed, so cached settled reports are stale too.
+            for api_key in Client.objects.filter(id__in=touched).values_list("api_key", flat=True):
+                data_version.bump(api_key, settled=True)
+            return updated
+        Event.objects.bulk_update(
+            [Event(id=event_id, pathname=url_pathname(page_url)) for event_id, _, page_url in rows], ["pathname"]
+        )
+        touched.update(client_id for _, client_id, _ in rows)
+        updated += len(rows)
+        last_id = rows[-1][0]
@@ -0,0 +1,23 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def default_period_days(days: int = 14):
+    now = timezone.localtime()
+    date_to = now.date()
+    date_from = date_to - timedelta(days=max(1, days) - 1)
+    return date_from, date_to
+
+
+def period_bounds(date_from, date_to, tz=None):
+    tz = tz or timezone.get_current_timezone()
+    from_dt = timezone.make_aware(datetime.combine(date_from, time.min), tz)
+    to_dt = timezone.make_aware(datetime.combine(date_to, time.max), tz)
+    return from_dt, to_dt
+
+
+def is_settled(date_to) -> bool:
+    """True once the period ends before the days the hourly rollup job still rebuilds."""
+    return date_to < timezone.localdate() - timedelta(days=settings.ANALYTICS_ROLLUP_LOOKBACK_DAYS)
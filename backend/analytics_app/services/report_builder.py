@@ -1,63 +1,301 @@
-from urllib.parse import urlparse
+"""The analytics report as a registry of lazily computed sections.
 
-from django.db.models import Count, Q, Sum
-from django.db.models.functions import TruncDate
+A section is a function registered with ``@section(name, requires=...,
+dimensions=...)``. It receives the ``Report`` and the values of the sections it
+requires. ``Report`` computes a section on first access and memoizes it for
+the request, so shared inputs (``days``, ``metrics``) are computed once however
+many sections use them. ``days`` loads only the rollup dimensions that the
+requested sections declare. ``build_report`` returns just the asked-for
+sections; ``build_full_report`` returns FULL_REPORT_SECTIONS.
+
+Ranked sections (top_clicks, page_conversion, engagement pages) hold at most
+``limit`` rows (ANALYTICS_REPORT_TOP_K by default) ranked after ``after``, the
+sort values and key of the previous page's last row; the ``*_other`` sections
+sum up everything outside that window and the ``*_next`` ones hold the
+``after`` of the following page (None on the last one).
+
+With ANALYTICS_REPORT_WORKERS above 1, ``build`` runs the sections registered
+with ``queries=True`` as soon as their dependencies are ready, on a thread
+pool that lives as long as the process and is shared by all its reports. A
+process therefore holds at most ANALYTICS_REPORT_WORKERS extra DB connections
+however many reports it builds at once. Each pool thread keeps its connection
+between sections and reconnects when it breaks or is older than
+ANALYTICS_REPORT_CONN_MAX_AGE seconds. The rest are cheap and run on the
+calling thread. A section that takes longer than ANALYTICS_REPORT_SECTION_TIMEOUT
+seconds (time spent waiting for a free thread included) raises
+ReportSectionTimeout (the views answer 503); sections not started yet are
+cancelled. A thread cannot be stopped, so on PostgreSQL each section runs in a
+transaction with that timeout as its ``SET LOCAL statement_timeout``: the
+timed-out query is cancelled and the thread is free again shortly after.
+Inside a transaction the sections run one after another, since other
+connections would not see its writes.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection, connections, transaction
 
-from analytics_app.models import ClickEvent, Event, PageView
 from analytics_app.services.device_stats import get_device_distribution
 from analytics_app.services.metrics import get_metrics
+from analytics_app.services.periods import period_bounds
+from analytics_app.services.rollups import (
+    Dimension,
+    dimension_totals,
+    load_days,
+    split_click_key,
+    top_dimension,
+    total_stats,
+)
+from analytics_app.services.uniques import count_unique
 from leads.models import Lead
 from leads.serializers import LeadSerializer
-from tracker.models import Visit
 
+logger = logging.getLogger(__name__)
+
+# name -> (compute, requires, dimensions, queries)
+REPORT_SECTIONS = {}
+
+FULL_REPORT_SECTIONS = (
+    "summary",
+    "daily_stats",
+    "top_clicks",
+    "page_conversion",
+    "sources",
+    "channels",
+    "leads",
+    "engagement",
+    "devices_distribution",
+    "period",
+)
+
+
+class ReportSectionTimeout(TimeoutError):
+    pass
+
+
+def section(name, *, requires=(), dimensions=(), queries=False):
+    """Register a section; ``queries`` marks the ones that hit the database and may run on the pool."""
+
+    def register(compute):
+        REPORT_SECTIONS[name] = (compute, tuple(requires), tuple(dimensions), queries)
+        return compute
+
+    return register
+
+
+def _closure(names):
+    seen = []
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in REPORT_SECTIONS:
+            raise KeyError(f"Unknown report section: {name}")
+        if name not in seen:
+            seen.append(name)
+            pending.extend(REPORT_SECTIONS[name][1])
+    return seen
+
+
+class Report:
+    """Request-scoped evaluation of report sections; each one is computed at most once."""
+
+    def __init__(self, client, date_from, date_to, sections=FULL_REPORT_SECTIONS, *, limit=None, after=None):
+        self.client = client
+        self.date_from = date_from
+        self.date_to = date_to
+        self.sections = tuple(sections)
+        # Window of the ranked sections (top_clicks, page_conversion, engagement pages).
+        self.limit = settings.ANALYTICS_REPORT_TOP_K if limit is None else limit
+        self.after = after
+        self.dimensions = tuple(
+            dict.fromkeys(dimension for name in _closure(self.sections) for dimension in REPORT_SECTIONS[name][2])
+        )
+        self._values = {}
+        # Section -> milliseconds spent in its own compute, for the latency log.
+        self.timings = {}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            requires = REPORT_SECTIONS[name][1]
+            self._store(name, *self._compute(name, [self[dependency] for dependency in requires]))
+        return self._values[name]
+
+    def _compute(self, name, args):
+        started = time.perf_counter()
+        value = REPORT_SECTIONS[name][0](self, *args)
+        return value, (time.perf_counter() - started) * 1000
+
+    def _compute_in_thread(self, name, args):
+        _reuse_thread_connection()
+        if connection.vendor != "postgresql":
+            return self._compute(name, args)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s", [int(settings.ANALYTICS_REPORT_SECTION_TIMEOUT * 1000)])
+            return self._compute(name, args)
+
+    def _store(self, name, value, ms):
+        self._values[name] = value
+        self.timings[name] = ms
+
+    def build(self) -> dict:
+        started = time.perf_counter()
+        workers = settings.ANALYTICS_REPORT_WORKERS
+        if workers > 1 and not connection.in_atomic_block:
+            self._build_concurrently(workers)
+        result = {name: self[name] for name in self.sections}
+        self._log_timings((time.perf_counter() - started) * 1000, workers)
+        return result
+
+    def _build_concurrently(self, workers):
+        pending = {name: REPORT_SECTIONS[name][1] for name in _closure(self.sections) if name not in self._values}
+        timeout = settings.ANALYTICS_REPORT_SECTION_TIMEOUT
+        running = {}
+        pool = _pool(workers)
+        try:
+            while pending or running:
+                ready = [name for name, requires in pending.items() if all(dep in self._values for dep in requires)]
+                for name in ready:
+                    args = [self._values[dep] for dep in pending.pop(name)]
+                    if REPORT_SECTIONS[name][3]:
+                        future = pool.submit(self._compute_in_thread, name, args)
+                        running[future] = (name, time.monotonic() + timeout)
+                    else:
+                        self._store(name, *self._compute(name, args))
+                if ready and not running:
+                    continue
+                if not running:
+                    break
+                deadline = min(until for _, until in running.values())
+                done, _ = wait(running, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    name = min(running.values(), key=lambda item: item[1])[0]
+                    raise ReportSectionTimeout(f"Report section {name} took longer than {timeout}s")
+                for future in done:
+                    self._store(running.pop(future)[0], *future.result())
+        finally:
+            # Not-started sections are dropped; a running one ends when statement_timeout cancels its query.
+            for future in running:
+                future.cancel()
+
+    def _log_timings(self, total_ms, workers):
+        if not self.timings:
+            return
+        slowest = max(self.timings, key=self.timings.get)
+        logger.info(
+            "analytics.report built client_id=%s workers=%s total_ms=%.1f sum_ms=%.1f slowest=%s sections=%s",
+            self.client.id,
+            workers,
+            total_ms,
+            sum(self.timings.values()),
+            slowest,
+            " ".join(f"{name}:{ms:.1f}" for name, ms in sorted(self.timings.items(), key=lambda pair: -pair[1])),
+        )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-section")
+        return _pools[workers]
 
-def _count_map(queryset, date_field, value_field="id", distinct=False):
-    rows = (
-        queryset.annotate(day=TruncDate(date_field))
-        .values("day")
-        .annotate(count=Count(value_field, distinct=distinct))
-        .order_by("day")
-    )
-    return {row["day"]: int(row["count"] or 0) for row in rows}
+
+def _reuse_thread_connection():
+    """Keep a pool thread's connection between sections, as CONN_MAX_AGE does between requests."""
+    connection.close_if_unusable_or_obsolete()
+    if connection.connection is None:
+        connection.ensure_connection()
+        connection.close_at = time.monotonic() + settings.ANALYTICS_REPORT_CONN_MAX_AGE
+
+
+def _close_thread_connection(barrier):
+    # The barrier holds every pool thread until all of them took one of these tasks.
+    barrier.wait()
+    connections.close_all()
+
+
+def close_pool():
+    """Close the pool threads' connections and stop the threads (used by the tests)."""
+    with _pools_lock:
+        pools = list(_pools.items())
+        _pools.clear()
+    for workers, pool in pools:
+        barrier = threading.Barrier(workers)
+        wait([pool.submit(_close_thread_connection, barrier) for _ in range(workers)])
+        pool.shutdown()
+
+
+def build_report(client, date_from, date_to, sections, *, limit=None, after=None):
+    return Report(client, date_from, date_to, sections, limit=limit, after=after).build()
 
 
 def build_full_report(client, date_from, date_to):
-    metrics = get_metrics(client=client, date_from=date_from, date_to=date_to)
-    from_dt = metrics["from_dt"]
-    to_dt = metrics["to_dt"]
-
-    visits_qs = Visit.objects.filter(site__token=client.api_key, started_at__gte=from_dt, started_at__lte=to_dt)
-    page_views_qs = PageView.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt)
-    forms_qs = Event.objects.filter(
-        client=client,
-        event_type=Event.EventType.FORM_SUBMIT,
-        created_at__gte=from_dt,
-        created_at__lte=to_dt,
-    ).exclude(element_id="fetch_json")
-    time_on_page_qs = Event.objects.filter(
-        client=client,
-        event_type=Event.EventType.TIME_ON_PAGE,
-        created_at__gte=from_dt,
-        created_at__lte=to_dt,
-        duration_seconds__gt=0,
+    return build_report(client, date_from, date_to, FULL_REPORT_SECTIONS)
+
+
+def _percent(part, total):
+    return round((part / total) * 100, 2) if total else 0.0
+
+
+@section("days", queries=True)
+def _days(report):
+    return load_days(report.client, report.date_from, report.date_to, dimensions=report.dimensions)
+
+
+@section("unique_users", queries=True)
+def _unique_users(report):
+    return count_unique(report.client, report.date_from, report.date_to)
+
+
+@section("metrics", requires=("days", "unique_users"))
+def _metrics(report, days, unique_users):
+    return get_metrics(
+        client=report.client, date_from=report.date_from, date_to=report.date_to, days=days, unique_users=unique_users
     )
-    leads_qs = Lead.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt)
 
-    unique_filter = Q(visitor_id__isnull=False) & ~Q(visitor_id="")
-    visits_by_day = _count_map(visits_qs, "started_at")
-    forms_by_day = _count_map(forms_qs, "created_at")
-    leads_by_day = _count_map(leads_qs, "created_at")
-    unique_with_id_by_day = _count_map(visits_qs.filter(unique_filter), "started_at", value_field="visitor_id", distinct=True)
-    unique_without_id_by_day = _count_map(visits_qs.exclude(unique_filter), "started_at", value_field="session_id", distinct=True)
 
-    all_days = sorted(set(visits_by_day) | set(forms_by_day) | set(leads_by_day) | set(unique_with_id_by_day) | set(unique_without_id_by_day))
+@section("devices", requires=("days",), dimensions=(Dimension.DEVICE, Dimension.OS, Dimension.BROWSER))
+def _devices(report, days):
+    return get_device_distribution(client=report.client, date_from=report.date_from, date_to=report.date_to, days=days)
+
+
+@section("period")
+def _period(report):
+    return {"date_from": report.date_from, "date_to": report.date_to}
+
+
+@section("summary", requires=("metrics",))
+def _summary(report, metrics):
+    return {
+        "visits": metrics["visits"],
+        "unique_users": metrics["unique_users"],
+        "forms": metrics["forms"],
+        "leads": metrics["leads"],
+        "notifications_sent": metrics["notifications_sent"],
+        "conversion": metrics["conversion"],
+        "total_time_on_site_seconds": metrics["total_time_on_site_seconds"],
+        "avg_visit_duration_seconds": metrics["avg_visit_duration_seconds"],
+    }
+
+
+@section("daily_stats", requires=("days",))
+def _daily_stats(report, days):
     daily_stats = []
-    for day in all_days:
-        visits = visits_by_day.get(day, 0)
-        unique = unique_with_id_by_day.get(day, 0) + unique_without_id_by_day.get(day, 0)
-        forms = forms_by_day.get(day, 0)
-        leads = leads_by_day.get(day, 0)
-        conversion_events = max(forms, leads)
+    for day in sorted(days):
+        stats = days[day]["stats"]
+        visits = stats["visits"]
+        unique = stats["unique_visitors"]
+        forms = stats["forms"]
+        leads = stats["leads"]
+        if not (visits or unique or forms or leads):
+            continue
         daily_stats.append(
             {
                 "day": day,
@@ -65,164 +303,185 @@ def build_full_report(client, date_from, date_to):
                 "unique_users": unique,
                 "forms": forms,
                 "leads": leads,
-                "conversion": round((conversion_events / visits) * 100, 2) if visits else 0.0,
+                "conversion": _percent(max(forms, leads), visits),
             }
         )
+    return daily_stats
 
-    page_conversion = []
-    page_rows = (
-        page_views_qs.values("pathname")
-        .annotate(visits=Count("id"), leads=Sum("attributed_leads"))
-        .order_by("-leads", "-visits")
-    )
-    for row in page_rows:
-        visits = int(row["visits"] or 0)
-        leads = int(row["leads"] or 0)
-        page_conversion.append(
-            {
-                "pathname": row.get("pathname") or "/",
-                "visits": visits,
-                "leads": leads,
-                "conversion_pct": round((leads / visits) * 100, 2) if visits else 0.0,
-            }
-        )
 
-    total_clicks = ClickEvent.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt).count()
-    top_clicks = []
-    click_rows = (
-        ClickEvent.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt)
-        .values("page_pathname", "element_text", "element_id", "element_class")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
-    for row in click_rows:
-        top_clicks.append(
-            {
-                "page_pathname": row.get("page_pathname") or "/",
-                "element_text": row.get("element_text") or "",
-                "element_id": row.get("element_id") or "",
-                "element_class": row.get("element_class") or "",
-                "count": int(row.get("count") or 0),
-                "percent_of_total": round((int(row.get("count") or 0) / total_clicks) * 100, 2) if total_clicks else 0.0,
-            }
-        )
+@section("path_ranking", requires=("days",), queries=True)
+def _path_ranking(report, days):
+    return top_dimension(report.client, days, Dimension.PATH, order=("leads", "count"), limit=report.limit, after=report.after)
 
-    source_stats = {}
-    for item in page_views_qs.values("utm_source", "referrer", "attributed_leads"):
-        source = (item.get("utm_source") or "").strip().lower()
-        if not source:
-            referrer = (item.get("referrer") or "").strip()
-            source = (urlparse(referrer).netloc or "direct").lower() if referrer else "direct"
-        if source not in source_stats:
-            source_stats[source] = {"visits": 0, "leads": 0}
-        source_stats[source]["visits"] += 1
-        source_stats[source]["leads"] += int(item.get("attributed_leads") or 0)
-
-    total_source_visits = sum(row["visits"] for row in source_stats.values())
-    sources = []
-    for source, source_row in sorted(source_stats.items(), key=lambda pair: pair[1]["visits"], reverse=True):
-        visits = source_row["visits"]
-        leads = source_row["leads"]
-        sources.append(
-            {
-                "source": source,
-                "visits": visits,
-                "leads": leads,
-                "conversion_pct": round((leads / visits) * 100, 2) if visits else 0.0,
-                "percent_of_total": round((visits / total_source_visits) * 100, 2) if total_source_visits else 0.0,
-            }
-        )
 
-    latest_leads_qs = Lead.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt).order_by("-created_at")[:50]
-    leads = LeadSerializer(latest_leads_qs, many=True).data
-    device_distribution = get_device_distribution(client=client, date_from=date_from, date_to=date_to)
-    total_device_visits = max(device_distribution["total_visits"], 1)
-    device_rows = [
+@section("page_conversion", requires=("path_ranking",))
+def _page_conversion(report, ranking):
+    return [
         {
-            "name": name,
-            "count": int(count),
-            "percent": round((int(count) / total_device_visits) * 100, 2),
+            "pathname": pathname or "/",
+            "visits": visits,
+            "leads": leads,
+            "conversion_pct": _percent(leads, visits),
         }
-        for name, count in device_distribution["devices"].items()
+        for pathname, (visits, leads, _) in ranking["rows"]
     ]
-    os_rows = [
+
+
+@section("page_conversion_other", requires=("path_ranking",))
+def _page_conversion_other(report, ranking):
+    """Every path outside the returned window, as one bucket."""
+    visits = ranking["total"][0] - sum(values[0] for _, values in ranking["rows"])
+    leads = ranking["total"][1] - sum(values[1] for _, values in ranking["rows"])
+    return {
+        "paths": ranking["keys"] - len(ranking["rows"]),
+        "visits": visits,
+        "leads": leads,
+        "conversion_pct": _percent(leads, visits),
+    }
+
+
+@section("page_conversion_next", requires=("path_ranking",))
+def _page_conversion_next(report, ranking):
+    return ranking["next"]
+
+
+@section("click_ranking", requires=("days",), queries=True)
+def _click_ranking(report, days):
+    return top_dimension(report.client, days, Dimension.CLICK, order=("count",), limit=report.limit, after=report.after)
+
+
+@section("top_clicks", requires=("click_ranking",))
+def _top_clicks(report, ranking):
+    total_clicks = ranking["total"][0]
+    return [
         {
-            "name": name,
-            "count": int(count),
-            "percent": round((int(count) / total_device_visits) * 100, 2),
+            **split_click_key(key),
+            "count": count,
+            "percent_of_total": _percent(count, total_clicks),
         }
-        for name, count in sorted(device_distribution["os"].items(), key=lambda pair: pair[1], reverse=True)
+        for key, (count, _, _) in ranking["rows"]
     ]
-    browser_rows = [
+
+
+@section("top_clicks_other", requires=("click_ranking",))
+def _top_clicks_other(report, ranking):
+    """Every click target outside the returned window, as one bucket."""
+    count = ranking["total"][0] - sum(values[0] for _, values in ranking["rows"])
+    return {
+        "targets": ranking["keys"] - len(ranking["rows"]),
+        "count": count,
+        "percent_of_total": _percent(count, ranking["total"][0]),
+        "total_clicks": ranking["total"][0],
+    }
+
+
+@section("top_clicks_next", requires=("click_ranking",))
+def _top_clicks_next(report, ranking):
+    return ranking["next"]
+
+
+def _traffic_rows(days, dimension, label):
+    totals = dimension_totals(days, dimension)
+    total_visits = sum(values[0] for values in totals.values())
+    return [
         {
-            "name": name,
-            "count": int(count),
-            "percent": round((int(count) / total_device_visits) * 100, 2),
+            label: key,
+            "visits": visits,
+            "leads": leads,
+            "conversion_pct": _percent(leads, visits),
+            "percent_of_total": _percent(visits, total_visits),
         }
-        for name, count in sorted(device_distribution["browsers"].items(), key=lambda pair: pair[1], reverse=True)
+        for key, (visits, leads, _) in sorted(totals.items(), key=lambda pair: pair[1][0], reverse=True)
     ]
 
-    total_time_on_site_seconds = int(time_on_page_qs.aggregate(total=Sum("duration_seconds")).get("total") or 0)
-    time_on_page_events = time_on_page_qs.count()
-    avg_visit_duration_seconds = round(total_time_on_site_seconds / time_on_page_events, 2) if time_on_page_events else 0
-    engagement_map = {}
-    for item in time_on_page_qs.values("page_url", "duration_seconds"):
-        pathname = urlparse(item.get("page_url") or "").path or "/"
-        if pathname not in engagement_map:
-            engagement_map[pathname] = {"total_duration_seconds": 0, "visits_count": 0}
-        engagement_map[pathname]["total_duration_seconds"] += int(item.get("duration_seconds") or 0)
-        engagement_map[pathname]["visits_count"] += 1
-
-    engagement_pages = []
-    for pathname, row in engagement_map.items():
-        visits_count = int(row["visits_count"] or 0)
-        total_duration_seconds = int(row["total_duration_seconds"] or 0)
-        engagement_pages.append(
+
+@section("sources", requires=("days",), dimensions=(Dimension.SOURCE,))
+def _sources(report, days):
+    return _traffic_rows(days, Dimension.SOURCE, "source")
+
+
+@section("channels", requires=("days",), dimensions=(Dimension.CHANNEL,))
+def _channels(report, days):
+    return _traffic_rows(days, Dimension.CHANNEL, "channel")
+
+
+def _latest_leads(report, limit):
+    from_dt, to_dt = period_bounds(report.date_from, report.date_to)
+    leads_qs = Lead.objects.filter(client=report.client, created_at__gte=from_dt, created_at__lte=to_dt).order_by("-created_at")
+    return LeadSerializer(leads_qs[:limit], many=True).data
+
+
+@section("leads", queries=True)
+def _leads(report):
+    return _latest_leads(report, 50)
+
+
+@section("latest_leads", queries=True)
+def _latest_leads_short(report):
+    return _latest_leads(report, 10)
+
+
+@section("engagement_ranking", requires=("days",), queries=True)
+def _engagement_ranking(report, days):
+    return top_dimension(
+        report.client,
+        days,
+        Dimension.ENGAGEMENT,
+        order=("duration_seconds", "count"),
+        limit=report.limit,
+        after=report.after,
+    )
+
+
+@section("engagement", requires=("days", "engagement_ranking"))
+def _engagement(report, days, ranking):
+    totals = total_stats(days)
+    total_time_on_site_seconds = totals["time_on_page_seconds"]
+    time_on_page_events = totals["time_on_page_events"]
+    pages = [
+        {
+            "pathname": pathname or "/",
+            "avg_duration_seconds": round(total_duration_seconds / visits_count, 2) if visits_count else 0,
+            "total_duration_seconds": total_duration_seconds,
+            "visits_count": visits_count,
+        }
+        for pathname, (visits_count, _, total_duration_seconds) in ranking["rows"]
+    ]
+    return {
+        "total_time_on_site_seconds": total_time_on_site_seconds,
+        "avg_visit_duration_seconds": (
+            round(total_time_on_site_seconds / time_on_page_events, 2) if time_on_page_events else 0
+        ),
+        "pages": pages,
+    }
+
+
+@section("engagement_next", requires=("engagement_ranking",))
+def _engagement_next(report, ranking):
+    return ranking["next"]
+
+
+@section("devices_distribution", requires=("devices",))
+def _devices_distribution(report, devices):
+    total_visits = max(devices["total_visits"], 1)
+
+    def rows(counts):
+        return [
             {
-                "pathname": pathname or "/",
-                "avg_duration_seconds": round(total_duration_seconds / visits_count, 2) if visits_count else 0,
-                "total_duration_seconds": total_duration_seconds,
-                "visits_count": visits_count,
+                "name": name,
+                "count": int(count),
+                "percent": round((int(count) / total_visits) * 100, 2),
             }
-        )
-    engagement_pages.sort(
-        key=lambda row: (
-            int(row.get("total_duration_seconds") or 0),
-            int(row.get("visits_count") or 0),
-        ),
-        reverse=True,
-    )
+            for name, count in counts
+        ]
 
     return {
-        "summary": {
-            "visits": metrics["visits"],
-            "unique_users": metrics["unique_users"],
-            "forms": metrics["forms"],
-            "leads": metrics["leads"],
-            "notifications_sent": metrics["notifications_sent"],
-            "conversion": metrics["conversion"],
-            "total_time_on_site_seconds": total_time_on_site_seconds,
-            "avg_visit_duration_seconds": avg_visit_duration_seconds,
-        },
-        "daily_stats": daily_stats,
-        "top_clicks": top_clicks,
-        "page_conversion": page_conversion,
-        "sources": sources,
-        "leads": leads,
-        "engagement": {
-            "total_time_on_site_seconds": total_time_on_site_seconds,
-            "avg_visit_duration_seconds": avg_visit_duration_seconds,
-            "pages": engagement_pages,
-        },
-        "devices_distribution": {
-            "devices": device_rows,
-            "os": os_rows,
-            "browsers": browser_rows,
-            "raw": {
-                "devices": device_distribution["devices"],
-                "os": device_distribution["os"],
-                "browsers": device_distribution["browsers"],
-            },
+        "devices": rows(devices["devices"].items()),
+        "os": rows(sorted(devices["os"].items(), key=lambda pair: pair[1], reverse=True)),
+        "browsers": rows(sorted(devices["browsers"].items(), key=lambda pair: pair[1], reverse=True)),
+        "raw": {
+            "devices": devices["devices"],
+            "os": devices["os"],
+            "browsers": devices["browsers"],
         },
-        "period": {"date_from": date_from, "date_to": date_to},
     }
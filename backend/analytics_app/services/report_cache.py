@@ -0,0 +1,137 @@
+"""Redis-backed cache for the analytics services, keyed by client, period and section.
+
+Open periods (reaching into the days the rollup job still rebuilds) carry the
+client's data version (core.data_version) in their key, so every ingest write
+makes later reads recompute; ANALYTICS_CACHE_TTL bounds them in any case.
+Settled periods only change through lead status edits, rollup rebuilds and
+backfills; those bump the client's settled generation, which is in their key.
+They are kept for ANALYTICS_CACHE_SETTLED_TTL. Hits, misses and compute time per section are
+counted in a Redis hash, see ``cache_stats``.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from analytics_app.services.device_stats import get_device_distribution
+from analytics_app.services.metrics import get_metrics
+from analytics_app.services.periods import is_settled
+from analytics_app.services.report_builder import FULL_REPORT_SECTIONS, build_full_report, build_report
+from core import data_version
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "analytics:cache:stats"
+
+
+def cache_version(client, date_to):
+    """Key part for results over a period ending ``date_to``, or None when Redis is unavailable."""
+    if is_settled(date_to):
+        generation = data_version.settled(client.api_key)
+        return None if generation is None else f"settled-{generation}"
+    return data_version.current(client.api_key)
+
+
+def _record(section: str, outcome: str, compute_ms: float = 0.0) -> None:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, f"{section}:{outcome}", 1)
+        if compute_ms:
+            pipe.hincrbyfloat(STATS_KEY, f"{section}:compute_ms", round(compute_ms, 3))
+        pipe.execute()
+    except RedisError:
+        pass
+
+
+def cached_section(section: str, client, date_from, date_to, compute):
+    if not settings.ANALYTICS_CACHE_ENABLED:
+        return compute()
+    version = cache_version(client, date_to)
+    if version is None:
+        return compute()
+    timeout = (settings.ANALYTICS_CACHE_SETTLED_TTL or None) if is_settled(date_to) else settings.ANALYTICS_CACHE_TTL
+    key = f"analytics:result:{section}:{client.id}:{date_from}:{date_to}:{version}"
+    try:
+        value = cache.get(key)
+    except RedisError:
+        logger.warning("analytics cache read failed section=%s client_id=%s", section, client.id)
+        return compute()
+    if value is not None:
+        _record(section, "hits")
+        return value
+
+    started = time.perf_counter()
+    value = compute()
+    compute_ms = (time.perf_counter() - started) * 1000
+    try:
+        cache.set(key, value, timeout)
+    except RedisError:
+        logger.warning("analytics cache write failed section=%s client_id=%s", section, client.id)
+    _record(section, "misses", compute_ms)
+    logger.debug("analytics.cache miss section=%s client_id=%s compute_ms=%.1f", section, client.id, compute_ms)
+    return value
+
+
+def cached_report(client, date_from, date_to, sections, *, limit=None, after=None):
+    """``build_report`` for just these sections, cached under their names and row window."""
+    sections = tuple(sections)
+    name = "report" if sections == FULL_REPORT_SECTIONS else "report:" + "+".join(sorted(sections))
+    if limit is not None or after:
+        # Cursor keys are arbitrary page paths and click targets, so only their digest goes into the key.
+        cursor = hashlib.sha1(repr(after).encode()).hexdigest()[:16] if after else ""
+        name = f"{name}:{limit}:{cursor}"
+    return cached_section(
+        name,
+        client,
+        date_from,
+        date_to,
+        lambda: build_report(client, date_from, date_to, sections, limit=limit, after=after),
+    )
+
+
+def cached_full_report(client, date_from, date_to):
+    return cached_section(
+        "report", client, date_from, date_to, lambda: build_full_report(client=client, date_from=date_from, date_to=date_to)
+    )
+
+
+def cached_metrics(client, date_from, date_to):
+    return cached_section("metrics", client, date_from, date_to, lambda: get_metrics(client, date_from, date_to))
+
+
+def cached_device_distribution(client, date_from, date_to):
+    return cached_section(
+        "devices",
+        client,
+        date_from,
+        date_to,
+        lambda: get_device_distribution(client=client, date_from=date_from, date_to=date_to),
+    )
+
+
+def cache_stats() -> dict:
+    """``{section: {hits, misses, hit_rate, avg_compute_ms}}`` across all processes."""
+    raw = get_redis().hgetall(STATS_KEY)
+    counters = {}
+    for field, value in raw.items():
+        section, _, name = field.decode().rpartition(":")
+        counters.setdefault(section, {})[name] = float(value)
+    stats = {}
+    for section, values in sorted(counters.items()):
+        hits = int(values.get("hits", 0))
+        misses = int(values.get("misses", 0))
+        stats[section] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "avg_compute_ms": round(values.get("compute_ms", 0.0) / misses, 1) if misses else 0.0,
+        }
+    return stats
+
+
+def reset_cache_stats() -> None:
+    get_redis().delete(STATS_KEY)
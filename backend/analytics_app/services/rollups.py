@@ -0,0 +1,419 @@
+"""Per-(client, day) rollups of the raw analytics tables.
+
+Closed days (before today in TIME_ZONE) are stored in DailyStats and
+DailyDimension by ``build_rollups``. The ``build_daily_rollups_task`` beat job
+rebuilds the last ANALYTICS_ROLLUP_LOOKBACK_DAYS days, so late writes (stream
+ingest lag, leads attributed to earlier pageviews) still land in the rollups.
+
+``load_days`` serves a period from those rows. Today, and any closed day that
+has no rollup yet, is computed from the raw tables with ``compute_days``, so a
+period is always complete. A day is a dict with ``stats`` (STAT_FIELDS) and
+``dimensions`` (``{(dimension, key): [count, leads, duration_seconds]}``);
+days served from the rollup tables also carry ``"rollup": True``.
+
+``top_dimension`` ranks one dimension over a period without loading it: the
+rollup days are summed with GROUP BY ... ORDER BY ... LIMIT in the database
+and merged with the keys of the raw days.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, Q, Sum, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from analytics_app.models import ClickEvent, DailyDimension, DailyStats, Event, PageView
+from analytics_app.services.engagement import url_pathname
+from analytics_app.services.periods import is_settled, period_bounds
+from analytics_app.services.sources import classify
+from analytics_app.services.uniques import day_sketches, visitor_key
+from core import data_version
+from leads.models import Lead
+from tracker.models import Event as TrackerEvent
+from tracker.models import Visit
+
+STAT_FIELDS = (
+    "visits",
+    "unique_visitors",
+    "forms",
+    "leads",
+    "notifications_sent",
+    "time_on_page_seconds",
+    "time_on_page_events",
+    "page_views",
+    "clicks",
+)
+
+logger = logging.getLogger(__name__)
+
+Dimension = DailyDimension.Dimension
+
+_CLICK_KEY_SEPARATOR = "\x1f"
+
+
+def click_key(page_pathname, element_text, element_id, element_class) -> str:
+    return _CLICK_KEY_SEPARATOR.join(
+        [page_pathname or "/", element_text or "", element_id or "", element_class or ""]
+    )
+
+
+def split_click_key(key: str) -> dict:
+    page_pathname, element_text, element_id, element_class = key.split(_CLICK_KEY_SEPARATOR)
+    return {
+        "page_pathname": page_pathname,
+        "element_text": element_text,
+        "element_id": element_id,
+        "element_class": element_class,
+    }
+
+
+def date_range(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def empty_day() -> dict:
+    return {"stats": dict.fromkeys(STAT_FIELDS, 0), "dimensions": {}}
+
+
+def _per_day(queryset, date_field, *fields, **aggregates):
+    return queryset.annotate(day=TruncDate(date_field)).values("day", *fields).annotate(**aggregates).order_by()
+
+
+# GROUPING(device_type, os, browser_family) of a _visit_rows row: a set bit
+# means the column is rolled up in that row.
+VISIT_TOTALS = 0b111
+VISIT_BY_DEVICE = 0b011
+VISIT_BY_OS = 0b101
+VISIT_BY_BROWSER = 0b110
+VISIT_BY_ALL = 0b000
+
+
+def _visit_rows(visits_qs):
+    """``(day, device_type, os, browser_family, grouping, visits, unique)`` rows of the visits.
+
+    On PostgreSQL this is a single GROUPING SETS scan: per-day totals (with the
+    distinct visitor count) and the per-day device, OS and browser splits.
+    Other backends get the totals and one (device, os, browser) combination
+    row per day (grouping VISIT_BY_ALL) from two plain GROUP BY queries.
+    """
+    day_qs = visits_qs.annotate(day=TruncDate("started_at"))
+    if connection.vendor != "postgresql":
+        for row in day_qs.values("day").annotate(count=Count("id"), unique=Count(visitor_key(), distinct=True)).order_by():
+            yield row["day"], None, None, None, VISIT_TOTALS, row["count"], row["unique"]
+        for row in day_qs.values("day", "device_type", "os", "browser_family").annotate(count=Count("id")).order_by():
+            yield row["day"], row["device_type"], row["os"], row["browser_family"], VISIT_BY_ALL, row["count"], 0
+        return
+
+    inner_sql, params = (
+        day_qs.annotate(visitor=visitor_key()).values("day", "device_type", "os", "browser_family", "visitor").order_by()
+    ).query.sql_with_params()
+    sql = (
+        "SELECT day, device_type, os, browser_family, GROUPING(device_type, os, browser_family), "
+        "COUNT(*), COUNT(DISTINCT visitor) "
+        f"FROM ({inner_sql}) AS visits "
+        "GROUP BY GROUPING SETS ((day), (day, device_type), (day, os), (day, browser_family))"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        yield from cursor.fetchall()
+
+
+def compute_days(client, date_from, date_to) -> dict:
+    """``{day: day_dict}`` from the raw tables; days without any data are left out."""
+    from_dt, to_dt = period_bounds(date_from, date_to)
+    days = {}
+
+    def day_entry(day):
+        return days.setdefault(day, empty_day())
+
+    def add_stat(day, field, value):
+        day_entry(day)["stats"][field] += int(value or 0)
+
+    def add_dimension(day, dimension, key, count=0, leads=0, duration_seconds=0):
+        entry = day_entry(day)["dimensions"].setdefault((dimension, key), [0, 0, 0])
+        entry[0] += int(count or 0)
+        entry[1] += int(leads or 0)
+        entry[2] += int(duration_seconds or 0)
+
+    # One grouped query per source table; per-day stats come from FILTER
+    # aggregates, and period totals are summed from the days.
+    visits_qs = Visit.objects.filter(site__token=client.api_key, started_at__gte=from_dt, started_at__lte=to_dt)
+    for day, device_type, os_name, browser_family, grouping, count, unique in _visit_rows(visits_qs):
+        if grouping == VISIT_TOTALS:
+            add_stat(day, "visits", count)
+            add_stat(day, "unique_visitors", unique)
+        if grouping in (VISIT_BY_DEVICE, VISIT_BY_ALL):
+            add_dimension(day, Dimension.DEVICE, (device_type or "").strip().lower(), count)
+        if grouping in (VISIT_BY_OS, VISIT_BY_ALL):
+            add_dimension(day, Dimension.OS, os_name or "Unknown", count)
+        if grouping in (VISIT_BY_BROWSER, VISIT_BY_ALL):
+            add_dimension(day, Dimension.BROWSER, browser_family or "Unknown", count)
+
+    form_filter = Q(event_type=Event.EventType.FORM_SUBMIT) & (Q(element_id__isnull=True) | ~Q(element_id="fetch_json"))
+    time_on_page_filter = Q(event_type=Event.EventType.TIME_ON_PAGE, duration_seconds__gt=0)
+    # Events stored before the pathname column existed group by their page_url.
+    events_qs = Event.objects.filter(
+        client=client,
+        event_type__in=[Event.EventType.FORM_SUBMIT, Event.EventType.TIME_ON_PAGE],
+        created_at__gte=from_dt,
+        created_at__lte=to_dt,
+    ).annotate(raw_page_url=Case(When(pathname="", then="page_url")))
+    event_rows = _per_day(
+        events_qs,
+        "created_at",
+        "pathname",
+        "raw_page_url",
+        forms=Count("id", filter=form_filter),
+        time_on_page_events=Count("id", filter=time_on_page_filter),
+        time_on_page_seconds=Sum("duration_seconds", filter=time_on_page_filter),
+    )
+    for row in event_rows:
+        add_stat(row["day"], "forms", row["forms"])
+        if row["time_on_page_events"]:
+            add_stat(row["day"], "time_on_page_events", row["time_on_page_events"])
+            add_stat(row["day"], "time_on_page_seconds", row["time_on_page_seconds"])
+            pathname = row["pathname"] or url_pathname(row["raw_page_url"])
+            add_dimension(
+                row["day"],
+                Dimension.ENGAGEMENT,
+                pathname,
+                row["time_on_page_events"],
+                duration_seconds=row["time_on_page_seconds"],
+            )
+
+    leads_qs = Lead.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt)
+    for row in _per_day(leads_qs, "created_at", count=Count("id")):
+        add_stat(row["day"], "leads", row["count"])
+
+    notified_qs = TrackerEvent.objects.filter(
+        visit__site__token=client.api_key,
+        type="form_submit",
+        timestamp__gte=from_dt,
+        timestamp__lte=to_dt,
+        payload__telegram_notified=True,
+    )
+    for row in _per_day(notified_qs, "timestamp", count=Count("id")):
+        add_stat(row["day"], "notifications_sent", row["count"])
+
+    # Rows stored before ingest-time classification group by their raw fields too.
+    unclassified = Q(source="")
+    page_views_qs = PageView.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt).annotate(
+        raw_utm_source=Case(When(unclassified, then="utm_source")),
+        raw_utm_medium=Case(When(unclassified, then="utm_medium")),
+        raw_referrer=Case(When(unclassified, then="referrer")),
+        raw_query_string=Case(When(unclassified, then="query_string")),
+    )
+    page_rows = _per_day(
+        page_views_qs,
+        "created_at",
+        "pathname",
+        "source",
+        "channel",
+        "raw_utm_source",
+        "raw_utm_medium",
+        "raw_referrer",
+        "raw_query_string",
+        count=Count("id"),
+        leads=Sum("attributed_leads"),
+    )
+    for row in page_rows:
+        source, channel = row["source"], row["channel"]
+        if not source:
+            source, channel = classify(row["raw_utm_source"], row["raw_utm_medium"], row["raw_referrer"], row["raw_query_string"])
+        add_stat(row["day"], "page_views", row["count"])
+        add_dimension(row["day"], Dimension.PATH, row["pathname"] or "/", row["count"], row["leads"])
+        add_dimension(row["day"], Dimension.SOURCE, source, row["count"], row["leads"])
+        add_dimension(row["day"], Dimension.CHANNEL, channel, row["count"], row["leads"])
+
+    clicks_qs = ClickEvent.objects.filter(client=client, created_at__gte=from_dt, created_at__lte=to_dt)
+    click_rows = _per_day(
+        clicks_qs,
+        "created_at",
+        "page_pathname",
+        "element_text",
+        "element_id",
+        "element_class",
+        count=Count("id"),
+    )
+    for row in click_rows:
+        add_stat(row["day"], "clicks", row["count"])
+        key = click_key(row["page_pathname"], row["element_text"], row["element_id"], row["element_class"])
+        add_dimension(row["day"], Dimension.CLICK, key, row["count"])
+
+    return days
+
+
+def build_rollups(client, date_from, date_to) -> int:
+    """Rebuild the rollups of ``client`` for the closed days in the range; returns the number of days written."""
+    date_to = min(date_to, timezone.localdate() - timedelta(days=1))
+    if date_from > date_to:
+        return 0
+    days = compute_days(client, date_from, date_to)
+    sketches = {}
+    if settings.ANALYTICS_HLL_ENABLED:
+        try:
+            sketches = day_sketches(client, date_from, date_to)
+        except RedisError:
+            logger.warning("analytics.rollups visitor sketches skipped client_id=%s", client.id)
+    stats_rows = []
+    dimension_rows = []
+    for day in date_range(date_from, date_to):
+        data = days.get(day) or empty_day()
+        stats_rows.append(DailyStats(client=client, day=day, visitor_sketch=sketches.get(day), **data["stats"]))
+        for (dimension, key), (count, leads, duration_seconds) in data["dimensions"].items():
+            dimension_rows.append(
+                DailyDimension(
+                    client=client,
+                    day=day,
+                    dimension=dimension,
+                    key=key,
+                    count=count,
+                    leads=leads,
+                    duration_seconds=duration_seconds,
+                )
+            )
+    with transaction.atomic():
+        DailyStats.objects.filter(client=client, day__gte=date_from, day__lte=date_to).delete()
+        DailyDimension.objects.filter(client=client, day__gte=date_from, day__lte=date_to).delete()
+        DailyStats.objects.bulk_create(stats_rows)
+        DailyDimension.objects.bulk_create(dimension_rows, batch_size=1000)
+        if is_settled(date_from):
+            data_version.bump(client.api_key, settled=True)
+    return len(stats_rows)
+
+
+def _runs(days):
+    """Split sorted days into ``(first, last)`` runs of consecutive days."""
+    runs = []
+    for day in days:
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def load_days(client, date_from, date_to, dimensions=()) -> dict:
+    """``{day: day_dict}`` for the period: rollups for closed days, raw data for the rest.
+
+    Only the listed ``dimensions`` are read from the rollup table; days
+    computed from raw data carry all of them.
+    """
+    days = {}
+    closed_to = min(date_to, timezone.localdate() - timedelta(days=1))
+    if settings.ANALYTICS_ROLLUPS_ENABLED and date_from <= closed_to:
+        stats = DailyStats.objects.filter(client=client, day__gte=date_from, day__lte=closed_to)
+        for row in stats.values("day", *STAT_FIELDS):
+            days[row.pop("day")] = {"stats": row, "dimensions": {}, "rollup": True}
+        if days and dimensions:
+            dimension_rows = DailyDimension.objects.filter(
+                client=client,
+                day__gte=date_from,
+                day__lte=closed_to,
+                dimension__in=list(dimensions),
+            ).values_list("day", "dimension", "key", "count", "leads", "duration_seconds")
+            for day, dimension, key, count, leads, duration_seconds in dimension_rows:
+                if day in days:
+                    days[day]["dimensions"][(dimension, key)] = [count, leads, duration_seconds]
+
+    missing = [day for day in date_range(date_from, date_to) if day not in days]
+    for first, last in _runs(missing):
+        days.update(compute_days(client, first, last))
+    return days
+
+
+DIMENSION_FIELDS = ("count", "leads", "duration_seconds")
+
+
+def _ranked_after(order, after):
+    """Rollup groups ranked after ``after``: ``(order values, key)`` of the last row already returned."""
+    values, key = after
+    condition = Q(key__gt=key)
+    for field, value in reversed(list(zip(order, values))):
+        condition = Q(**{f"{field}__lt": value}) | (Q(**{field: value}) & condition)
+    return condition
+
+
+def top_dimension(client, days, dimension, *, order, limit, after=None) -> dict:
+    """Rank one dimension over ``days`` (from ``load_days``) by the ``order`` fields, largest first.
+
+    Returns ``{"rows": [(key, [count, leads, duration_seconds])], "total": [...],
+    "keys": distinct_keys, "next": after_or_none}`` with the first ``limit``
+    rows ranked after ``after`` (keyset pagination: the order values and key of
+    the previous page's last row; ties are broken by key). ``next`` is the
+    ``after`` of the following page, None on the last one. Only the rollup rows
+    that can reach that page are read: the SQL top ``limit + 1`` after the
+    cursor plus whatever keys the raw days also have.
+    """
+    positions = [DIMENSION_FIELDS.index(field) for field in order]
+
+    def rank(item):
+        return tuple(-item[1][position] for position in positions) + (item[0],)
+
+    raw_days = {day: data for day, data in days.items() if not data.get("rollup")}
+    raw = dimension_totals(raw_days, dimension)
+    total = [sum(values[index] for values in raw.values()) for index in range(3)]
+    candidates = {key: list(values) for key, values in raw.items()}
+    keys = len(raw)
+
+    rollup_days = [day for day, data in days.items() if data.get("rollup")]
+    if rollup_days:
+        sums = {field: Sum(field) for field in DIMENSION_FIELDS}
+        rollup_rows = DailyDimension.objects.filter(
+            client=client, dimension=dimension, day__gte=min(rollup_days), day__lte=max(rollup_days)
+        )
+        aggregate = rollup_rows.aggregate(keys=Count("key", distinct=True), **sums)
+        closed = rollup_rows.values("key").annotate(**sums)
+        total = [total[index] + int(aggregate[field] or 0) for index, field in enumerate(DIMENSION_FIELDS)]
+        keys += aggregate["keys"]
+
+        # Raw traffic only adds to a key's rollup sums, so a key ranked after the
+        # cursor by its full sums is ranked after it by its rollup sums as well.
+        ranked = closed.filter(_ranked_after(order, after)) if after else closed
+        top = ranked.order_by(*[f"-{field}" for field in order], "key")[: limit + 1]
+        # Keys that also had raw traffic need their full rollup sums, ranked or not.
+        shared = closed.filter(key__in=list(raw)) if raw else []
+        for row in top:
+            candidates.setdefault(row["key"], [int(row[field] or 0) for field in DIMENSION_FIELDS])
+        for row in shared:
+            keys -= 1
+            candidates[row["key"]] = [
+                raw[row["key"]][index] + int(row[field] or 0) for index, field in enumerate(DIMENSION_FIELDS)
+            ]
+
+    rows = sorted(candidates.items(), key=rank)
+    if after:
+        cursor = tuple(-value for value in after[0]) + (after[1],)
+        rows = [row for row in rows if rank(row) > cursor]
+    following = None
+    if len(rows) > limit:
+        key, values = rows[limit - 1]
+        following = (tuple(values[position] for position in positions), key)
+    return {"rows": rows[:limit], "total": total, "keys": keys, "next": following}
+
+
+def total_stats(days: dict) -> dict:
+    totals = dict.fromkeys(STAT_FIELDS, 0)
+    for data in days.values():
+        for field in STAT_FIELDS:
+            totals[field] += int(data["stats"][field] or 0)
+    return totals
+
+
+def dimension_totals(days: dict, dimension) -> dict:
+    """``{key: [count, leads, duration_seconds]}`` of one dimension summed over the days."""
+    totals = {}
+    for data in days.values():
+        for (row_dimension, key), values in data["dimensions"].items():
+            if row_dimension != dimension:
+                continue
+            entry = totals.setdefault(key, [0, 0, 0])
+            for index, value in enumerate(values):
+                entry[index] += int(value or 0)
+    return totals
@@ -0,0 +1,47 @@
+from django.db import transaction
+
+from analytics_app.models import PageView
+from core.session_state import session_state
+
+
+def _scope(client_id) -> str:
+    return f"client:{client_id}"
+
+
+def remember_page_view(page_view) -> None:
+    if page_view.id is None:
+        return
+    fields = {
+        "page_view_id": page_view.id,
+        "url": page_view.url,
+        "pathname": page_view.pathname,
+        "referrer": page_view.referrer,
+    }
+    # Only publish ids that made it to the database.
+    transaction.on_commit(lambda: session_state.update(_scope(page_view.client_id), page_view.session_id, fields))
+
+
+def latest_page_view(client, session_id):
+    """Latest analytics PageView of the session, served from session state when possible.
+
+    A state hit returns an unsaved ``PageView`` carrying only id, url, pathname
+    and referrer; use queryset ``update()`` by id rather than ``save()`` on it.
+    """
+    state = session_state.get(_scope(client.id), session_id)
+    if state.get("page_view_id"):
+        return PageView(
+            id=int(state["page_view_id"]),
+            client=client,
+            session_id=session_id,
+            url=state.get("url", ""),
+            pathname=state.get("pathname") or "/",
+            referrer=state.get("referrer") or None,
+        )
+    page_view = (
+        PageView.objects.filter(client=client, session_id=session_id)
+        .order_by("-created_at")
+        .first()
+    )
+    if page_view:
+        remember_page_view(page_view)
+    return page_view
@@ -0,0 +1,107 @@
+"""Traffic source and channel of a pageview, classified once at ingest.
+
+``source`` is the lower-cased utm_source, else the referrer host, else
+"direct". ``channel`` groups sources into direct/search/social/ads/referral
+by the utm_medium, ad click ids and the domain tables below.
+"""
+from functools import lru_cache
+from urllib.parse import parse_qs, urlparse
+
+from analytics_app.models import PageView
+from clients.models import Client
+from core import data_version
+
+Channel = PageView.Channel
+
+PAID_MEDIUMS = frozenset({"cpc", "ppc", "cpm", "cpa", "cpv", "paid", "paidsearch", "paid_search", "paidsocial", "paid_social", "display", "banner", "ads"})
+AD_CLICK_IDS = frozenset({"gclid", "yclid", "msclkid", "dclid"})
+# Search engines match on any label, so every country domain (google.de, yandex.kz) counts.
+SEARCH_ENGINES = frozenset({"google", "yandex", "ya", "bing", "yahoo", "duckduckgo", "baidu", "ecosia", "rambler"})
+SOCIAL_DOMAINS = frozenset(
+    {
+        "vk.com",
+        "vk.ru",
+        "ok.ru",
+        "dzen.ru",
+        "t.me",
+        "telegram.org",
+        "facebook.com",
+        "fb.com",
+        "instagram.com",
+        "twitter.com",
+        "x.com",
+        "t.co",
+        "youtube.com",
+        "linkedin.com",
+        "tiktok.com",
+        "pinterest.com",
+        "reddit.com",
+    }
+)
+# utm_source values that name a network instead of a domain.
+SOCIAL_NAMES = frozenset({"vk", "vkontakte", "ok", "odnoklassniki", "dzen", "telegram", "tg", "facebook", "fb", "instagram", "ig", "twitter", "youtube", "linkedin", "tiktok", "pinterest", "reddit"})
+
+
+def traffic_source(utm_source, referrer) -> str:
+    source = (utm_source or "").strip().lower()
+    if source:
+        return source
+    referrer = (referrer or "").strip()
+    return (urlparse(referrer).netloc or "direct").lower() if referrer else "direct"
+
+
+@lru_cache(maxsize=4096)
+def source_channel(source: str) -> str:
+    """Channel of a non-paid source (a utm_source name or a referrer host)."""
+    if source == "direct":
+        return Channel.DIRECT
+    host = source.split(":", 1)[0]
+    if host in SOCIAL_NAMES:
+        return Channel.SOCIAL
+    labels = host.split(".")
+    if any(label in SEARCH_ENGINES for label in labels[:-1] or labels):
+        return Channel.SEARCH
+    if any(".".join(labels[index:]) in SOCIAL_DOMAINS for index in range(len(labels))):
+        return Channel.SOCIAL
+    return Channel.REFERRAL
+
+
+def _has_ad_click_id(query_string) -> bool:
+    return bool(query_string) and not AD_CLICK_IDS.isdisjoint(parse_qs(query_string))
+
+
+def classify(utm_source, utm_medium, referrer, query_string=None) -> tuple[str, str]:
+    """``(source, channel)`` for a pageview."""
+    source = traffic_source(utm_source, referrer)[:255]
+    if (utm_medium or "").strip().lower() in PAID_MEDIUMS or _has_ad_click_id(query_string):
+        return source, Channel.ADS
+    return source, source_channel(source)
+
+
+def backfill_sources(batch_size=1000, client_ids=None) -> int:
+    """Classify pageviews stored before ``source``/``channel`` existed; returns the rows updated."""
+    pending = PageView.objects.filter(source="")
+    if client_ids:
+        pending = pending.filter(client_id__in=client_ids)
+    updated = 0
+    last_id = 0
+    touched = set()
+    while True:
+        rows = list(
+            pending.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "client_id", "utm_source", "utm_medium", "referrer", "query_string")[:batch_size]
+        )
+        if not rows:
+            # Historical pageviews changed, so cached settled reports are stale too.
+            for api_key in Client.objects.filter(id__in=touched).values_list("api_key", flat=True):
+                data_version.bump(api_key, settled=True)
+            return updated
+        page_views = []
+        for page_view_id, client_id, utm_source, utm_medium, referrer, query_string in rows:
+            source, channel = classify(utm_source, utm_medium, referrer, query_string)
+            page_views.append(PageView(id=page_view_id, source=source, channel=channel))
+            touched.add(client_id)
+        PageView.objects.bulk_update(page_views, ["source", "channel"])
+        updated += len(page_views)
+        last_id = rows[-1][0]
@@ -0,0 +1,168 @@
+"""Unique visitor counts, exact or from per-(client, day) HyperLogLog sketches.
+
+A visitor is ``visitor_key()``: the visitor_id, or the session for visits
+without one. Ingest PFADDs it into ``hll:visitors:{token}:{day}`` in Redis
+(``record_visit``). The rollup job stores an exact-input sketch of every
+closed day in ``DailyStats.visitor_sketch``, so closed days survive Redis
+restarts and pick up late writes. ``count_unique`` merges the sketches of a
+period with PFCOUNT (about 0.81% standard error); periods of up to
+ANALYTICS_HLL_EXACT_MAX_DAYS days, and any failure, use the exact query.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce, NullIf, TruncDate
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from analytics_app.models import DailyStats
+from analytics_app.services.periods import period_bounds
+from core.redis_client import get_redis
+from tracker.models import Visit
+
+logger = logging.getLogger(__name__)
+
+PFADD_CHUNK = 1000
+_TEMP_TTL = 60
+
+
+def visitor_key():
+    """What a unique visitor is: the visitor_id, or the session for visits without one."""
+    return Coalesce(NullIf("visitor_id", Value("")), "session_id")
+
+
+def _key(token: str, day) -> str:
+    return f"hll:visitors:{token}:{day.isoformat()}"
+
+
+def _visits(client, date_from, date_to):
+    from_dt, to_dt = period_bounds(date_from, date_to)
+    return Visit.objects.filter(site__token=client.api_key, started_at__gte=from_dt, started_at__lte=to_dt)
+
+
+def _add(redis, key: str, members) -> None:
+    chunk = []
+    for member in members:
+        chunk.append(member)
+        if len(chunk) >= PFADD_CHUNK:
+            redis.pfadd(key, *chunk)
+            chunk = []
+    if chunk:
+        redis.pfadd(key, *chunk)
+
+
+def _add_visit(token: str, day, member: str) -> None:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.pfadd(_key(token, day), member)
+        pipe.expire(_key(token, day), settings.ANALYTICS_HLL_TTL_DAYS * 86400)
+        pipe.execute()
+    except RedisError:
+        logger.warning("unique visitor sketch update failed token=%s day=%s", token, day)
+
+
+def record_visit(token: str, visit) -> None:
+    """Add the visit's visitor to today's sketch once the current transaction commits."""
+    if not settings.ANALYTICS_HLL_ENABLED or not token:
+        return
+    member = visit.visitor_id or visit.session_id
+    day = timezone.localdate(visit.started_at)
+    transaction.on_commit(lambda: _add_visit(token, day, member))
+
+
+def count_unique_exact(client, date_from, date_to) -> int:
+    return _visits(client, date_from, date_to).aggregate(unique=Count(visitor_key(), distinct=True))["unique"]
+
+
+def day_sketches(client, date_from, date_to) -> dict:
+    """``{day: sketch_bytes}`` built from the raw visits; raises RedisError."""
+    members = {}
+    rows = (
+        _visits(client, date_from, date_to)
+        .annotate(day=TruncDate("started_at"), member=visitor_key())
+        .values_list("day", "member")
+        .distinct()
+        .order_by()
+    )
+    for day, member in rows.iterator():
+        members.setdefault(day, []).append(member)
+
+    redis = get_redis()
+    key = f"hll:tmp:{uuid.uuid4().hex}"
+    sketches = {}
+    try:
+        for day, day_members in members.items():
+            redis.delete(key)
+            _add(redis, key, day_members)
+            sketches[day] = redis.get(key)
+    finally:
+        redis.delete(key)
+    return sketches
+
+
+def estimate_unique(client, date_from, date_to) -> int:
+    """HyperLogLog estimate over the period; raises RedisError."""
+    today = timezone.localdate()
+    # Closed days without visitors have no sketch but need no raw scan either.
+    stored = {}
+    rows = DailyStats.objects.filter(
+        client=client, day__gte=date_from, day__lte=min(date_to, today - timedelta(days=1))
+    ).values_list("day", "unique_visitors", "visitor_sketch")
+    for day, unique_visitors, sketch in rows:
+        if sketch is not None or not unique_visitors:
+            stored[day] = sketch
+    redis = get_redis()
+    prefix = f"hll:tmp:{uuid.uuid4().hex}"
+    keys = []
+    try:
+        pipe = redis.pipeline(transaction=False)
+        for index, sketch in enumerate(sketch for sketch in stored.values() if sketch is not None):
+            keys.append(f"{prefix}:{index}")
+            pipe.set(keys[-1], bytes(sketch), ex=_TEMP_TTL)
+        pipe.execute()
+
+        missing = []
+        day = date_from
+        while day <= date_to:
+            if day == today and redis.exists(_key(client.api_key, day)):
+                keys.append(_key(client.api_key, day))
+            elif day not in stored:
+                missing.append(day)
+            day += timedelta(days=1)
+        if missing:
+            # Days without a stored sketch yet are sketched from the raw rows.
+            keys.append(f"{prefix}:raw")
+            members = (
+                _visits(client, missing[0], missing[-1])
+                .annotate(day=TruncDate("started_at"), member=visitor_key())
+                .filter(day__in=missing)
+                .values_list("member", flat=True)
+                .distinct()
+                .order_by()
+            )
+            _add(redis, keys[-1], members.iterator())
+        return int(redis.pfcount(*keys)) if keys else 0
+    finally:
+        temp_keys = [key for key in keys if key.startswith(prefix)]
+        if temp_keys:
+            redis.delete(*temp_keys)
+
+
+def count_unique(client, date_from, date_to) -> int:
+    """Unique visitors over the period: exact for short periods, HyperLogLog otherwise."""
+    period_days = (date_to - date_from).days + 1
+    if (
+        not settings.ANALYTICS_HLL_ENABLED
+        or not settings.ANALYTICS_ROLLUPS_ENABLED
+        or period_days <= settings.ANALYTICS_HLL_EXACT_MAX_DAYS
+    ):
+        return count_unique_exact(client, date_from, date_to)
+    try:
+        return estimate_unique(client, date_from, date_to)
+    except RedisError:
+        logger.warning("unique visitor estimate failed client_id=%s, counting exactly", client.id)
+        return count_unique_exact(client, date_from, date_to)
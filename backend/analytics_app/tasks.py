@@ -0,0 +1,26 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from analytics_app.services.rollups import build_rollups
+from clients.models import Client
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def build_daily_rollups_task(lookback_days: int | None = None) -> int:
+    lookback_days = settings.ANALYTICS_ROLLUP_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    date_to = timezone.localdate() - timedelta(days=1)
+    date_from = date_to - timedelta(days=max(1, lookback_days) - 1)
+    built = 0
+    for client in Client.objects.filter(is_active=True).only("id", "api_key").iterator():
+        try:
+            built += build_rollups(client, date_from, date_to)
+        except Exception:
+            logger.exception("analytics.rollups failed client_id=%s date_from=%s date_to=%s", client.id, date_from, date_to)
+    logger.info("analytics.rollups built days=%s date_from=%s date_to=%s", built, date_from, date_to)
+    return built
@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from analytics_app.models import Event
+from analytics_app.services.rollups import Dimension, compute_days, dimension_totals
+from clients.models import Client
+
+
+class EventPathnameTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.today = timezone.localdate()
+        # One row written at ingest with its pathname, two legacy rows without.
+        for pathname, page_url, duration in [
+            ("/pricing", "https://test.local/pricing?utm_source=vk", 10),
+            ("", "https://test.local/pricing?utm_source=ads", 20),
+            ("", "https://test.local/", 5),
+        ]:
+            Event.objects.create(
+                client=self.client_obj,
+                event_type=Event.EventType.TIME_ON_PAGE,
+                page_url=page_url,
+                pathname=pathname,
+                duration_seconds=duration,
+            )
+
+    def _engagement(self):
+        return dimension_totals(compute_days(self.client_obj, self.today, self.today), Dimension.ENGAGEMENT)
+
+    def test_engagement_groups_stored_and_legacy_pathnames(self):
+        self.assertEqual(self._engagement(), {"/pricing": [2, 0, 30], "/": [1, 0, 5]})
+
+    def test_backfill_fills_legacy_rows(self):
+        before = self._engagement()
+        call_command("backfill_event_pathnames", "--batch-size", "1", stdout=StringIO())
+
+        self.assertFalse(Event.objects.filter(pathname="").exists())
+        self.assertEqual(self._engagement(), before)
@@ -0,0 +1,198 @@
+import json
+from datetime import timedelta
+from unittest import skipUnless
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from analytics_app.models import ClickEvent, Event, PageView
+from analytics_app.services.metrics import get_metrics
+from analytics_app.services.report_builder import build_full_report
+from analytics_app.services.rollups import build_rollups, compute_days
+from analytics_app.services.uniques import count_unique_exact
+from clients.models import Client
+from leads.models import Lead
+from tracker.models import Event as TrackerEvent
+from tracker.models import PageView as TrackerPageView
+from tracker.models import Site, Visit
+
+SEEDED_TABLES = (
+    "tracker_site",
+    "tracker_visit",
+    "tracker_pageview",
+    "tracker_event",
+    "analytics_app_event",
+    "analytics_app_pageview",
+    "analytics_app_clickevent",
+    "analytics_app_dailystats",
+    "analytics_app_dailydimension",
+    "leads_lead",
+)
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are checked on PostgreSQL only")
+@override_settings(ANALYTICS_HLL_ENABLED=False)
+class AnalyticsQueryPlanTests(TestCase):
+    """Every analytics query must be answerable from an index.
+
+    The tables hold a few hundred synthetic rows, so sequential scans are
+    disabled for the planner: a Seq Scan that still shows up means no index
+    fits the query. Bitmap scans are disabled too, so a covering index shows
+    up as an Index Only Scan.
+    """
+
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.today = timezone.localdate()
+        self.date_from = self.today - timedelta(days=6)
+        self._seed()
+        with connection.cursor() as cursor:
+            for table in SEEDED_TABLES:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+    def _seed(self):
+        now = timezone.now()
+        for days_ago in range(7):
+            moment = now - timedelta(days=days_ago)
+            for idx in range(30):
+                visit = Visit.objects.create(
+                    site=self.site,
+                    session_id=uuid4().hex,
+                    visitor_id=f"v-{idx % 12}" if idx % 3 else "",
+                    device_type=("mobile", "desktop", "tablet")[idx % 3],
+                    os=("iOS", "Android", "Windows", None)[idx % 4],
+                    browser_family=("Safari", "Chrome", "Firefox")[idx % 3],
+                    started_at=moment,
+                )
+                TrackerPageView.objects.create(visit=visit, url="https://test.local/", timestamp=moment)
+                TrackerEvent.objects.create(
+                    visit=visit,
+                    type="form_submit" if idx % 5 == 0 else "click",
+                    payload={"telegram_notified": idx % 2 == 0},
+                    timestamp=moment,
+                )
+            PageView.objects.bulk_create(
+                [
+                    PageView(
+                        client=self.client_obj,
+                        session_id=f"s-{days_ago}-{idx}",
+                        url=f"https://test.local/page-{idx % 6}",
+                        pathname=f"/page-{idx % 6}",
+                        source="yandex.ru",
+                        channel=PageView.Channel.SEARCH,
+                        attributed_leads=idx % 2,
+                        created_at=moment,
+                    )
+                    for idx in range(30)
+                ]
+            )
+            Event.objects.bulk_create(
+                [
+                    Event(
+                        client=self.client_obj,
+                        event_type=(Event.EventType.FORM_SUBMIT, Event.EventType.TIME_ON_PAGE)[idx % 2],
+                        element_id="contact",
+                        page_url=f"https://test.local/page-{idx % 6}",
+                        pathname=f"/page-{idx % 6}",
+                        duration_seconds=idx,
+                        created_at=moment,
+                    )
+                    for idx in range(20)
+                ]
+            )
+            ClickEvent.objects.bulk_create(
+                [
+                    ClickEvent(
+                        client=self.client_obj,
+                        session_id=f"s-{days_ago}-{idx}",
+                        page_pathname=f"/page-{idx % 6}",
+                        element_text=f"Button {idx % 8}",
+                        created_at=moment,
+                    )
+                    for idx in range(30)
+                ]
+            )
+            leads = Lead.objects.bulk_create([Lead(client=self.client_obj, name=f"Lead {idx}") for idx in range(5)])
+            Lead.objects.filter(pk__in=[lead.pk for lead in leads]).update(created_at=moment)
+
+    def _plans(self, run):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        statements = [query["sql"] for query in queries.captured_queries if query["sql"].lstrip().startswith("SELECT")]
+        self.assertTrue(statements)
+        plans = []
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                plans.append((sql, list(_plan_nodes(plan[0]["Plan"]))))
+        return plans
+
+    def assertNoSeqScan(self, run):
+        for sql, nodes in self._plans(run):
+            seq_scans = [node.get("Relation Name") for node in nodes if node["Node Type"] == "Seq Scan"]
+            self.assertEqual(seq_scans, [], msg=sql)
+
+    def assertIndexOnlyScan(self, run, table, statement=""):
+        scans = [
+            node["Node Type"]
+            for sql, nodes in self._plans(run)
+            if statement in sql
+            for node in nodes
+            if (node.get("Relation Name") or "").startswith(table)
+        ]
+        self.assertTrue(scans, msg=f"{table} is not read")
+        self.assertEqual(set(scans), {"Index Only Scan"}, msg=table)
+
+    def test_raw_day_queries_use_indexes(self):
+        self.assertNoSeqScan(lambda: compute_days(self.client_obj, self.date_from, self.today))
+
+    @override_settings(ANALYTICS_ROLLUPS_ENABLED=False)
+    def test_metrics_queries_use_indexes(self):
+        self.assertNoSeqScan(lambda: get_metrics(self.client_obj, self.date_from, self.today))
+
+    def test_rollup_report_queries_use_indexes(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        self.assertNoSeqScan(lambda: build_full_report(self.client_obj, self.date_from, self.today))
+
+    def test_stats_view_queries_use_indexes(self):
+        self.assertNoSeqScan(lambda: self.client.get("/api/track/stats/", {"token": self.site.token}))
+
+    def test_visit_scans_are_index_only(self):
+        self.assertIndexOnlyScan(lambda: count_unique_exact(self.client_obj, self.date_from, self.today), "tracker_visit")
+        self.assertIndexOnlyScan(
+            lambda: compute_days(self.client_obj, self.today, self.today), "tracker_visit", statement="GROUPING SETS"
+        )
+
+    def test_rollup_dimension_scans_are_index_only(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        self.assertIndexOnlyScan(
+            lambda: build_full_report(self.client_obj, self.date_from, self.today - timedelta(days=1)),
+            "analytics_app_dailydimension",
+        )
+
+    def test_stats_view_counts_are_index_only(self):
+        run = lambda: self.client.get("/api/track/stats/", {"token": self.site.token})  # noqa: E731
+
+        # The visits themselves are joined by id, which no covering index holds.
+        for table in ("tracker_pageview", "tracker_event"):
+            with self.subTest(table=table):
+                self.assertIndexOnlyScan(run, table)
@@ -0,0 +1,141 @@
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from analytics_app import views
+from analytics_app.exceptions import ReportUnavailable
+from analytics_app.models import Event, PageView
+from analytics_app.services import report_builder
+from analytics_app.services.report_builder import (
+    FULL_REPORT_SECTIONS,
+    Report,
+    ReportSectionTimeout,
+    build_full_report,
+    build_report,
+)
+from clients.models import Client
+from leads.models import Lead
+
+
+class SectionedReportTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.today = timezone.localdate()
+        PageView.objects.create(client=self.client_obj, session_id="s-1", url="https://test.local/", pathname="/")
+        Event.objects.create(
+            client=self.client_obj,
+            event_type=Event.EventType.TIME_ON_PAGE,
+            page_url="https://test.local/",
+            pathname="/",
+            duration_seconds=15,
+        )
+        for idx in range(12):
+            Lead.objects.create(client=self.client_obj, name=f"Lead {idx}")
+
+    def test_sections_match_full_report(self):
+        full = build_full_report(self.client_obj, self.today, self.today)
+
+        partial = build_report(self.client_obj, self.today, self.today, ("engagement", "sources"))
+
+        self.assertEqual(list(full), list(FULL_REPORT_SECTIONS))
+        self.assertEqual(partial, {"engagement": full["engagement"], "sources": full["sources"]})
+
+    def test_only_required_work_runs(self):
+        report = Report(self.client_obj, self.today, self.today, ("engagement",))
+        with patch.object(report_builder, "get_metrics") as get_metrics, patch.object(
+            report_builder, "get_device_distribution"
+        ) as get_device_distribution:
+            engagement = report.build()["engagement"]
+
+        get_metrics.assert_not_called()
+        get_device_distribution.assert_not_called()
+        self.assertEqual(report.dimensions, ())
+        self.assertEqual(engagement["total_time_on_site_seconds"], 15)
+
+    def test_shared_inputs_are_computed_once(self):
+        with patch.object(report_builder, "load_days", wraps=report_builder.load_days) as load_days:
+            build_full_report(self.client_obj, self.today, self.today)
+
+        self.assertEqual(load_days.call_count, 1)
+
+    def test_latest_leads_section_is_short(self):
+        report = build_report(self.client_obj, self.today, self.today, ("latest_leads", "leads"))
+
+        self.assertEqual(len(report["latest_leads"]), 10)
+        self.assertEqual(len(report["leads"]), 12)
+
+    def test_unknown_section_is_rejected(self):
+        with self.assertRaises(KeyError):
+            Report(self.client_obj, self.today, self.today, ("nope",))
+
+
+def _slow_leads(report):
+    time.sleep(0.5)
+    return []
+
+
+@override_settings(ANALYTICS_REPORT_WORKERS=4, ANALYTICS_REPORT_SECTION_TIMEOUT=5)
+class ConcurrentReportTests(TransactionTestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.today = timezone.localdate()
+        PageView.objects.create(client=self.client_obj, session_id="s-1", url="https://test.local/", pathname="/")
+        for idx in range(3):
+            Lead.objects.create(client=self.client_obj, name=f"Lead {idx}")
+        self.addCleanup(report_builder.close_pool)
+
+    def test_concurrent_build_matches_serial_build(self):
+        with override_settings(ANALYTICS_REPORT_WORKERS=1):
+            serial = build_full_report(self.client_obj, self.today, self.today)
+
+        report = Report(self.client_obj, self.today, self.today)
+        concurrent = report.build()
+
+        self.assertEqual(concurrent, serial)
+        self.assertIn("days", report.timings)
+        self.assertIn("leads", report.timings)
+
+    def test_reports_share_the_pool_and_its_connections(self):
+        connected = []
+
+        def receiver(sender, connection, **kwargs):
+            connected.append(connection)
+
+        connection_created.connect(receiver)
+        self.addCleanup(connection_created.disconnect, receiver)
+        with patch.object(report_builder, "ThreadPoolExecutor", wraps=report_builder.ThreadPoolExecutor) as pool:
+            for _ in range(3):
+                build_full_report(self.client_obj, self.today, self.today)
+
+        pool.assert_called_once_with(max_workers=4, thread_name_prefix="report-section")
+        self.assertLessEqual(len(connected), 4)
+
+    def test_inside_a_transaction_sections_run_serially(self):
+        with transaction.atomic(), patch.object(report_builder, "ThreadPoolExecutor") as pool:
+            report = build_report(self.client_obj, self.today, self.today, ("leads",))
+
+        pool.assert_not_called()
+        self.assertEqual(len(report["leads"]), 3)
+
+    @override_settings(ANALYTICS_REPORT_SECTION_TIMEOUT=0.05)
+    def test_slow_section_times_out(self):
+        slow = (_slow_leads, (), (), True)
+        with patch.dict(report_builder.REPORT_SECTIONS, {"leads": slow}):
+            with self.assertRaises(ReportSectionTimeout):
+                build_report(self.client_obj, self.today, self.today, ("leads", "sources"))
+
+    def test_views_answer_a_timeout_with_503(self):
+        with patch.object(views, "cached_report", side_effect=ReportSectionTimeout("leads")):
+            with self.assertRaises(ReportUnavailable) as raised:
+                views._report(self.client_obj, self.today, self.today, ("engagement",))
+
+        self.assertEqual(raised.exception.status_code, 503)
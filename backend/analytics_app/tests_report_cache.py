@@ -0,0 +1,139 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analytics_app.services import report_cache
+from analytics_app.services.report_cache import cache_stats, cached_full_report, cached_metrics
+from analytics_app.services.rollups import build_rollups
+from clients.models import Client
+from core import data_version
+from leads.models import Lead
+from tracker.models import Site
+
+
+class FakeRedis:
+    """Just enough of the commands used by core.data_version and the cache stats."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key) or 0) + 1
+        return self.values[key]
+
+    def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def hgetall(self, key):
+        return {field.encode(): str(value).encode() for field, value in self.hashes.get(key, {}).items()}
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    ANALYTICS_CACHE_ENABLED=True,
+    ANALYTICS_ROLLUP_LOOKBACK_DAYS=2,
+)
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.today = timezone.localdate()
+        self.redis = FakeRedis()
+        for target in ("core.data_version.get_redis", "analytics_app.services.report_cache.get_redis"):
+            patcher = patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        build = patch.object(report_cache, "build_full_report", wraps=report_cache.build_full_report)
+        self.build = build.start()
+        self.addCleanup(build.stop)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = cached_full_report(self.client_obj, self.today - timedelta(days=13), self.today)
+        second = cached_full_report(self.client_obj, self.today - timedelta(days=13), self.today)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.build.call_count, 1)
+        self.assertEqual(cache_stats()["report"]["hits"], 1)
+        self.assertEqual(cache_stats()["report"]["misses"], 1)
+
+    def test_ingest_bump_invalidates_open_period(self):
+        cached_full_report(self.client_obj, self.today - timedelta(days=6), self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            data_version.bump(self.site.token)
+
+        cached_full_report(self.client_obj, self.today - timedelta(days=6), self.today)
+
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_settled_period_ignores_data_version(self):
+        date_to = self.today - timedelta(days=3)
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+        with self.captureOnCommitCallbacks(execute=True):
+            data_version.bump(self.site.token)
+
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+
+        self.assertEqual(self.build.call_count, 1)
+
+    def test_lead_status_change_invalidates_settled_period(self):
+        lead = Lead.objects.create(client=self.client_obj, name="Ann")
+        date_to = self.today - timedelta(days=3)
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+        with self.captureOnCommitCallbacks(execute=True):
+            lead.status = Lead.Status.CLOSED
+            lead.save()
+
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_rebuilding_settled_rollups_invalidates_settled_period(self):
+        date_to = self.today - timedelta(days=3)
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+        with self.captureOnCommitCallbacks(execute=True):
+            build_rollups(self.client_obj, self.today - timedelta(days=2), self.today)
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+        with self.captureOnCommitCallbacks(execute=True):
+            build_rollups(self.client_obj, date_to - timedelta(days=6), date_to)
+
+        cached_full_report(self.client_obj, date_to - timedelta(days=6), date_to)
+
+        self.assertEqual(self.build.call_count, 2)
+
+    def test_sections_are_cached_separately(self):
+        cached_full_report(self.client_obj, self.today, self.today)
+        metrics = cached_metrics(self.client_obj, self.today, self.today)
+
+        self.assertEqual(metrics["visits"], 0)
+        self.assertEqual(cache_stats()["metrics"]["misses"], 1)
+        self.assertEqual(cache_stats()["report"]["misses"], 1)
+
+    @override_settings(ANALYTICS_CACHE_ENABLED=False)
+    def test_disabled_cache_always_computes(self):
+        cached_full_report(self.client_obj, self.today, self.today)
+        cached_full_report(self.client_obj, self.today, self.today)
+
+        self.assertEqual(self.build.call_count, 2)
@@ -0,0 +1,220 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from analytics_app.models import ClickEvent, DailyStats, Event, PageView
+from analytics_app.services.device_stats import get_device_distribution
+from analytics_app.services.metrics import get_metrics
+from analytics_app.services.report_builder import build_full_report
+from analytics_app.services.rollups import Dimension, build_rollups, compute_days, load_days
+from analytics_app.tasks import build_daily_rollups_task
+from clients.models import Client
+from leads.models import Lead
+from tracker.models import Site, Visit
+
+
+@override_settings(ANALYTICS_HLL_ENABLED=False)
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.today = timezone.localdate()
+        self.date_from = self.today - timedelta(days=4)
+        for days_ago in (0, 1, 3):
+            self._fill_day(days_ago)
+
+    def _at(self, days_ago):
+        return timezone.now() - timedelta(days=days_ago)
+
+    def _fill_day(self, days_ago):
+        moment = self._at(days_ago)
+        for idx, (device, os_name, browser) in enumerate(
+            [("mobile", "iOS", "Safari"), ("desktop", None, "Chrome"), ("desktop", "", "Chrome")]
+        ):
+            Visit.objects.create(
+                site=self.site,
+                session_id=uuid4().hex,
+                visitor_id=f"v-{idx}" if idx else "",
+                device_type=device,
+                os=os_name,
+                browser_family=browser,
+                started_at=moment,
+            )
+        created = [
+            PageView.objects.create(
+                client=self.client_obj,
+                session_id=f"s-{days_ago}-0",
+                url="https://test.local/catalog?utm_source=ads",
+                pathname="/catalog",
+                utm_source="Ads",
+                attributed_leads=1,
+            ),
+            *[
+                PageView.objects.create(
+                    client=self.client_obj,
+                    session_id=f"s-{days_ago}-{idx}",
+                    url="https://test.local/",
+                    pathname="/",
+                    referrer="https://Yandex.ru/search",
+                )
+                for idx in (1, 2)
+            ],
+        ]
+        PageView.objects.filter(pk__in=[item.pk for item in created]).update(created_at=moment)
+        events = [
+            Event.objects.create(
+                client=self.client_obj,
+                event_type=Event.EventType.FORM_SUBMIT,
+                element_id="contact",
+                page_url="https://test.local/contact",
+            ),
+            Event.objects.create(
+                client=self.client_obj,
+                event_type=Event.EventType.TIME_ON_PAGE,
+                page_url="https://test.local/catalog",
+                duration_seconds=30 + days_ago,
+            ),
+        ]
+        Event.objects.filter(pk__in=[item.pk for item in events]).update(created_at=moment)
+        click = ClickEvent.objects.create(
+            client=self.client_obj,
+            session_id=f"s-{days_ago}-0",
+            page_pathname="/catalog",
+            element_text="Buy",
+        )
+        ClickEvent.objects.filter(pk=click.pk).update(created_at=moment)
+        lead = Lead.objects.create(client=self.client_obj, name=f"Lead {days_ago}")
+        Lead.objects.filter(pk=lead.pk).update(created_at=moment)
+
+    def _report_without_rollups(self):
+        with override_settings(ANALYTICS_ROLLUPS_ENABLED=False):
+            return build_full_report(self.client_obj, self.date_from, self.today)
+
+    def test_build_writes_every_closed_day(self):
+        built = build_rollups(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(built, 4)
+        days = set(DailyStats.objects.filter(client=self.client_obj).values_list("day", flat=True))
+        self.assertEqual(days, {self.date_from + timedelta(days=offset) for offset in range(4)})
+        self.assertEqual(DailyStats.objects.get(client=self.client_obj, day=self.today - timedelta(days=2)).visits, 0)
+
+    def test_report_from_rollups_matches_raw_report(self):
+        expected = self._report_without_rollups()
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        report = build_full_report(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(report, expected)
+        self.assertEqual(report["summary"]["visits"], 9)
+        self.assertEqual([row["source"] for row in report["sources"]], ["yandex.ru", "ads"])
+
+    def test_rollups_skip_raw_queries_for_closed_days(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+        self._fill_day(1)  # Arrives after the rollup ran: not visible until the next rebuild.
+
+        with CaptureQueriesContext(connection) as queries:
+            days = load_days(self.client_obj, self.date_from, self.today - timedelta(days=1))
+
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertEqual(days[self.today - timedelta(days=1)]["stats"]["visits"], 3)
+
+    def test_today_is_always_computed_from_raw(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+        self._fill_day(0)
+
+        days = load_days(self.client_obj, self.today, self.today)
+
+        self.assertEqual(days, compute_days(self.client_obj, self.today, self.today))
+        self.assertEqual(days[self.today]["stats"]["visits"], 6)
+
+    def test_device_distribution_from_rollups(self):
+        expected = get_device_distribution(self.client_obj, self.date_from, self.today)
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        distribution = get_device_distribution(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(distribution, expected)
+        self.assertEqual(distribution["devices"], {"mobile": 3, "desktop": 6, "tablet": 0})
+        self.assertEqual(distribution["os"], {"Unknown": 6, "iOS": 3})
+
+    def test_device_split_matches_per_column_counts(self):
+        Visit.objects.create(site=self.site, session_id=uuid4().hex, device_type=" Tablet", started_at=self._at(0))
+        visits = Visit.objects.filter(site=self.site, started_at__date=self.today)
+
+        dimensions = compute_days(self.client_obj, self.today, self.today)[self.today]["dimensions"]
+
+        for dimension, field in ((Dimension.OS, "os"), (Dimension.BROWSER, "browser_family")):
+            expected = {}
+            for row in visits.values(field).annotate(count=Count("id")):
+                key = row[field] or "Unknown"
+                expected[key] = expected.get(key, 0) + row["count"]
+            actual = {key: values[0] for (name, key), values in dimensions.items() if name == dimension}
+            self.assertEqual(actual, expected)
+        devices = {key: values[0] for (name, key), values in dimensions.items() if name == Dimension.DEVICE}
+        self.assertEqual(devices, {"mobile": 1, "desktop": 2, "tablet": 1})
+
+    def test_device_distribution_payload_shape(self):
+        distribution = get_device_distribution(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(
+            distribution,
+            {
+                "devices": {"mobile": 3, "desktop": 6, "tablet": 0},
+                "browsers": {"Chrome": 6, "Safari": 3},
+                "os": {"Unknown": 6, "iOS": 3},
+                "total_visits": 9,
+            },
+        )
+        self.assertEqual(list(distribution["browsers"]), ["Chrome", "Safari"])
+
+    def test_compute_days_reads_each_source_table_once(self):
+        # Visits (one GROUPING SETS query on PostgreSQL, stats and device split
+        # elsewhere), events, leads, notifications, pageviews, clicks.
+        with self.assertNumQueries(6 if connection.vendor == "postgresql" else 7):
+            days = compute_days(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(days[self.today]["stats"]["unique_visitors"], 3)
+        self.assertEqual(days[self.today]["stats"]["time_on_page_seconds"], 30)
+
+    @override_settings(ANALYTICS_ROLLUPS_ENABLED=False)
+    def test_metrics_add_one_query_for_period_uniques(self):
+        with self.assertNumQueries(8):
+            metrics = get_metrics(self.client_obj, self.date_from, self.today)
+
+        # Visitors v-1 and v-2 recur every day; the id-less visits count per session.
+        self.assertEqual(metrics["unique_users"], 5)
+        self.assertEqual(metrics["forms"], 3)
+
+    def test_form_count_skips_fetch_json_but_keeps_missing_element_id(self):
+        events = [
+            Event.objects.create(
+                client=self.client_obj,
+                event_type=Event.EventType.FORM_SUBMIT,
+                element_id=element_id,
+                page_url="https://test.local/contact",
+            )
+            for element_id in ("fetch_json", None)
+        ]
+
+        days = compute_days(self.client_obj, self.today, self.today)
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(days[self.today]["stats"]["forms"], 2)
+
+    @override_settings(ANALYTICS_ROLLUP_LOOKBACK_DAYS=2)
+    def test_task_rebuilds_lookback_window(self):
+        built = build_daily_rollups_task()
+
+        self.assertEqual(built, 2)
+        self.assertEqual(
+            set(DailyStats.objects.values_list("day", flat=True)),
+            {self.today - timedelta(days=1), self.today - timedelta(days=2)},
+        )
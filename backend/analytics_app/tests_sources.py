@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from analytics_app.models import PageView
+from analytics_app.services.rollups import Dimension, compute_days, dimension_totals
+from analytics_app.services.sources import classify
+from clients.models import Client
+
+Channel = PageView.Channel
+
+
+class ClassifyTests(SimpleTestCase):
+    def test_channels(self):
+        cases = [
+            ((None, None, None), ("direct", Channel.DIRECT)),
+            ((None, None, "https://www.google.co.uk/search?q=x"), ("www.google.co.uk", Channel.SEARCH)),
+            ((None, None, "https://ya.ru/"), ("ya.ru", Channel.SEARCH)),
+            ((None, None, "https://m.vk.com/wall"), ("m.vk.com", Channel.SOCIAL)),
+            (("Telegram", None, None), ("telegram", Channel.SOCIAL)),
+            (("yandex", "cpc", None), ("yandex", Channel.ADS)),
+            ((None, None, "https://partner.example/blog"), ("partner.example", Channel.REFERRAL)),
+        ]
+        for args, expected in cases:
+            with self.subTest(args=args):
+                self.assertEqual(classify(*args), expected)
+
+    def test_ad_click_id_marks_ads(self):
+        self.assertEqual(classify(None, None, "https://www.google.com/", "gclid=abc"), ("www.google.com", Channel.ADS))
+
+
+class SourceBackfillTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        for idx, (referrer, utm_source) in enumerate(
+            [("https://yandex.ru/", None), ("https://yandex.ru/", None), (None, "newsletter"), (None, None)]
+        ):
+            PageView.objects.create(
+                client=self.client_obj,
+                session_id=f"s-{idx}",
+                url="https://test.local/",
+                pathname="/",
+                referrer=referrer,
+                utm_source=utm_source,
+            )
+
+    def _channels(self):
+        today = timezone.localdate()
+        return dimension_totals(compute_days(self.client_obj, today, today), Dimension.CHANNEL)
+
+    def test_backfill_classifies_legacy_rows(self):
+        call_command("backfill_traffic_sources", "--batch-size", "3", stdout=StringIO())
+
+        self.assertFalse(PageView.objects.filter(source="").exists())
+        self.assertEqual(
+            sorted(PageView.objects.values_list("source", "channel")),
+            [
+                ("direct", Channel.DIRECT),
+                ("newsletter", Channel.REFERRAL),
+                ("yandex.ru", Channel.SEARCH),
+                ("yandex.ru", Channel.SEARCH),
+            ],
+        )
+
+    def test_rollups_match_before_and_after_backfill(self):
+        before = self._channels()
+        call_command("backfill_traffic_sources", stdout=StringIO())
+
+        self.assertEqual(self._channels(), before)
+        self.assertEqual(before[Channel.SEARCH][0], 2)
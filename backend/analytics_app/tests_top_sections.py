@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from analytics_app import views
+from analytics_app.models import ClickEvent, PageView
+from analytics_app.services.report_builder import build_report
+from analytics_app.services.rollups import build_rollups
+from clients.models import Client
+
+SECTIONS = (
+    "top_clicks",
+    "top_clicks_other",
+    "top_clicks_next",
+    "page_conversion",
+    "page_conversion_other",
+    "page_conversion_next",
+)
+
+
+class TopSectionTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.today = timezone.localdate()
+        self.date_from = self.today - timedelta(days=3)
+        # Button N gets N clicks on the closed days; button 1 catches up today.
+        for button in range(1, 8):
+            for _ in range(button):
+                self._click(3, f"Button {button}")
+            self._page_view(2, f"/page-{button}", leads=button % 3)
+        for _ in range(10):
+            self._click(0, "Button 1")
+
+    def _click(self, days_ago, text):
+        click = ClickEvent.objects.create(client=self.client_obj, session_id="s-1", page_pathname="/", element_text=text)
+        ClickEvent.objects.filter(pk=click.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def _page_view(self, days_ago, pathname, leads):
+        page_view = PageView.objects.create(
+            client=self.client_obj,
+            session_id="s-1",
+            url=f"https://test.local{pathname}",
+            pathname=pathname,
+            attributed_leads=leads,
+        )
+        PageView.objects.filter(pk=page_view.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+
+    def _report(self, limit, after=None, sections=SECTIONS):
+        return build_report(self.client_obj, self.date_from, self.today, sections, limit=limit, after=after)
+
+    def _raw_report(self, limit, after=None, sections=SECTIONS):
+        with override_settings(ANALYTICS_ROLLUPS_ENABLED=False):
+            return self._report(limit, after, sections)
+
+    def _pages(self, build, section, limit):
+        pages = []
+        after = None
+        while True:
+            report = build(limit, after, (section, f"{section}_next"))
+            pages.append(report[section])
+            after = report[f"{section}_next"]
+            if after is None:
+                return pages
+
+    def test_top_k_and_other_bucket(self):
+        report = self._raw_report(limit=3)
+
+        self.assertEqual([row["element_text"] for row in report["top_clicks"]], ["Button 1", "Button 7", "Button 6"])
+        self.assertEqual(report["top_clicks"][0]["count"], 11)
+        self.assertEqual(
+            report["top_clicks_other"],
+            {"targets": 4, "count": 14, "percent_of_total": 36.84, "total_clicks": 38},
+        )
+        self.assertEqual(len(report["page_conversion"]), 3)
+        self.assertEqual(report["page_conversion_other"]["paths"], 4)
+
+    def test_rollups_rank_like_raw_data(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(self._report(10), self._raw_report(10))
+        for section in ("top_clicks", "page_conversion"):
+            for limit in (1, 2, 3):
+                with self.subTest(section=section, limit=limit):
+                    self.assertEqual(self._pages(self._report, section, limit), self._pages(self._raw_report, section, limit))
+
+    def test_pages_cover_every_row_once(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+
+        pages = self._pages(self._report, "top_clicks", 3)
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        seen = [row["element_text"] for page in pages for row in page]
+        self.assertEqual(seen, ["Button 1", "Button 7", "Button 6", "Button 5", "Button 4", "Button 3", "Button 2"])
+
+    def test_new_traffic_does_not_shift_the_next_page(self):
+        first = self._raw_report(3)
+        for _ in range(20):
+            self._click(0, "Button 2")
+
+        second = self._raw_report(3, first["top_clicks_next"])
+
+        self.assertEqual([row["element_text"] for row in second["top_clicks"]], ["Button 5", "Button 4", "Button 3"])
+
+    def test_cursor_round_trips_through_the_query_string(self):
+        after = self._report(3)["page_conversion_next"]
+        factory = APIRequestFactory()
+
+        request = Request(factory.get("/api/analytics/pages/", {"limit": 3, "cursor": views._next_cursor(after)}))
+        self.assertEqual(views._page_window(request, sort_fields=2), (3, after))
+
+        for cursor in ("garbage", views._next_cursor(((1,), "key")), views._next_cursor(((1, "2"), "key"))):
+            with self.subTest(cursor=cursor):
+                request = Request(factory.get("/api/analytics/pages/", {"limit": 3, "cursor": cursor}))
+                self.assertEqual(views._page_window(request, sort_fields=2), (3, None))
@@ -0,0 +1,114 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from analytics_app.models import DailyStats
+from analytics_app.services.rollups import build_rollups
+from analytics_app.services.uniques import count_unique, count_unique_exact, record_visit
+from clients.models import Client
+from tracker.models import Site, Visit
+
+
+class FakeRedis:
+    """HyperLogLog commands over exact sets; a "sketch" is the JSON of its members."""
+
+    def __init__(self):
+        self.sets = {}
+
+    def pfadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def pfcount(self, *keys):
+        return len(set().union(*(self.sets.get(key, set()) for key in keys)))
+
+    def get(self, key):
+        return json.dumps(sorted(self.sets[key])).encode() if key in self.sets else None
+
+    def set(self, key, value, ex=None):
+        self.sets[key] = set(json.loads(value))
+
+    def exists(self, key):
+        return int(key in self.sets)
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.sets.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+@override_settings(ANALYTICS_HLL_ENABLED=True, ANALYTICS_ROLLUPS_ENABLED=True, ANALYTICS_HLL_EXACT_MAX_DAYS=3)
+class UniqueVisitorTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.today = timezone.localdate()
+        self.date_from = self.today - timedelta(days=9)
+        self.redis = FakeRedis()
+        patcher = patch("analytics_app.services.uniques.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for days_ago in range(10):
+            for visitor_id in ("v-1", "v-2", f"v-day-{days_ago}", ""):
+                self._visit(days_ago, visitor_id)
+
+    def _visit(self, days_ago, visitor_id):
+        return Visit.objects.create(
+            site=self.site,
+            session_id=uuid4().hex,
+            visitor_id=visitor_id,
+            started_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def test_exact_count_merges_visitor_ids_and_sessions(self):
+        # v-1, v-2, ten daily visitors and ten id-less sessions.
+        self.assertEqual(count_unique_exact(self.client_obj, self.date_from, self.today), 22)
+
+    def test_estimate_merges_stored_sketches_with_raw_days(self):
+        build_rollups(self.client_obj, self.date_from, self.today - timedelta(days=4))
+
+        with self.assertNumQueries(2):
+            unique = count_unique(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(unique, 22)
+        self.assertEqual(DailyStats.objects.filter(visitor_sketch__isnull=False).count(), 6)
+        self.assertEqual(len(self.redis.sets), 0)
+
+    def test_estimate_uses_the_ingest_sketch_for_today(self):
+        build_rollups(self.client_obj, self.date_from, self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_visit(self.site.token, self._visit(0, "v-new"))
+
+        with self.assertNumQueries(1):
+            unique = count_unique(self.client_obj, self.date_from, self.today)
+
+        # The setUp visits bypassed ingest, so today's sketch only holds v-new.
+        self.assertEqual(unique, 21)
+
+    def test_short_periods_stay_exact(self):
+        with patch("analytics_app.services.uniques.estimate_unique") as estimate:
+            unique = count_unique(self.client_obj, self.today - timedelta(days=2), self.today)
+
+        estimate.assert_not_called()
+        self.assertEqual(unique, 8)
+
+    def test_redis_failure_falls_back_to_exact(self):
+        with patch("analytics_app.services.uniques.get_redis", side_effect=RedisConnectionError("down")):
+            unique = count_unique(self.client_obj, self.date_from, self.today)
+
+        self.assertEqual(unique, 22)
@@ -1,8 +1,10 @@
+import binascii
+import json
 import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime
 
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.generics import CreateAPIView
@@ -10,13 +12,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.permissions import IsClientUser
+from analytics_app.exceptions import ReportUnavailable
 from analytics_app.models import Event
 from analytics_app.serializers import PublicAnalyticsEventSerializer, PublicEventCreateSerializer
-from analytics_app.services.device_stats import get_device_distribution
-from analytics_app.services.metrics import default_period_days, get_metrics, period_bounds
-from analytics_app.services.report_builder import build_full_report
+from analytics_app.services.periods import default_period_days, period_bounds
+from analytics_app.services.report_builder import ReportSectionTimeout
+from analytics_app.services.report_cache import cached_device_distribution, cached_metrics, cached_report
 from clients.permissions import HasValidApiKey
-from tracker.models import Visit
 from subscriptions.permissions import HasActiveSubscription
 
 logger = logging.getLogger(__name__)
@@ -45,8 +47,60 @@ def _period_range(request, days=14):
     return date_from, date_to, from_dt, to_dt
 
 
+SUMMARY_SECTIONS = (
+    "summary",
+    "daily_stats",
+    "sources",
+    "latest_leads",
+    "page_conversion",
+    "page_conversion_other",
+    "top_clicks",
+    "top_clicks_other",
+    "engagement",
+)
+
+
+def _page_window(request, sort_fields):
+    """``(limit, after)`` from the ``limit`` and opaque ``cursor`` query parameters.
+
+    A cursor carries the ``sort_fields`` values and the key of the previous
+    page's last row; an invalid one starts from the first page.
+    """
+    try:
+        limit = int(request.query_params.get("limit") or settings.ANALYTICS_REPORT_TOP_K)
+    except ValueError:
+        limit = settings.ANALYTICS_REPORT_TOP_K
+    limit = min(max(limit, 1), settings.ANALYTICS_PAGE_MAX_LIMIT)
+    cursor = request.query_params.get("cursor")
+    if not cursor:
+        return limit, None
+    try:
+        *values, key = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, binascii.Error):
+        return limit, None
+    if len(values) != sort_fields or not isinstance(key, str) or not all(type(value) is int for value in values):
+        return limit, None
+    return limit, (tuple(values), key)
+
+
+def _next_cursor(after):
+    if after is None:
+        return None
+    values, key = after
+    return urlsafe_b64encode(json.dumps([*values, key]).encode()).decode()
+
+
+def _report(client, date_from, date_to, sections, **kwargs):
+    """``cached_report``, answering 503 instead of 500 when a section runs past its timeout."""
+    try:
+        return cached_report(client, date_from, date_to, sections, **kwargs)
+    except ReportSectionTimeout as exc:
+        logger.warning("analytics.report timed out client_id=%s from=%s to=%s: %s", client.id, date_from, date_to, exc)
+        raise ReportUnavailable() from exc
+
+
 def _build_summary_payload(client, from_dt, to_dt):
-    report = build_full_report(client=client, date_from=from_dt.date(), date_to=to_dt.date())
+    report = _report(client, from_dt.date(), to_dt.date(), SUMMARY_SECTIONS)
     summary = report["summary"]
     daily_stats = report["daily_stats"]
     engagement = report.get("engagement") or {}
@@ -78,7 +132,7 @@ def _build_summary_payload(client, from_dt, to_dt):
         "unique_by_day": unique_by_day,
         "forms_by_day": forms_by_day,
         "leads_by_day": leads_by_day,
-        "latest_leads": report["leads"][:10],
+        "latest_leads": report["latest_leads"],
         "avg_time_on_site": summary.get("avg_visit_duration_seconds", 0),
         "avg_visit_duration_seconds": summary.get("avg_visit_duration_seconds", 0),
         "total_time_on_site_seconds": summary.get("total_time_on_site_seconds", 0),
@@ -89,8 +143,9 @@ def _build_summary_payload(client, from_dt, to_dt):
         "top_sources": top_sources,
         "source_performance": source_performance,
         "conversion_by_pages": report["page_conversion"],
+        "conversion_by_pages_other": report["page_conversion_other"],
         "top_clicks": report["top_clicks"][:10],
-        "total_clicks": sum(item["count"] for item in report["top_clicks"]),
+        "total_clicks": report["top_clicks_other"]["total_clicks"],
         "engagement_pages": engagement.get("pages", []),
     }
 
@@ -207,7 +262,7 @@ class AnalyticsOverviewView(APIView):
     def get(self, request):
         client = request.client
         date_from, date_to, _, _ = _period_range(request, days=14)
-        metrics = get_metrics(client, date_from, date_to)
+        metrics = cached_metrics(client, date_from, date_to)
         response = {
             "period": {"date_from": date_from, "date_to": date_to},
             "visits_total": metrics["visits"],
@@ -235,13 +290,15 @@ class AnalyticsEngagementView(APIView):
     def get(self, request):
         client = request.client
         date_from, date_to, _, _ = _period_range(request, days=14)
-        report = build_full_report(client=client, date_from=date_from, date_to=date_to)
+        limit, after = _page_window(request, sort_fields=2)
+        report = _report(client, date_from, date_to, ("engagement", "engagement_next"), limit=limit, after=after)
         engagement = report.get("engagement") or {}
         response = {
             "period": {"date_from": date_from, "date_to": date_to},
             "avg_time_on_page_seconds": engagement.get("avg_visit_duration_seconds", 0),
             "total_time_on_site_seconds": engagement.get("total_time_on_site_seconds", 0),
             "pages": engagement.get("pages", []),
+            "next_cursor": _next_cursor(report["engagement_next"]),
         }
         logger.info(
             "analytics.engagement: client_id=%s from=%s to=%s total_time=%s pages=%s",
@@ -259,31 +316,10 @@ class AnalyticsUniqueDailyView(APIView):
 
     def get(self, request):
         client = request.client
-        date_from, date_to, from_dt, to_dt = _period_range(request, days=14)
-        unique_filter = Q(visitor_id__isnull=False) & ~Q(visitor_id="")
-        visits_qs = Visit.objects.filter(site__token=client.api_key, started_at__gte=from_dt, started_at__lte=to_dt)
-        rows_with_id = list(
-            visits_qs.filter(unique_filter)
-            .annotate(day=TruncDate("started_at"))
-            .values("day")
-            .annotate(count=Count("visitor_id", distinct=True))
-            .order_by("day")
-        )
-        rows_without_id = list(
-            visits_qs.exclude(unique_filter)
-            .annotate(day=TruncDate("started_at"))
-            .values("day")
-            .annotate(count=Count("session_id", distinct=True))
-            .order_by("day")
-        )
-        merged_rows = {}
-        for row in rows_with_id + rows_without_id:
-            day = row.get("day")
-            merged_rows[day] = merged_rows.get(day, 0) + int(row.get("count") or 0)
-        rows = [{"day": day, "count": count} for day, count in sorted(merged_rows.items())]
-
-        metrics = get_metrics(client, date_from, date_to)
-        total_unique = metrics["unique_users"]
+        date_from, date_to, _, _ = _period_range(request, days=14)
+        report = _report(client, date_from, date_to, ("summary", "daily_stats"))
+        rows = [{"day": row["day"], "count": row["unique_users"]} for row in report["daily_stats"] if row["unique_users"]]
+        total_unique = report["summary"]["unique_users"]
         logger.info(
             "analytics.unique_daily: client_id=%s from=%s to=%s total_unique=%s days=%s",
             client.id,
@@ -301,13 +337,58 @@ class AnalyticsUniqueDailyView(APIView):
         )
 
 
+class AnalyticsClicksView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
+
+    def get(self, request):
+        client = request.client
+        date_from, date_to, _, _ = _period_range(request, days=14)
+        limit, after = _page_window(request, sort_fields=1)
+        report = _report(
+            client, date_from, date_to, ("top_clicks", "top_clicks_other", "top_clicks_next"), limit=limit, after=after
+        )
+        return Response(
+            {
+                "period": {"date_from": date_from, "date_to": date_to},
+                "results": report["top_clicks"],
+                "other": report["top_clicks_other"],
+                "next_cursor": _next_cursor(report["top_clicks_next"]),
+            }
+        )
+
+
+class AnalyticsPagesView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
+
+    def get(self, request):
+        client = request.client
+        date_from, date_to, _, _ = _period_range(request, days=14)
+        limit, after = _page_window(request, sort_fields=2)
+        report = _report(
+            client,
+            date_from,
+            date_to,
+            ("page_conversion", "page_conversion_other", "page_conversion_next"),
+            limit=limit,
+            after=after,
+        )
+        return Response(
+            {
+                "period": {"date_from": date_from, "date_to": date_to},
+                "results": report["page_conversion"],
+                "other": report["page_conversion_other"],
+                "next_cursor": _next_cursor(report["page_conversion_next"]),
+            }
+        )
+
+
 class AnalyticsDevicesView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
 
     def get(self, request):
         client = request.client
         date_from, date_to, _, _ = _period_range(request, days=14)
-        payload = get_device_distribution(client=client, date_from=date_from, date_to=date_to)
+        payload = cached_device_distribution(client, date_from, date_to)
         response = {
             "period": {"date_from": date_from, "date_to": date_to},
             "devices": payload["devices"],
@@ -5,3 +5,5 @@ class ClientsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "clients"
 
+    def ready(self):
+        from clients import signals  # noqa: F401
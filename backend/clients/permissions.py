@@ -3,7 +3,7 @@ import logging
 from rest_framework import permissions
 from rest_framework.exceptions import AuthenticationFailed
 
-from clients.models import Client
+from clients.tenancy import get_active_client
 
 logger = logging.getLogger(__name__)
 
@@ -26,18 +26,16 @@ class HasValidApiKey(permissions.BasePermission):
                 request.headers.get("Origin"),
             )
             raise AuthenticationFailed("Отсутствует API-ключ.")
-        try:
-            client = Client.objects.get(api_key=api_key, is_active=True)
-        except Client.DoesNotExist as exc:
+        client = get_active_client(api_key)
+        if client is None:
             api_key_masked = (api_key[:6] + "***") if isinstance(api_key, str) and len(api_key) >= 6 else "***"
             logger.warning(
-                "Public API auth failed: invalid api_key=%s path=%s origin=%s clients_count=%s",
+                "Public API auth failed: invalid api_key=%s path=%s origin=%s",
                 api_key_masked,
                 request.path,
                 request.headers.get("Origin"),
-                Client.objects.count(),
             )
-            raise AuthenticationFailed("Недействительный API-ключ или клиент отключен.") from exc
+            raise AuthenticationFailed("Недействительный API-ключ или клиент отключен.")
 
         api_key_masked = (api_key[:6] + "***") if isinstance(api_key, str) and len(api_key) >= 6 else "***"
         logger.info(
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clients.models import Client
+from core.tenant_cache import client_cache, site_cache
+
+
+@receiver(post_save, sender=Client, dispatch_uid="clients.invalidate_tenant_cache_on_save")
+@receiver(post_delete, sender=Client, dispatch_uid="clients.invalidate_tenant_cache_on_delete")
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    client_cache.invalidate(instance.api_key)
+    # A client api_key may be promoted to a Site token on first hit (see tracker.services.site_by_token),
+    # so a negative site entry for the same key must go as well.
+    site_cache.invalidate(instance.api_key)
@@ -0,0 +1,10 @@
+from clients.models import Client
+from core.tenant_cache import client_cache
+
+
+def _load_active_client(api_key: str):
+    return Client.objects.filter(api_key=api_key, is_active=True).first()
+
+
+def get_active_client(api_key: str):
+    return client_cache.get(api_key, _load_active_client)
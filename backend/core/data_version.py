@@ -0,0 +1,59 @@
+import logging
+
+from django.db import transaction
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def _key(token: str) -> str:
+    return f"data:version:{token}"
+
+
+def _settled_key(token: str) -> str:
+    return f"data:settled:{token}"
+
+
+def _incr(*keys) -> None:
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+    except RedisError:
+        logger.warning("data version bump failed, cached results expire by TTL only")
+
+
+def bump(token: str, *, settled: bool = False) -> None:
+    """Mark the tenant's tracking data as changed once the current transaction commits.
+
+    ``token`` is the site token, i.e. the client's api_key. Caches that put
+    ``current(token)`` into their keys stop serving entries from before the write.
+    Pass ``settled=True`` when the write also changes days that are already
+    settled (a lead's status, a rollup rebuild or backfill): ``settled(token)``
+    moves on too.
+    """
+    if token:
+        keys = (_key(token), _settled_key(token)) if settled else (_key(token),)
+        transaction.on_commit(lambda: _incr(*keys))
+
+
+def _read(key):
+    try:
+        value = get_redis().get(key)
+    except RedisError:
+        logger.warning("data version read failed, bypassing result cache")
+        return None
+    return int(value or 0)
+
+
+def current(token: str):
+    """The tenant's data version (0 before the first write), or None when Redis is unavailable."""
+    return _read(_key(token))
+
+
+def settled(token: str):
+    """Generation of the tenant's settled days, bumped only by ``bump(settled=True)``; None when Redis is down."""
+    return _read(_settled_key(token))
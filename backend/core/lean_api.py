@@ -0,0 +1,95 @@
+"""Small helpers for the lean (no DRF request cycle) public write endpoints.
+
+They reproduce the bits of DRF those endpoints rely on -- body parsing,
+JSON rendering, error shapes and scoped throttling -- with the same
+messages and status codes, so clients can't tell the two apart.
+"""
+import json
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError, Throttled, UnsupportedMediaType
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.utils.mediatypes import media_type_matches
+
+FORM_MEDIA_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+
+
+class BadRequestBody(ValueError):
+    def __init__(self, exc):
+        super().__init__(str(exc.detail))
+        self.detail = exc.detail
+        self.status_code = exc.status_code
+
+
+def parse_body(request):
+    """The request payload as DRF's JSON/form parsers would return it."""
+    content_type = request.META.get("CONTENT_TYPE", "")
+    if any(media_type_matches(media_type, content_type) for media_type in FORM_MEDIA_TYPES):
+        return request.POST
+    if not request.body:
+        return {}
+    if not media_type_matches("application/json", content_type):
+        raise BadRequestBody(UnsupportedMediaType(content_type))
+    try:
+        return orjson.loads(request.body)
+    except orjson.JSONDecodeError:
+        pass
+    # Re-parse only to produce DRF's exact error message.
+    try:
+        return json.loads(request.body.decode("utf-8"))
+    except ValueError as exc:
+        raise BadRequestBody(ParseError("JSON parse error - %s" % str(exc))) from exc
+
+
+def json_response(body, status=200, headers=None):
+    response = HttpResponse(
+        orjson.dumps(body, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        content_type="application/json",
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def error_response(detail, status, headers=None):
+    return json_response({"detail": detail}, status=status, headers=headers)
+
+
+def bad_request_body(exc):
+    return error_response(exc.detail, exc.status_code)
+
+
+def not_authenticated(detail):
+    # Same status and challenge DRF sends when JWTAuthentication is the first authenticator.
+    return error_response(detail, 401, headers={"WWW-Authenticate": 'Bearer realm="api"'})
+
+
+class _ScopedView:
+    def __init__(self, scope):
+        self.throttle_scope = scope
+
+
+class _AnonymousRequest:
+    # Public endpoints authenticate by API key, never by user: throttle by client IP.
+    user = AnonymousUser()
+
+    def __init__(self, request):
+        self.META = request.META
+
+
+def check_throttle(request, scope):
+    """Run DRF's ScopedRateThrottle for ``scope``; returns a 429 response or None."""
+    throttle = ScopedRateThrottle()
+    if throttle.allow_request(_AnonymousRequest(request), _ScopedView(scope)):
+        return None
+    exc = Throttled(throttle.wait())
+    headers = {"Retry-After": "%d" % exc.wait} if exc.wait else None
+    return error_response(exc.detail, exc.status_code, headers=headers)
+
+
+async def acheck_throttle(request, scope):
+    return await sync_to_async(check_throttle)(request, scope)
@@ -0,0 +1,275 @@
+"""Monthly range partitions for the append-only hit tables (Postgres only).
+
+Each table in PARTITIONED_TABLES is ``PARTITION BY RANGE (<time column>)``
+with one partition per calendar month (UTC bounds, ``<table>_pYYYYMM``)
+plus ``<table>_default`` for rows outside the created months. Time-range
+filters with literal bounds (``created_at__gte`` / ``__lte``) are pruned
+by the planner to the months they touch.
+
+The primary key becomes ``(id, <time column>)`` on the database side; Django
+keeps treating ``id`` as the primary key. Unique constraints that do not
+include the time column cannot be added to these tables.
+
+``tracker_visit`` is not partitioned: its ``(site_id, session_id)`` unique
+constraint backs the ingest upsert and ``id`` is the target of the
+pageview/event foreign keys, and neither can include ``started_at``.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {
+    "tracker_pageview": "timestamp",
+    "tracker_event": "timestamp",
+    "analytics_app_event": "created_at",
+    "analytics_app_pageview": "created_at",
+    "analytics_app_clickevent": "created_at",
+}
+
+
+def month_start(value) -> datetime:
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return value.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def is_supported(connection=None) -> bool:
+    return (connection or default_connection).vendor == "postgresql"
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def partitions(cursor, table: str):
+    """[(name, start, end)] of the range partitions, oldest first; the default partition is left out."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s AND parent.relnamespace = current_schema()::regnamespace",
+        [table],
+    )
+    result = []
+    for (name,) in cursor.fetchall():
+        start = _parse_month(name, table)
+        if start is not None:
+            result.append((name, start, add_months(start, 1)))
+    return sorted(result, key=lambda item: item[1])
+
+
+def _parse_month(name: str, table: str):
+    suffix = name[len(table) + 2:] if name.startswith(f"{table}_p") else ""
+    if len(suffix) != 6 or not suffix.isdigit():
+        return None
+    return datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=dt_timezone.utc)
+
+
+def _create_partition(cursor, table: str, column: str, start: datetime) -> bool:
+    name = partition_name(table, start)
+    end = add_months(start, 1)
+    qn = cursor.db.ops.quote_name
+    default = default_partition_name(table)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [default])
+    has_default = cursor.fetchone()[0]
+    if has_default:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE {qn(column)} >= %s AND {qn(column)} < %s)",
+            [start, end],
+        )
+        has_default = cursor.fetchone()[0]
+    if not has_default:
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+        return True
+
+    # Rows for this month already landed in the default partition: move them
+    # into a standalone table and attach it, all in one transaction.
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} WHERE {qn(column)} >= %s AND {qn(column)} < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    logger.info("partitioning.moved table=%s partition=%s rows=%s", table, name, moved)
+    return True
+
+
+def ensure_partitions(table: str, *, ahead: int = None, since=None, connection=None) -> list:
+    """Create the monthly partitions from ``since`` (default: this month) to ``ahead`` months from now.
+
+    Returns the names of the partitions that were created. Tables that are
+    not partitioned are left alone.
+    """
+    connection = connection or default_connection
+    if not is_supported(connection):
+        return []
+    ahead = settings.PARTITIONS_AHEAD_MONTHS if ahead is None else ahead
+    column = PARTITIONED_TABLES[table]
+    current = month_start(since or timezone.now())
+    last = add_months(month_start(timezone.now()), ahead)
+    created = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        existing = {name for name, _, _ in partitions(cursor, table)}
+        while current <= last:
+            name = partition_name(table, current)
+            if name not in existing and _create_partition(cursor, table, column, current):
+                created.append(name)
+            current = add_months(current, 1)
+    for name in created:
+        logger.info("partitioning.created table=%s partition=%s", table, name)
+    return created
+
+
+def drop_partitions_before(table: str, cutoff, *, dry_run: bool = False, connection=None) -> list:
+    """Detach and drop the monthly partitions that end on or before ``cutoff``.
+
+    Returns ``[(name, estimated_rows, bytes)]`` for each partition dropped
+    (or, with ``dry_run``, that would be). The default partition is never
+    dropped.
+    """
+    connection = connection or default_connection
+    if not is_supported(connection):
+        return []
+    qn = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return []
+        for name, _, end in partitions(cursor, table):
+            if end > cutoff:
+                break
+            cursor.execute(
+                "SELECT greatest(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid) FROM pg_class c WHERE c.oid = %s::regclass",
+                [name],
+            )
+            rows, size = cursor.fetchone()
+            if not dry_run:
+                with transaction.atomic(using=connection.alias):
+                    cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+                logger.info("partitioning.dropped table=%s partition=%s rows~=%s bytes=%s", table, name, rows, size)
+            dropped.append((name, rows, size))
+    return dropped
+
+
+def _index_and_fk_definitions(cursor, table: str):
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+        "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')",
+        [table, table],
+    )
+    # A partitioned parent reports its indexes as "ON ONLY"; recreate them recursively.
+    indexes = [row[0].replace(" ON ONLY ", " ON ", 1) for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return indexes, cursor.fetchall()
+
+
+def _restore_definitions(cursor, table: str, indexes, foreign_keys):
+    qn = cursor.db.ops.quote_name
+    for indexdef in indexes:
+        cursor.execute(indexdef)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+
+
+def convert_table(schema_editor, table: str, *, ahead: int = None):
+    """Rebuild a regular table as a partitioned one, keeping data, ids, index and FK names.
+
+    Runs inside the migration transaction and rewrites the table, so writes
+    to it block until the migration commits.
+    """
+    ahead = settings.PARTITIONS_AHEAD_MONTHS if ahead is None else ahead
+    column = PARTITIONED_TABLES[table]
+    qn = schema_editor.quote_name
+    staging = f"{table}_partitioned"
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor, table):
+            return
+        cursor.execute(f"SELECT min({qn(column)}), max(id) FROM {qn(table)}")
+        oldest, max_id = cursor.fetchone()
+
+        cursor.execute(
+            f"CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING CONSTRAINTS) PARTITION BY RANGE ({qn(column)})"
+        )
+        cursor.execute(f"CREATE TABLE {qn(default_partition_name(table))} PARTITION OF {qn(staging)} DEFAULT")
+        start = month_start(oldest or timezone.now())
+        last = add_months(month_start(timezone.now()), ahead)
+        while start <= last:
+            cursor.execute(
+                f"CREATE TABLE {qn(partition_name(table, start))} PARTITION OF {qn(staging)} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                [start, add_months(start, 1)],
+            )
+            start = add_months(start, 1)
+        cursor.execute(f"INSERT INTO {qn(staging)} SELECT * FROM {qn(table)}")
+
+        indexes, foreign_keys = _index_and_fk_definitions(cursor, table)
+        cursor.execute(f"DROP TABLE {qn(table)}")
+        cursor.execute(f"ALTER TABLE {qn(staging)} RENAME TO {qn(table)}")
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_pkey')} PRIMARY KEY (id, {qn(column)})")
+        _restore_definitions(cursor, table, indexes, foreign_keys)
+
+        sequence = f"{table}_id_seq"
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.id")
+        if max_id:
+            cursor.execute("SELECT setval(%s, %s)", [sequence, max_id])
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [sequence])
+
+
+def unconvert_table(schema_editor, table: str):
+    """Reverse of ``convert_table``: back to a regular table with an identity id."""
+    qn = schema_editor.quote_name
+    staging = f"{table}_unpartitioned"
+    with schema_editor.connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            return
+        cursor.execute(f"CREATE TABLE {qn(staging)} (LIKE {qn(table)} INCLUDING CONSTRAINTS)")
+        cursor.execute(f"INSERT INTO {qn(staging)} SELECT * FROM {qn(table)}")
+        cursor.execute(f"SELECT max(id) FROM {qn(staging)}")
+        max_id = cursor.fetchone()[0]
+
+        indexes, foreign_keys = _index_and_fk_definitions(cursor, table)
+        cursor.execute(f"DROP TABLE {qn(table)} CASCADE")
+        cursor.execute(f"ALTER TABLE {qn(staging)} RENAME TO {qn(table)}")
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_pkey')} PRIMARY KEY (id)")
+        _restore_definitions(cursor, table, indexes, foreign_keys)
+        cursor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        if max_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, max_id])
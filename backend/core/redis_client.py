@@ -0,0 +1,38 @@
+import asyncio
+import weakref
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+@lru_cache(maxsize=None)
+def _client_for_url(url: str, socket_timeout: float) -> redis.Redis:
+    return redis.Redis.from_url(
+        url,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_timeout=socket_timeout,
+        health_check_interval=30,
+    )
+
+
+def get_redis(url: str | None = None, *, socket_timeout: float | None = None) -> redis.Redis:
+    """Shared client; pass a longer ``socket_timeout`` for blocking reads (XREADGROUP BLOCK)."""
+    return _client_for_url(url or settings.REDIS_URL, socket_timeout or settings.REDIS_SOCKET_TIMEOUT)
+
+
+def get_async_redis(url: str | None = None) -> redis.asyncio.Redis:
+    """asyncio client for the running event loop (connections can't be shared across loops)."""
+    url = url or settings.REDIS_URL
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if url not in clients:
+        clients[url] = redis.asyncio.Redis.from_url(
+            url,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=30,
+        )
+    return clients[url]
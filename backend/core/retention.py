@@ -0,0 +1,204 @@
+"""Retention for the raw tracking tables.
+
+Raw rows are kept RETENTION_RAW_DAYS days, or ``SubscriptionPlan.retention_days``
+for clients whose active subscription is on a plan that sets it. Telegram update logs are kept
+RETENTION_TELEGRAM_LOG_DAYS days. Leads, reports and aggregated data are
+never pruned here.
+
+On Postgres, monthly partitions (see core.partitioning) that are older than
+every client's cutoff are dropped whole. Everything else is deleted in
+primary-key ordered chunks of RETENTION_CHUNK_SIZE rows. Each chunk runs in
+its own short transaction under RETENTION_LOCK_TIMEOUT_MS. The engine
+pauses RETENTION_CHUNK_PAUSE seconds between chunks and waits while replica
+replay lag exceeds RETENTION_MAX_REPLICATION_LAG. A run stops after
+RETENTION_MAX_SECONDS; the next run picks up where it left off.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from analytics_app.models import ClickEvent, Event, PageView
+from clients.models import Client
+from core.partitioning import drop_partitions_before
+from subscriptions.models import Subscription
+from telegram_logs.models import TelegramUpdateLog
+from tracker.models import Event as TrackerEvent
+from tracker.models import PageView as TrackerPageView
+from tracker.models import Site, Visit
+
+logger = logging.getLogger(__name__)
+
+# (model, time field, lookup to the client's id, lookup to the site's id).
+# Children come before Visit so a visit is only deleted once its hits are gone.
+RAW_TABLES = (
+    (TrackerPageView, "timestamp", None, "visit__site_id"),
+    (TrackerEvent, "timestamp", None, "visit__site_id"),
+    (Visit, "started_at", None, "site_id"),
+    (Event, "created_at", "client_id", None),
+    (PageView, "created_at", "client_id", None),
+    (ClickEvent, "created_at", "client_id", None),
+)
+
+
+def retention_groups() -> dict:
+    """``{days: client_ids}`` for clients whose active plan overrides RETENTION_RAW_DAYS.
+
+    Active as in subscriptions.permissions.has_active_subscription; an expired
+    subscription falls back to the default.
+    """
+    groups = {}
+    active = Q(admin_override=True) | Q(status=Subscription.Status.ACTIVE, paid_until__gt=timezone.now())
+    rows = Subscription.objects.filter(active, plan__retention_days__isnull=False).values_list(
+        "client_id", "plan__retention_days"
+    )
+    for client_id, days in rows:
+        if days != settings.RETENTION_RAW_DAYS:
+            groups.setdefault(days, []).append(client_id)
+    return groups
+
+
+def _scopes(groups: dict, client_field, site_field):
+    """[(days, Q)] covering every row of a table exactly once."""
+    site_ids = {}
+    if site_field:
+        tokens = dict(Client.objects.filter(id__in=[i for ids in groups.values() for i in ids]).values_list("id", "api_key"))
+        for days, client_ids in groups.items():
+            keys = [tokens[client_id] for client_id in client_ids if client_id in tokens]
+            site_ids[days] = list(Site.objects.filter(token__in=keys).values_list("id", flat=True))
+
+    def scope(days):
+        if client_field:
+            return Q(**{f"{client_field}__in": groups[days]})
+        return Q(**{f"{site_field}__in": site_ids[days]})
+
+    scopes = [(days, scope(days)) for days in groups]
+    default = Q()
+    for _, condition in scopes:
+        default &= ~condition
+    scopes.append((settings.RETENTION_RAW_DAYS, default))
+    return scopes
+
+
+def _replication_lag(cursor) -> float:
+    cursor.execute("SELECT coalesce(max(extract(epoch FROM replay_lag)), 0) FROM pg_stat_replication")
+    return float(cursor.fetchone()[0])
+
+
+def _throttle(deadline: float) -> None:
+    time.sleep(settings.RETENTION_CHUNK_PAUSE)
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        while time.monotonic() < deadline and _replication_lag(cursor) > settings.RETENTION_MAX_REPLICATION_LAG:
+            time.sleep(max(settings.RETENTION_CHUNK_PAUSE, 1))
+
+
+def _delete_chunk(queryset, after_pk):
+    """Delete up to RETENTION_CHUNK_SIZE rows with pk > ``after_pk``; returns ``(rows, bytes, last_pk)``."""
+    model = queryset.model
+    ids = queryset.filter(pk__gt=after_pk).order_by("pk").values("pk")[: settings.RETENTION_CHUNK_SIZE]
+    if connection.vendor != "postgresql":
+        pks = list(ids.values_list("pk", flat=True))
+        if pks:
+            model.objects.filter(pk__in=pks).delete()
+        return len(pks), 0, max(pks, default=after_pk)
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    pk = qn(model._meta.pk.column)
+    sql, params = ids.query.sql_with_params()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f"{settings.RETENTION_LOCK_TIMEOUT_MS}ms"])
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {pk} IN ({sql}) RETURNING {pk}, pg_column_size({table}.*)",
+                params,
+            )
+            deleted = cursor.fetchall()
+    return len(deleted), sum(size for _, size in deleted), max((row[0] for row in deleted), default=after_pk)
+
+
+def delete_in_chunks(queryset, *, deadline: float):
+    """Delete every row of ``queryset`` in pk order until done or ``deadline``; returns ``(rows, bytes)``."""
+    rows = size = 0
+    last_pk = 0
+    while time.monotonic() < deadline:
+        try:
+            deleted, deleted_bytes, last_pk = _delete_chunk(queryset, last_pk)
+        except OperationalError as exc:
+            logger.warning("retention.chunk_failed table=%s after_pk=%s error=%s", queryset.model._meta.db_table, last_pk, exc)
+            _throttle(deadline)
+            continue
+        rows += deleted
+        size += deleted_bytes
+        if deleted < settings.RETENTION_CHUNK_SIZE:
+            break
+        _throttle(deadline)
+    return rows, size
+
+
+def _expired(model, time_field: str, cutoff):
+    queryset = model.objects.filter(**{f"{time_field}__lt": cutoff})
+    if model is Visit:
+        queryset = queryset.filter(
+            ~Exists(TrackerPageView.objects.filter(visit=OuterRef("pk"))),
+            ~Exists(TrackerEvent.objects.filter(visit=OuterRef("pk"))),
+        )
+    return queryset
+
+
+def prune_raw_data(*, dry_run: bool = False, tables=None) -> dict:
+    """Apply the retention policy; returns ``{table: {"rows", "bytes", "partitions"}}``.
+
+    With ``dry_run`` nothing is deleted: rows are counted, and only the
+    partitions that would be dropped contribute bytes.
+    """
+    now = timezone.now()
+    deadline = time.monotonic() + settings.RETENTION_MAX_SECONDS
+    groups = retention_groups()
+    longest = max([settings.RETENTION_RAW_DAYS, *groups])
+    report = {}
+
+    for model, time_field, client_field, site_field in (*RAW_TABLES, (TelegramUpdateLog, "created_at", None, None)):
+        table = model._meta.db_table
+        if tables and table not in tables:
+            continue
+        result = report[table] = {"rows": 0, "bytes": 0, "partitions": []}
+
+        for name, rows, size in drop_partitions_before(table, now - timedelta(days=longest), dry_run=dry_run):
+            result["partitions"].append(name)
+            result["bytes"] += size
+            if not dry_run:
+                # A dry run counts these rows below along with the rest.
+                result["rows"] += rows
+
+        if model is TelegramUpdateLog:
+            scopes = [(settings.RETENTION_TELEGRAM_LOG_DAYS, Q())]
+        else:
+            scopes = _scopes(groups, client_field, site_field)
+        for days, condition in scopes:
+            queryset = _expired(model, time_field, now - timedelta(days=days)).filter(condition)
+            if dry_run:
+                result["rows"] += queryset.count()
+                continue
+            rows, size = delete_in_chunks(queryset, deadline=deadline)
+            result["rows"] += rows
+            result["bytes"] += size
+
+        logger.info(
+            "retention.pruned table=%s rows=%s bytes=%s partitions=%s dry_run=%s",
+            table,
+            result["rows"],
+            result["bytes"],
+            len(result["partitions"]),
+            dry_run,
+        )
+        if time.monotonic() >= deadline:
+            logger.warning("retention.deadline_reached table=%s max_seconds=%s", table, settings.RETENTION_MAX_SECONDS)
+            break
+    return report
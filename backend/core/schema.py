@@ -0,0 +1,225 @@
+"""Precompiled fast-path validation for fixed-schema DRF serializers.
+
+``CompiledSerializer(SomeSerializer)`` inspects the serializer's fields once
+and builds plain per-field checks. ``validate(data)`` runs those checks on a
+JSON object and returns the same ``validated_data`` the serializer would.
+Anything the checks are not sure about -- a wrong type, a blank value, a
+form-encoded body -- goes through the real serializer instead, so error
+bodies stay byte-for-byte DRF's and the fast path never accepts data the
+serializer would reject.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import (
+    MaxLengthValidator,
+    MaxValueValidator,
+    MinLengthValidator,
+    MinValueValidator,
+    ProhibitNullCharactersValidator,
+    URLValidator,
+)
+from django.utils.dateparse import parse_datetime
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import _UnvalidatedField, empty
+from rest_framework.settings import api_settings
+from rest_framework.validators import ProhibitSurrogateCharactersValidator
+
+
+class Invalid(Exception):
+    """Raised by a fast check: defer to the serializer."""
+
+
+def _run_validators(field, value):
+    for validator in field.validators:
+        try:
+            validator(value)
+        except (DjangoValidationError, serializers.ValidationError):
+            raise Invalid from None
+    return value
+
+
+def _check_char(field):
+    allow_blank = field.allow_blank
+    trim = field.trim_whitespace
+
+    def check(value):
+        if type(value) is not str:
+            raise Invalid
+        if trim:
+            value = value.strip()
+        if not value:
+            if allow_blank:
+                return ""
+            raise Invalid
+        return _run_validators(field, value)
+
+    return check
+
+
+def _check_integer(field):
+    def check(value):
+        if type(value) is not int:
+            raise Invalid
+        return _run_validators(field, value)
+
+    return check
+
+
+def _check_datetime(field):
+    if getattr(field, "input_formats", api_settings.DATETIME_INPUT_FORMATS) != [ISO_8601]:
+        raise ImproperlyConfigured("only ISO 8601 DateTimeField input is supported")
+
+    def check(value):
+        if type(value) is not str:
+            raise Invalid
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            raise Invalid from None
+        if parsed is None:
+            raise Invalid
+        try:
+            return field.enforce_timezone(parsed)
+        except serializers.ValidationError:
+            raise Invalid from None
+
+    return check
+
+
+def _check_choice(field):
+    choices = dict(field.choice_strings_to_values)
+    allow_blank = field.allow_blank
+
+    def check(value):
+        if type(value) is not str:
+            raise Invalid
+        if value == "" and allow_blank:
+            return ""
+        try:
+            return choices[value]
+        except KeyError:
+            raise Invalid from None
+
+    return check
+
+
+def _check_json(field):
+    if field.binary:
+        raise ImproperlyConfigured("binary JSONField is not supported by CompiledSerializer")
+    return lambda value: value
+
+
+def _check_dict_list(field):
+    # ListField(child=DictField()) with unvalidated values, as used for batched records.
+    child = field.child
+    if type(child) is not serializers.DictField or type(child.child) is not _UnvalidatedField:
+        raise ImproperlyConfigured(f"unsupported ListField child {field.child!r}")
+    allow_empty = field.allow_empty
+    max_length = field.max_length
+    min_length = field.min_length
+
+    def check(value):
+        if type(value) is not list:
+            raise Invalid
+        if not value and not allow_empty:
+            raise Invalid
+        if max_length is not None and len(value) > max_length:
+            raise Invalid
+        if min_length is not None and len(value) < min_length:
+            raise Invalid
+        items = []
+        for item in value:
+            if type(item) is not dict:
+                raise Invalid
+            items.append(dict(item))
+        return items
+
+    return check
+
+
+# Exact field classes only: a subclass may change to_internal_value.
+FIELD_CHECKS = {
+    serializers.CharField: _check_char,
+    serializers.URLField: _check_char,
+    serializers.ChoiceField: _check_choice,
+    serializers.IntegerField: _check_integer,
+    serializers.DateTimeField: _check_datetime,
+    serializers.JSONField: _check_json,
+    serializers.ListField: _check_dict_list,
+}
+
+KNOWN_VALIDATORS = (
+    MaxLengthValidator,
+    MinLengthValidator,
+    MaxValueValidator,
+    MinValueValidator,
+    ProhibitNullCharactersValidator,
+    ProhibitSurrogateCharactersValidator,
+    URLValidator,
+)
+
+
+def _compile_field(name, field):
+    if field.read_only or field.default is not empty or field.source != name:
+        raise ImproperlyConfigured(f"field {name!r}: read_only/default/source are not supported")
+    for validator in field.validators:
+        if not isinstance(validator, KNOWN_VALIDATORS):
+            raise ImproperlyConfigured(f"field {name!r}: unsupported validator {validator!r}")
+    factory = FIELD_CHECKS.get(type(field))
+    if factory is None:
+        raise ImproperlyConfigured(f"field {name!r}: unsupported type {type(field).__name__}")
+    return factory(field)
+
+
+class CompiledSerializer:
+    """Fast path for ``serializer_class`` (see the module docstring).
+
+    ``validate_hook(attrs)`` stands in for the serializer's ``validate()``; it
+    must raise ``Invalid`` whenever the real ``validate()`` could fail.
+    """
+
+    def __init__(self, serializer_class, validate_hook=None):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        overrides_validate = serializer_class.validate is not serializers.Serializer.validate
+        if overrides_validate and validate_hook is None:
+            raise ImproperlyConfigured(f"{serializer_class.__name__}.validate() needs a validate_hook")
+        if serializer.validators:
+            raise ImproperlyConfigured(f"{serializer_class.__name__} has serializer-level validators")
+        self.validate_hook = validate_hook
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if hasattr(serializer, f"validate_{name}"):
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.validate_{name}() is not supported")
+            self.fields.append((name, field.required, field.allow_null, _compile_field(name, field)))
+
+    def fast_validate(self, data):
+        """``validated_data`` for a JSON object, or raise ``Invalid``."""
+        attrs = {}
+        for name, required, allow_null, check in self.fields:
+            value = data.get(name, empty)
+            if value is empty:
+                if required:
+                    raise Invalid
+                continue
+            if value is None:
+                if not allow_null:
+                    raise Invalid
+                attrs[name] = None
+                continue
+            attrs[name] = check(value)
+        if self.validate_hook is not None:
+            attrs = self.validate_hook(attrs)
+        return attrs
+
+    def validate(self, data, context=None):
+        """``(validated_data, None)`` or ``(None, serializer.errors)``."""
+        if type(data) is dict:
+            try:
+                return self.fast_validate(data), None
+            except Invalid:
+                pass
+        serializer = self.serializer_class(data=data, context=context or {})
+        if serializer.is_valid():
+            return serializer.validated_data, None
+        return None, serializer.errors
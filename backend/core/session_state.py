@@ -0,0 +1,72 @@
+import logging
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStateStore:
+    """Write-through per-session state kept in a Redis hash.
+
+    Keys are ``session:{scope}:{session_id}`` and expire after
+    TRACK_SESSION_STATE_TTL seconds without a write. The store is a hint, not
+    a source of truth: every read may return ``{}`` and callers fall back to
+    the database. After a Redis error the store stays off for
+    TRACK_SESSION_STATE_RETRY_SECONDS so an outage does not add a timeout to
+    every hit.
+    """
+
+    def __init__(self, prefix: str = "session"):
+        self.prefix = prefix
+        self._disabled_until = 0.0
+
+    def _key(self, scope: str, session_id: str) -> str:
+        return f"{self.prefix}:{scope}:{session_id}"
+
+    def _available(self) -> bool:
+        return settings.TRACK_SESSION_STATE_ENABLED and time.monotonic() >= self._disabled_until
+
+    def _trip(self, action: str) -> None:
+        self._disabled_until = time.monotonic() + settings.TRACK_SESSION_STATE_RETRY_SECONDS
+        logger.warning("session state %s failed, bypassing store for %ss", action, settings.TRACK_SESSION_STATE_RETRY_SECONDS)
+
+    def resume(self) -> None:
+        self._disabled_until = 0.0
+
+    def get(self, scope: str, session_id: str) -> dict:
+        if not session_id or not self._available():
+            return {}
+        try:
+            raw = get_redis().hgetall(self._key(scope, session_id))
+        except RedisError:
+            self._trip("read")
+            return {}
+        return {key.decode("utf-8"): value.decode("utf-8") for key, value in raw.items()}
+
+    def update(self, scope: str, session_id: str, fields: dict) -> None:
+        if not session_id or not self._available():
+            return
+        mapping = {key: "" if value is None else str(value) for key, value in fields.items()}
+        key = self._key(scope, session_id)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, settings.TRACK_SESSION_STATE_TTL)
+            pipe.execute()
+        except RedisError:
+            self._trip("write")
+
+    def forget(self, scope: str, session_id: str) -> None:
+        if not session_id or not self._available():
+            return
+        try:
+            get_redis().delete(self._key(scope, session_id))
+        except RedisError:
+            self._trip("delete")
+
+
+session_state = SessionStateStore()
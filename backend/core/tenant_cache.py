@@ -0,0 +1,118 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_NOT_FOUND = "__tenant_not_found__"
+
+
+class TenantCache:
+    """Token -> tenant row cache: a per-process TTL/LRU in front of the shared Redis cache.
+
+    Invalid tokens are cached too (for TENANT_CACHE_NEGATIVE_TTL). Model signals
+    call ``invalidate``; that clears Redis and this process, other processes
+    pick the change up once their local entry expires (TENANT_CACHE_LOCAL_TTL).
+    Bulk ``QuerySet.update()`` does not send signals and is only seen after
+    the TTLs run out.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, token: str) -> str:
+        return f"tenant:{self.namespace}:{token}"
+
+    def get(self, token: str, loader):
+        if not token or not isinstance(token, str):
+            return None
+        value = self._get_local(token)
+        if value is _MISSING:
+            value = self._get_shared(token)
+            if value is _MISSING:
+                value = loader(token)
+                self._set_shared(token, value)
+            self._set_local(token, value)
+        # Callers may mutate and save the instance; never hand out the cached object itself.
+        return copy.copy(value) if value is not None else None
+
+    def peek(self, token):
+        """``(True, value)`` if this process has a live entry for ``token``, else ``(False, None)``.
+
+        Touches neither Redis nor the database, so async code can call it on the event loop.
+        """
+        if not token or not isinstance(token, str):
+            return True, None
+        value = self._get_local(token)
+        if value is _MISSING:
+            return False, None
+        return True, copy.copy(value) if value is not None else None
+
+    def invalidate(self, *tokens) -> None:
+        tokens = [token for token in tokens if token]
+        if not tokens:
+            return
+        with self._lock:
+            for token in tokens:
+                self._local.pop(token, None)
+        try:
+            cache.delete_many([self._key(token) for token in tokens])
+        except Exception:
+            logger.exception("tenant cache invalidate failed namespace=%s", self.namespace)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def _get_local(self, token):
+        with self._lock:
+            entry = self._local.get(token)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[token]
+                return _MISSING
+            self._local.move_to_end(token)
+            return value
+
+    def _set_local(self, token, value) -> None:
+        ttl = settings.TENANT_CACHE_LOCAL_TTL
+        if value is None:
+            ttl = min(ttl, settings.TENANT_CACHE_NEGATIVE_TTL)
+        with self._lock:
+            self._local[token] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(token)
+            while len(self._local) > settings.TENANT_CACHE_LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, token):
+        try:
+            value = cache.get(self._key(token), _MISSING)
+        except Exception:
+            logger.exception("tenant cache read failed namespace=%s", self.namespace)
+            return _MISSING
+        if value == _NOT_FOUND:
+            return None
+        return value
+
+    def _set_shared(self, token, value) -> None:
+        try:
+            if value is None:
+                cache.set(self._key(token), _NOT_FOUND, timeout=settings.TENANT_CACHE_NEGATIVE_TTL)
+            else:
+                cache.set(self._key(token), value, timeout=settings.TENANT_CACHE_TTL)
+        except Exception:
+            logger.exception("tenant cache write failed namespace=%s", self.namespace)
+
+
+client_cache = TenantCache("client")
+site_cache = TenantCache("site")
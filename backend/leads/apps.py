@@ -5,3 +5,6 @@ class LeadsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "leads"
 
+
+    def ready(self):
+        from leads import signals  # noqa: F401
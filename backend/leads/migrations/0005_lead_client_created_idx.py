@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("leads", "0004_alter_lead_name_alter_lead_phone"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lead",
+            index=models.Index(fields=["client", "created_at"], name="leads_lead_client_created_idx"),
+        ),
+    ]
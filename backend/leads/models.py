@@ -27,6 +27,7 @@ class Lead(models.Model):
         verbose_name_plural = "Заявки"
         indexes = [
             models.Index(fields=["client", "status", "created_at"]),
+            models.Index(fields=["client", "created_at"], name="leads_lead_client_created_idx"),
         ]
 
     def __str__(self):
@@ -1,6 +1,10 @@
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
 
 from analytics_app.models import PageView
+from analytics_app.services.session_state import latest_page_view
+from core import data_version
 from leads.models import Lead
 from leads.tasks import send_lead_notification_task
 from leads.utils import normalize_phone
@@ -44,14 +48,13 @@ class PublicLeadCreateSerializer(serializers.ModelSerializer):
         validated_data.setdefault("name", "")
         lead = Lead.objects.create(client=client, status=Lead.Status.NEW, **validated_data)
         if session_id:
-            latest_page_view = (
-                PageView.objects.filter(client=client, session_id=session_id)
-                .order_by("-created_at")
-                .first()
-            )
-            if latest_page_view:
-                latest_page_view.attributed_leads += 1
-                latest_page_view.save(update_fields=["attributed_leads", "updated_at"])
+            page_view = latest_page_view(client, session_id)
+            if page_view:
+                PageView.objects.filter(id=page_view.id).update(
+                    attributed_leads=F("attributed_leads") + 1,
+                    updated_at=timezone.now(),
+                )
+        data_version.bump(client.api_key)
         send_lead_notification_task.delay(lead.id)
         return lead
 
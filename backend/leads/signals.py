@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clients.models import Client
+from core import data_version
+from leads.models import Lead
+
+
+@receiver(post_save, sender=Lead, dispatch_uid="leads.bump_data_version_on_save")
+@receiver(post_delete, sender=Lead, dispatch_uid="leads.bump_data_version_on_delete")
+def bump_data_version(sender, instance, created=False, **kwargs):
+    # New leads are counted by PublicLeadCreateSerializer; a status change or removal
+    # rewrites the lead's original day, which may already be settled.
+    if created:
+        return
+    api_key = Client.objects.filter(id=instance.client_id).values_list("api_key", flat=True).first()
+    data_version.bump(api_key, settled=True)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from reports.models import ReportSettings
+from reports.models import DailyPdfDelivery, DailyPdfRun, ReportSettings
 
 
 @admin.register(ReportSettings)
@@ -8,3 +8,18 @@ class ReportSettingsAdmin(admin.ModelAdmin):
     list_display = ("id", "client", "daily_pdf_enabled", "last_sent_at", "updated_at")
     search_fields = ("client__name", "client__owner__email")
     list_filter = ("daily_pdf_enabled",)
+
+
+class DailyPdfDeliveryInline(admin.TabularInline):
+    model = DailyPdfDelivery
+    extra = 0
+    fields = ("client", "status", "attempts", "last_error", "updated_at")
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(DailyPdfRun)
+class DailyPdfRunAdmin(admin.ModelAdmin):
+    list_display = ("run_date", "total", "sent", "skipped", "failed", "started_at", "finished_at")
+    date_hierarchy = "run_date"
+    inlines = [DailyPdfDeliveryInline]
@@ -4,3 +4,6 @@
 class ReportsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "reports"
+
+    def ready(self):
+        from reports import signals  # noqa: F401
@@ -0,0 +1,97 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.services.pdf_generator import render_report_pdf
+
+
+def synthetic_report(rows: int) -> dict:
+    """A report with PDF_SECTIONS where every ranked section has ``rows`` rows."""
+    today = timezone.localdate()
+    share = round(100 / max(rows, 1), 2)
+
+    def named(prefix):
+        return [{"name": f"{prefix} {idx}", "count": rows - idx, "percent": share} for idx in range(rows)]
+
+    return {
+        "summary": {
+            "visits": rows * 40,
+            "unique_users": rows * 25,
+            "forms": rows * 3,
+            "leads": rows * 2,
+            "notifications_sent": rows,
+            "conversion": 5.0,
+        },
+        "period": {"date_from": today - timedelta(days=rows - 1), "date_to": today},
+        "devices_distribution": {"devices": named("Device"), "os": named("OS"), "browsers": named("Browser")},
+        "daily_stats": [
+            {"day": today - timedelta(days=idx), "visits": 40, "unique_users": 25, "forms": 3, "leads": 2, "conversion": 7.5}
+            for idx in range(rows)
+        ],
+        "page_conversion": [
+            {"pathname": f"/catalog/section-{idx}/item", "visits": 40, "leads": 2, "conversion_pct": 5.0} for idx in range(rows)
+        ],
+        "top_clicks": [
+            {
+                "page_pathname": f"/catalog/section-{idx}",
+                "element_text": f"Оставить заявку {idx}",
+                "element_id": "",
+                "element_class": "",
+                "count": rows - idx,
+                "percent_of_total": share,
+            }
+            for idx in range(rows)
+        ],
+        "sources": [{"source": f"partner-{idx}.example.com", "visits": 40, "percent_of_total": share} for idx in range(rows)],
+        "engagement": {
+            "total_time_on_site_seconds": rows * 3600,
+            "avg_visit_duration_seconds": 95.5,
+            "pages": [
+                {"pathname": f"/page-{idx}", "avg_duration_seconds": 60, "total_duration_seconds": 600, "visits_count": 10}
+                for idx in range(rows)
+            ],
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = "Render synthetic reports of growing size: PDF render time and peak memory per size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            action="append",
+            help="Rows per ranked section (default: 10, 50, 200, 1000).",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Renders per size; the fastest is reported.")
+
+    def _render(self, report):
+        return render_report_pdf(
+            report,
+            client_name="Benchmark",
+            owner_email="benchmark@example.com",
+            generated_at=timezone.localtime(timezone.now()),
+        )
+
+    def handle(self, *args, **options):
+        for rows in options["rows"] or [10, 50, 200, 1000]:
+            report = synthetic_report(rows)
+            self._render(report)  # Warm-up: fonts, styles and table styles are built once per process.
+            timings = []
+            for _ in range(max(options["repeat"], 1)):
+                started = time.perf_counter()
+                pdf_bytes = self._render(report)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            tracemalloc.start()
+            self._render(report)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"rows={rows}: {min(timings):.1f} ms peak={peak / (1024 * 1024):.1f} MB size={len(pdf_bytes) / 1024:.0f} KB"
+            )
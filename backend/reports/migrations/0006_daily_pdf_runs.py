@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0005_alter_client_options_alter_client_api_key_and_more"),
+        ("reports", "0005_reportsettings_last_manual_sent_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyPdfRun",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("run_date", models.DateField(unique=True)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("sent", models.PositiveIntegerField(default=0)),
+                ("skipped", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ("-run_date",),
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyPdfDelivery",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("sending", "Sending"),
+                            ("sent", "Sent"),
+                            ("skipped", "Skipped"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, default="")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_pdf_deliveries",
+                        to="clients.client",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deliveries",
+                        to="reports.dailypdfrun",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("run", "client"),
+                "indexes": [models.Index(fields=["run", "status"], name="reports_delivery_status_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailypdfdelivery",
+            constraint=models.UniqueConstraint(fields=("run", "client"), name="reports_delivery_run_client_uniq"),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reports", "0007_reportjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailypdfdelivery",
+            name="task_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 
 from clients.models import Client
@@ -16,3 +17,82 @@ class ReportSettings(models.Model):
 
     def __str__(self) -> str:
         return f"Report settings: client={self.client_id} daily_pdf_enabled={self.daily_pdf_enabled}"
+
+
+class DailyPdfRun(models.Model):
+    """One day's 20:00 MSK delivery run; the counters are written when its last delivery finishes."""
+
+    run_date = models.DateField(unique=True)
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-run_date",)
+
+    def __str__(self) -> str:
+        return f"Daily PDF run {self.run_date}: sent={self.sent} skipped={self.skipped} failed={self.failed}"
+
+
+class DailyPdfDelivery(models.Model):
+    """Progress of one client's PDF within a run."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        SKIPPED = "skipped", "Skipped"
+        FAILED = "failed", "Failed"
+
+    run = models.ForeignKey(DailyPdfRun, on_delete=models.CASCADE, related_name="deliveries")
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="daily_pdf_deliveries")
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # Celery id of the task that claimed the delivery; its own redelivery may claim it again.
+    task_id = models.CharField(max_length=255, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("run", "client")
+        constraints = [
+            models.UniqueConstraint(fields=["run", "client"], name="reports_delivery_run_client_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["run", "status"], name="reports_delivery_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Daily PDF delivery: run={self.run_id} client={self.client_id} status={self.status}"
+
+
+class ReportJob(models.Model):
+    """A "send report now" request, rendered and sent to Telegram by send_report_job_task."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RENDERING = "rendering", "Rendering"
+        SENDING = "sending", "Sending"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="report_jobs")
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    error = models.TextField(blank=True, default="")
+    queued_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    rendered_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-queued_at",)
+        indexes = [
+            models.Index(fields=["client", "queued_at"], name="reports_job_client_queued_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Report job {self.pk}: client={self.client_id} status={self.status}"
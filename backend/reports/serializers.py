@@ -1,5 +1,20 @@
 from rest_framework import serializers
 
+from reports.models import ReportJob
+from reports.services.report_jobs import job_timings
+
 
 class DailyToggleSerializer(serializers.Serializer):
     enabled = serializers.BooleanField()
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source="id")
+    timings = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = ("job_id", "status", "error", "queued_at", "started_at", "rendered_at", "finished_at", "timings")
+
+    def get_timings(self, obj):
+        return job_timings(obj)
@@ -1,4 +1,5 @@
-from reports.services.pdf_generator import build_pdf_for_client
+from reports.services.pdf_generator import render_report_pdf
+from reports.services.pdf_store import build_pdf_for_client, stored_pdf_for_client
 from reports.services.telegram_sender import send_pdf_to_client_telegram
 
-__all__ = ["build_pdf_for_client", "send_pdf_to_client_telegram"]
+__all__ = ["build_pdf_for_client", "render_report_pdf", "send_pdf_to_client_telegram", "stored_pdf_for_client"]
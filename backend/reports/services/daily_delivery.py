@@ -0,0 +1,125 @@
+"""Bookkeeping for the fanned-out daily PDF run.
+
+``send_daily_pdf_task`` creates one DailyPdfRun per day and one
+DailyPdfDelivery per client, then enqueues ``send_client_daily_pdf_task``
+for each delivery. Tasks claim their delivery row before sending, so a
+redelivered or duplicated message does not send the PDF twice. At most
+REPORTS_DAILY_PDF_CONCURRENCY deliveries render and upload at once, across all
+workers; the slots are leases in a Redis sorted set. The task that finishes
+the last delivery writes the run's summary counters.
+"""
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+from reports.models import DailyPdfDelivery, DailyPdfRun
+
+logger = logging.getLogger(__name__)
+
+SLOTS_KEY = "reports:daily_pdf:slots"
+
+Status = DailyPdfDelivery.Status
+
+
+def stranded(run_id) -> list:
+    """Ids of the run's deliveries that no queued task will pick up any more.
+
+    A pending delivery may wait out the jitter window before its task runs;
+    past that and a lease it was lost (dispatch crashed before enqueueing, or
+    the message was dropped). A sending one is stranded once its lease expires.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=settings.REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS)
+    lost = now - lease - timedelta(seconds=settings.REPORTS_DAILY_PDF_JITTER_SECONDS)
+    return list(
+        DailyPdfDelivery.objects.filter(
+            Q(status=Status.PENDING, updated_at__lt=lost) | Q(status=Status.SENDING, updated_at__lt=now - lease),
+            run_id=run_id,
+        ).values_list("id", flat=True)
+    )
+
+
+def claim(delivery_id, task_id) -> bool:
+    """Move a delivery to "sending" for ``task_id``.
+
+    Claimable are pending deliveries, ones stuck in "sending" past the lease,
+    and ones ``task_id`` itself claimed: with acks_late, a worker crash
+    redelivers the same message, which must be able to carry on.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS)
+    claimable = Q(status=Status.PENDING) | Q(status=Status.SENDING) & (Q(updated_at__lt=stale) | Q(task_id=task_id))
+    return bool(
+        DailyPdfDelivery.objects.filter(claimable, id=delivery_id).update(
+            status=Status.SENDING, task_id=task_id, updated_at=timezone.now()
+        )
+    )
+
+
+def acquire_slot():
+    """A slot token while fewer than REPORTS_DAILY_PDF_CONCURRENCY deliveries are running, else None.
+
+    Concurrency 0 means unlimited. If Redis is down the delivery runs anyway.
+    """
+    limit = settings.REPORTS_DAILY_PDF_CONCURRENCY
+    token = uuid.uuid4().hex
+    if limit <= 0:
+        return token
+    now = time.time()
+    try:
+        pipe = get_redis().pipeline()
+        pipe.zremrangebyscore(SLOTS_KEY, "-inf", now - settings.REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS)
+        pipe.zadd(SLOTS_KEY, {token: now})
+        pipe.zrank(SLOTS_KEY, token)
+        pipe.expire(SLOTS_KEY, settings.REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS)
+        rank = pipe.execute()[2]
+        if rank is not None and rank < limit:
+            return token
+        get_redis().zrem(SLOTS_KEY, token)
+        return None
+    except RedisError:
+        logger.warning("reports.daily_pdf slot limiter unavailable, running without it", exc_info=True)
+        return token
+
+
+def release_slot(token) -> None:
+    if settings.REPORTS_DAILY_PDF_CONCURRENCY <= 0:
+        return
+    try:
+        get_redis().zrem(SLOTS_KEY, token)
+    except RedisError:
+        logger.warning("reports.daily_pdf slot release failed token=%s", token, exc_info=True)
+
+
+def finish_run(run_id) -> bool:
+    """Write the run's summary once no delivery is pending or sending; True if this call wrote it."""
+    with transaction.atomic():
+        run = DailyPdfRun.objects.select_for_update().get(id=run_id)
+        if run.finished_at is not None:
+            return False
+        counts = dict(run.deliveries.values_list("status").annotate(count=Count("id")).order_by())
+        if counts.get(Status.PENDING) or counts.get(Status.SENDING):
+            return False
+        run.total = sum(counts.values())
+        run.sent = counts.get(Status.SENT, 0)
+        run.skipped = counts.get(Status.SKIPPED, 0)
+        run.failed = counts.get(Status.FAILED, 0)
+        run.finished_at = timezone.now()
+        run.save(update_fields=["total", "sent", "skipped", "failed", "finished_at"])
+    logger.info(
+        "reports.daily_pdf run finished date=%s total=%s sent=%s skipped=%s failed=%s seconds=%.1f",
+        run.run_date,
+        run.total,
+        run.sent,
+        run.skipped,
+        run.failed,
+        (run.finished_at - run.started_at).total_seconds(),
+    )
+    return True
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
 
@@ -11,8 +12,18 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
-from analytics_app.services.metrics import default_period_days
-from analytics_app.services.report_builder import build_full_report
+from analytics_app.services.report_cache import cached_report
+
+PDF_SECTIONS = (
+    "summary",
+    "period",
+    "devices_distribution",
+    "daily_stats",
+    "page_conversion",
+    "top_clicks",
+    "sources",
+    "engagement",
+)
 
 FONT_REGULAR = "TrackNodeRegular"
 FONT_BOLD = "TrackNodeBold"
@@ -33,6 +44,10 @@ COLOR_ACCENT = colors.HexColor("#EAF1FF")
 COLOR_BORDER = colors.HexColor("#CBD5E1")
 COLOR_TEXT = colors.HexColor("#1F2937")
 
+CELL_FONT_SIZE = 8.5
+CELL_LEADING = 11
+CELL_PADDING = 6
+
 
 def _first_existing(paths):
     for path in paths:
@@ -41,7 +56,8 @@ def _first_existing(paths):
     return None
 
 
-def _ensure_fonts_registered():
+def register_fonts():
+    """Register the report fonts once per process; celery workers call it at startup."""
     try:
         pdfmetrics.getFont(FONT_REGULAR)
         pdfmetrics.getFont(FONT_BOLD)
@@ -84,91 +100,92 @@ def _format_duration(seconds):
     return f"{hours} ч {minutes} мин"
 
 
+@lru_cache(maxsize=None)
 def _styles():
+    """Paragraph styles, built once per process."""
     styles = getSampleStyleSheet()
-    if "tn_title" not in styles:
-        styles.add(
-            ParagraphStyle(
-                name="tn_title",
-                parent=styles["Title"],
-                fontName=FONT_BOLD,
-                fontSize=20,
-                leading=25,
-                textColor=COLOR_PRIMARY,
-                alignment=1,
-                spaceAfter=6,
-            )
+    styles.add(
+        ParagraphStyle(
+            name="tn_title",
+            parent=styles["Title"],
+            fontName=FONT_BOLD,
+            fontSize=20,
+            leading=25,
+            textColor=COLOR_PRIMARY,
+            alignment=1,
+            spaceAfter=6,
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_subtitle",
-                parent=styles["BodyText"],
-                fontName=FONT_REGULAR,
-                fontSize=10,
-                leading=14,
-                textColor=COLOR_TEXT,
-                alignment=1,
-                spaceAfter=2,
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_subtitle",
+            parent=styles["BodyText"],
+            fontName=FONT_REGULAR,
+            fontSize=10,
+            leading=14,
+            textColor=COLOR_TEXT,
+            alignment=1,
+            spaceAfter=2,
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_section",
-                parent=styles["Heading2"],
-                fontName=FONT_BOLD,
-                fontSize=12,
-                leading=16,
-                textColor=COLOR_PRIMARY,
-                spaceBefore=8,
-                spaceAfter=6,
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_section",
+            parent=styles["Heading2"],
+            fontName=FONT_BOLD,
+            fontSize=12,
+            leading=16,
+            textColor=COLOR_PRIMARY,
+            spaceBefore=8,
+            spaceAfter=6,
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_body",
-                parent=styles["BodyText"],
-                fontName=FONT_REGULAR,
-                fontSize=9,
-                leading=13,
-                textColor=COLOR_TEXT,
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_body",
+            parent=styles["BodyText"],
+            fontName=FONT_REGULAR,
+            fontSize=9,
+            leading=13,
+            textColor=COLOR_TEXT,
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_cell",
-                parent=styles["BodyText"],
-                fontName=FONT_REGULAR,
-                fontSize=8.5,
-                leading=11,
-                textColor=COLOR_TEXT,
-                wordWrap="CJK",
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_cell",
+            parent=styles["BodyText"],
+            fontName=FONT_REGULAR,
+            fontSize=CELL_FONT_SIZE,
+            leading=CELL_LEADING,
+            textColor=COLOR_TEXT,
+            wordWrap="CJK",
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_cell_header",
-                parent=styles["BodyText"],
-                fontName=FONT_BOLD,
-                fontSize=8.7,
-                leading=11,
-                textColor=COLOR_PRIMARY,
-                wordWrap="CJK",
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_cell_header",
+            parent=styles["BodyText"],
+            fontName=FONT_BOLD,
+            fontSize=8.7,
+            leading=11,
+            textColor=COLOR_PRIMARY,
+            wordWrap="CJK",
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_cell_right",
-                parent=styles["tn_cell"],
-                alignment=2,
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_cell_right",
+            parent=styles["tn_cell"],
+            alignment=2,
         )
-        styles.add(
-            ParagraphStyle(
-                name="tn_cell_header_right",
-                parent=styles["tn_cell_header"],
-                alignment=2,
-            )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="tn_cell_header_right",
+            parent=styles["tn_cell_header"],
+            alignment=2,
         )
+    )
     return {
         "title": styles["tn_title"],
         "subtitle": styles["tn_subtitle"],
@@ -195,13 +212,41 @@ def _to_paragraph_cell(value, *, numeric=False, header=False):
     return Paragraph(text, style)
 
 
+def _to_cell(value, width, *, numeric=False):
+    """A plain string when it fits on one line of the column, else a wrapping Paragraph."""
+    text = _sanitize_text(value)
+    if "\n" not in text and pdfmetrics.stringWidth(text, FONT_REGULAR, CELL_FONT_SIZE) <= width - 2 * CELL_PADDING:
+        return text
+    return _to_paragraph_cell(text, numeric=numeric)
+
+
+@lru_cache(maxsize=None)
+def _table_style(numeric_cols: frozenset):
+    """One TableStyle per column layout; plain-string cells take their font and alignment from it."""
+    commands = [
+        ("BACKGROUND", (0, 0), (-1, 0), COLOR_ACCENT),
+        ("GRID", (0, 0), (-1, -1), 0.35, COLOR_BORDER),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+        ("RIGHTPADDING", (0, 0), (-1, -1), CELL_PADDING),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#FAFBFF")]),
+        ("FONT", (0, 1), (-1, -1), FONT_REGULAR, CELL_FONT_SIZE, CELL_LEADING),
+        ("TEXTCOLOR", (0, 1), (-1, -1), COLOR_TEXT),
+    ]
+    commands.extend(("ALIGN", (col, 1), (col, -1), "RIGHT") for col in sorted(numeric_cols))
+    return TableStyle(commands)
+
+
 def _render_table(elements, title, headers, rows, widths, *, numeric_cols=None, rows_per_page=26):
-    numeric_cols = set(numeric_cols or [])
+    numeric_cols = frozenset(numeric_cols or [])
     elements.append(Paragraph(_sanitize_text(title), _styles()["section"]))
 
     if not rows:
         rows = [["Данных за выбранный период нет"] + [""] * (len(headers) - 1)]
 
+    table_style = _table_style(numeric_cols)
     start = 0
     while start < len(rows):
         chunk = rows[start : start + rows_per_page]
@@ -210,24 +255,11 @@ def _render_table(elements, title, headers, rows, widths, *, numeric_cols=None,
         ]
         for row in chunk:
             table_rows.append(
-                [_to_paragraph_cell(cell, numeric=(idx in numeric_cols), header=False) for idx, cell in enumerate(row)]
+                [_to_cell(cell, widths[idx], numeric=(idx in numeric_cols)) for idx, cell in enumerate(row)]
             )
 
         table = Table(table_rows, colWidths=widths, repeatRows=1)
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), COLOR_ACCENT),
-                    ("GRID", (0, 0), (-1, -1), 0.35, COLOR_BORDER),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                    ("TOPPADDING", (0, 0), (-1, -1), 4),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#FAFBFF")]),
-                ]
-            )
-        )
+        table.setStyle(table_style)
         elements.append(table)
         elements.append(Spacer(1, 8))
 
@@ -259,15 +291,33 @@ def _draw_page_footer(canvas, doc):
     canvas.restoreState()
 
 
-def build_pdf_for_client(*, client, user):
-    date_from, date_to = default_period_days(days=14)
-    report = build_full_report(client=client, date_from=date_from, date_to=date_to)
+def pdf_header(client, user):
+    """``(client_name, owner_email)`` as printed on the title page."""
+    client_name = _sanitize_text(getattr(client, "name", "")) if getattr(client, "name", "") else "Не указан"
+    return client_name, _sanitize_text(getattr(user, "email", "-"))
+
+
+def report_filename(client) -> str:
+    return f"tracknode-full-report-client-{client.id}-{timezone.localdate():%Y%m%d}.pdf"
+
+
+def render_pdf_for_client(*, client, user, date_from, date_to) -> bytes:
+    report = cached_report(client, date_from, date_to, PDF_SECTIONS)
+    client_name, owner_email = pdf_header(client, user)
+    return render_report_pdf(
+        report,
+        client_name=client_name,
+        owner_email=owner_email,
+        generated_at=timezone.localtime(timezone.now()),
+    )
+
+
+def render_report_pdf(report, *, client_name, owner_email, generated_at) -> bytes:
+    """Lay out a report with PDF_SECTIONS as a PDF document."""
     summary = report["summary"]
 
-    _ensure_fonts_registered()
+    register_fonts()
 
-    generated_at = timezone.localtime(timezone.now())
-    filename = f"tracknode-full-report-client-{client.id}-{timezone.localdate():%Y%m%d}.pdf"
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -281,8 +331,6 @@ def build_pdf_for_client(*, client, user):
 
     styles = _styles()
     period_text = f"{report['period']['date_from']:%d.%m.%Y} - {report['period']['date_to']:%d.%m.%Y}"
-    client_name = _sanitize_text(getattr(client, "name", "")) if getattr(client, "name", "") else "Не указан"
-    owner_email = _sanitize_text(getattr(user, "email", "-"))
 
     elements = [
         Paragraph("TrackNode Analytics", styles["title"]),
@@ -478,4 +526,4 @@ def build_pdf_for_client(*, client, user):
     )
 
     doc.build(elements, onFirstPage=_draw_page_footer, onLaterPages=_draw_page_footer)
-    return buffer.getvalue(), filename
+    return buffer.getvalue()
@@ -0,0 +1,133 @@
+"""Rendered report PDFs on disk under REPORTS_STORAGE_DIR, addressed by their inputs.
+
+A PDF is stored as ``<client_id>/<digest>.pdf``, where the digest covers
+the client, the period, the client's data version (report_cache.cache_version:
+the settled generation once the period is settled), the title-page header and
+PDF_LAYOUT_VERSION. Asking for the same report again serves the stored file
+instead of rendering it: manual sends, the daily run and downloads all share
+it. The title page keeps the time of the first render.
+
+Without a data version (Redis down) a stored PDF could never be reused, so it
+is rendered and returned without being stored.
+
+Files are written to a temporary name and renamed into place, so readers never
+see a partial PDF. ``sweep`` (beat: sweep_report_store_task) deletes the least
+recently used files once the store grows past REPORTS_STORAGE_MAX_MB.
+"""
+import hashlib
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from analytics_app.services.periods import default_period_days
+from analytics_app.services.report_cache import cache_version
+from reports.services.pdf_generator import pdf_header, render_pdf_for_client, report_filename
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so stored PDFs are rendered again.
+PDF_LAYOUT_VERSION = "1"
+TEMP_SUFFIX = ".tmp"
+TEMP_MAX_AGE_SECONDS = 3600
+
+
+def _root() -> Path:
+    return Path(settings.REPORTS_STORAGE_DIR)
+
+
+def _digest(client, user, date_from, date_to):
+    """Content address of the report, or None when the client's data version is unknown."""
+    version = cache_version(client, date_to)
+    if version is None:
+        return None
+    parts = [PDF_LAYOUT_VERSION, str(client.id), date_from.isoformat(), date_to.isoformat(), str(version), *pdf_header(client, user)]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _write(path: Path, pdf_bytes: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f"{path.name}.{uuid.uuid4().hex}{TEMP_SUFFIX}")
+    temp.write_bytes(pdf_bytes)
+    os.replace(temp, path)
+
+
+def stored_pdf_for_client(*, client, user, days: int = 14):
+    """``(path, filename, etag)`` of the client's report PDF; rendered only when the store lacks it.
+
+    None when the data version is unknown; ``render_unstored_pdf`` then builds the PDF.
+    """
+    date_from, date_to = default_period_days(days=days)
+    digest = _digest(client, user, date_from, date_to)
+    if digest is None:
+        return None
+    path = _root() / str(client.id) / f"{digest}.pdf"
+    try:
+        os.utime(path)  # Marks the file as recently used for the sweeper.
+        logger.debug("reports.store hit client_id=%s digest=%s", client.id, digest)
+    except FileNotFoundError:
+        started = time.perf_counter()
+        _write(path, render_pdf_for_client(client=client, user=user, date_from=date_from, date_to=date_to))
+        logger.info(
+            "reports.store rendered client_id=%s digest=%s ms=%.1f",
+            client.id,
+            digest,
+            (time.perf_counter() - started) * 1000,
+        )
+    return path, report_filename(client), digest
+
+
+def render_unstored_pdf(*, client, user, days: int = 14) -> bytes:
+    date_from, date_to = default_period_days(days=days)
+    logger.info("reports.store bypassed client_id=%s: data version unknown", client.id)
+    return render_pdf_for_client(client=client, user=user, date_from=date_from, date_to=date_to)
+
+
+def build_pdf_for_client(*, client, user):
+    """``(pdf_bytes, filename)`` of the client's current report."""
+    stored = stored_pdf_for_client(client=client, user=user)
+    if stored is not None:
+        path, filename, _ = stored
+        try:
+            return path.read_bytes(), filename
+        except FileNotFoundError:
+            # Swept between the lookup and the read.
+            logger.info("reports.store file swept before it was read client_id=%s", client.id)
+    return render_unstored_pdf(client=client, user=user), report_filename(client)
+
+
+def sweep(max_bytes=None) -> dict:
+    """Delete stale temporary files, then the least recently used PDFs until the store fits ``max_bytes``."""
+    max_bytes = settings.REPORTS_STORAGE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    root = _root()
+    if not root.exists():
+        return {"removed": 0, "freed": 0, "bytes": 0}
+    now = time.time()
+    files = []
+    removed = freed = 0
+    for path in root.glob("*/*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if path.name.endswith(TEMP_SUFFIX):
+            if now - stat.st_mtime > TEMP_MAX_AGE_SECONDS:
+                path.unlink(missing_ok=True)
+                removed += 1
+                freed += stat.st_size
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+        freed += size
+    logger.info("reports.store swept removed=%s freed=%s remaining=%s", removed, freed, total)
+    return {"removed": removed, "freed": freed, "bytes": total}
@@ -0,0 +1,103 @@
+"""Manual "send report now" jobs.
+
+``enqueue_report_job`` takes the 10-minute cooldown slot and creates the job
+in one transaction: the conditional UPDATE on ReportSettings.last_manual_sent_at
+lets only one of two concurrent clicks through. ``run_report_job`` (called
+by send_report_job_task) renders and sends the PDF and records each step's
+time. A failed job hands the cooldown back, so the user can retry right away.
+The task acks late: a job left rendering or sending by a crashed worker is
+taken over by the redelivered message once it is STALE_JOB_AFTER old.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from reports.models import ReportJob, ReportSettings
+from reports.services.pdf_store import build_pdf_for_client
+from reports.services.telegram_sender import TelegramSendError, send_pdf_to_client_telegram
+
+logger = logging.getLogger(__name__)
+
+GENERIC_ERROR = "Не удалось сформировать или отправить отчет. Попробуйте позже."
+
+MANUAL_SEND_COOLDOWN = timedelta(minutes=10)
+# A job still rendering or sending after this long lost its worker.
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+Status = ReportJob.Status
+
+
+def enqueue_report_job(client, user):
+    """``(job, None)`` for a new queued job, or ``(None, available_at)`` while the cooldown runs."""
+    from reports.tasks.send_report_job import send_report_job_task
+
+    now = timezone.now()
+    with transaction.atomic():
+        settings_obj, _ = ReportSettings.objects.get_or_create(client=client)
+        free = Q(last_manual_sent_at__isnull=True) | Q(last_manual_sent_at__lte=now - MANUAL_SEND_COOLDOWN)
+        claimed = ReportSettings.objects.filter(free, pk=settings_obj.pk).update(last_manual_sent_at=now, updated_at=now)
+        if not claimed:
+            settings_obj.refresh_from_db(fields=["last_manual_sent_at"])
+            return None, settings_obj.last_manual_sent_at + MANUAL_SEND_COOLDOWN
+        job = ReportJob.objects.create(client=client, requested_by=user, queued_at=now)
+        transaction.on_commit(lambda: send_report_job_task.delay(job.id))
+    return job, None
+
+
+def public_error(exc) -> str:
+    """What a failure may tell the client; anything but a Telegram send error gets a fixed message."""
+    if isinstance(exc, TelegramSendError):
+        return str(exc)
+    return GENERIC_ERROR
+
+
+def _set(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=list(fields))
+
+
+def run_report_job(job_id) -> str:
+    """Render and send a queued or stale job; one that is running or finished is left alone."""
+    now = timezone.now()
+    stale = Q(status__in=[Status.RENDERING, Status.SENDING], started_at__lt=now - STALE_JOB_AFTER)
+    if not ReportJob.objects.filter(Q(status=Status.QUEUED) | stale, id=job_id).update(
+        status=Status.RENDERING, started_at=now, rendered_at=None
+    ):
+        return ""
+    job = ReportJob.objects.select_related("client", "requested_by").get(id=job_id)
+    try:
+        pdf_bytes, filename = build_pdf_for_client(client=job.client, user=job.requested_by)
+        _set(job, status=Status.SENDING, rendered_at=timezone.now())
+        send_pdf_to_client_telegram(client=job.client, filename=filename, pdf_bytes=pdf_bytes)
+    except Exception as exc:
+        logger.exception("reports.job failed job_id=%s client_id=%s", job.id, job.client_id)
+        error = public_error(exc)
+        _set(job, status=Status.FAILED, error=error, finished_at=timezone.now())
+        ReportSettings.objects.filter(client_id=job.client_id, last_manual_sent_at=job.queued_at).update(
+            last_manual_sent_at=None, last_error=error, updated_at=timezone.now()
+        )
+        return job.status
+
+    now = timezone.now()
+    _set(job, status=Status.DONE, finished_at=now)
+    ReportSettings.objects.filter(client_id=job.client_id).update(last_sent_at=now, last_error="", updated_at=now)
+    logger.info("reports.job done job_id=%s client_id=%s timings=%s", job.id, job.client_id, job_timings(job))
+    return job.status
+
+
+def _ms(start, end):
+    return round((end - start).total_seconds() * 1000) if start and end else None
+
+
+def job_timings(job) -> dict:
+    """Milliseconds spent waiting in the queue, rendering, sending and in total (None until reached)."""
+    return {
+        "queue_ms": _ms(job.queued_at, job.started_at),
+        "render_ms": _ms(job.started_at, job.rendered_at),
+        "send_ms": _ms(job.rendered_at, job.finished_at),
+        "total_ms": _ms(job.queued_at, job.finished_at),
+    }
@@ -2,23 +2,40 @@ import requests
 from django.conf import settings
 
 
+class TelegramSendError(RuntimeError):
+    """A failed upload. The message is safe to show to the client: it never contains the bot token."""
+
+
+def _api_error(response) -> str:
+    try:
+        description = response.json().get("description")
+    except ValueError:
+        description = None
+    return f"Telegram API error {response.status_code}: {description or response.reason}"
+
+
 def send_pdf_to_client_telegram(*, client, filename: str, pdf_bytes: bytes):
     token = (getattr(settings, "TELEGRAM_BOT_TOKEN", "") or "").strip()
     if not token:
-        raise RuntimeError("TELEGRAM_BOT_TOKEN is empty")
+        raise TelegramSendError("TELEGRAM_BOT_TOKEN is empty")
 
     chat_id = (client.telegram_chat_id or "").strip()
     if not chat_id:
-        raise RuntimeError("Telegram chat_id is not configured for this client")
-
-    response = requests.post(
-        f"https://api.telegram.org/bot{token}/sendDocument",
-        data={"chat_id": chat_id, "caption": "PDF отчёт TrackNode"},
-        files={"document": (filename, pdf_bytes, "application/pdf")},
-        timeout=30,
-    )
-    response.raise_for_status()
+        raise TelegramSendError("Telegram chat_id is not configured for this client")
+
+    # requests puts the URL, bot token included, into its exception messages; none of them is passed on.
+    try:
+        response = requests.post(
+            f"https://api.telegram.org/bot{token}/sendDocument",
+            data={"chat_id": chat_id, "caption": "PDF отчёт TrackNode"},
+            files={"document": (filename, pdf_bytes, "application/pdf")},
+            timeout=30,
+        )
+    except requests.RequestException as exc:
+        raise TelegramSendError(f"Telegram request failed: {type(exc).__name__}") from None
+    if not response.ok:
+        raise TelegramSendError(_api_error(response))
     payload = response.json()
     if not payload.get("ok"):
-        raise RuntimeError(str(payload))
+        raise TelegramSendError(_api_error(response))
     return True
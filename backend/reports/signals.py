@@ -0,0 +1,16 @@
+import logging
+
+from celery.signals import worker_init
+
+from reports.services.pdf_generator import register_fonts
+
+logger = logging.getLogger(__name__)
+
+
+@worker_init.connect(dispatch_uid="reports.register_pdf_fonts")
+def register_pdf_fonts(**kwargs):
+    # Prefork pool processes inherit the fonts parsed here, so no task pays for it.
+    try:
+        register_fonts()
+    except FileNotFoundError:
+        logger.exception("reports.fonts not registered at worker startup")
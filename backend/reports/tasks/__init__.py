@@ -1,3 +1,5 @@
-from reports.tasks.send_daily_pdf import send_daily_pdf_task
+from reports.tasks.send_daily_pdf import send_client_daily_pdf_task, send_daily_pdf_task
+from reports.tasks.send_report_job import send_report_job_task
+from reports.tasks.sweep_report_store import sweep_report_store_task
 
-__all__ = ["send_daily_pdf_task"]
+__all__ = ["send_client_daily_pdf_task", "send_daily_pdf_task", "send_report_job_task", "sweep_report_store_task"]
@@ -1,41 +1,130 @@
 import logging
+import random
+from functools import partial
 from zoneinfo import ZoneInfo
 
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from reports.models import ReportSettings
-from reports.services.pdf_generator import build_pdf_for_client
+from reports.models import DailyPdfDelivery, DailyPdfRun, ReportSettings
+from reports.services import daily_delivery
+from reports.services.pdf_store import build_pdf_for_client
+from reports.services.report_jobs import public_error
 from reports.services.telegram_sender import send_pdf_to_client_telegram
 
 logger = logging.getLogger(__name__)
 
+MSK = ZoneInfo("Europe/Moscow")
+Status = DailyPdfDelivery.Status
+# Retries for a free slot and after failed attempts; a delivery still waiting after them fails.
+MAX_RETRIES = 60
+
+
+def _now_msk():
+    return timezone.now().astimezone(MSK)
+
+
+def _enqueue(delivery_ids, window) -> None:
+    for delivery_id in delivery_ids:
+        send_client_daily_pdf_task.apply_async((delivery_id,), countdown=random.uniform(0, window) if window > 0 else 0)
+
 
 @shared_task
 def send_daily_pdf_task() -> int:
-    now_msk = timezone.now().astimezone(ZoneInfo("Europe/Moscow"))
+    """Start today's run: one send_client_daily_pdf_task per client, spread over the jitter window.
+
+    Later ticks in the same hour re-enqueue the run's stranded deliveries instead.
+    """
+    now_msk = _now_msk()
     if now_msk.hour != 20:
         return 0
 
-    sent_count = 0
-    for settings_obj in ReportSettings.objects.select_related("client").filter(daily_pdf_enabled=True):
-        try:
-            if settings_obj.last_sent_at:
-                last_msk = settings_obj.last_sent_at.astimezone(ZoneInfo("Europe/Moscow"))
-                if last_msk.date() == now_msk.date():
-                    continue
-
-            owner_user = getattr(settings_obj.client, "owner", None)
-            pdf_bytes, filename = build_pdf_for_client(client=settings_obj.client, user=owner_user)
-            send_pdf_to_client_telegram(client=settings_obj.client, filename=filename, pdf_bytes=pdf_bytes)
-
-            settings_obj.last_sent_at = timezone.now()
-            settings_obj.last_error = ""
-            settings_obj.save(update_fields=["last_sent_at", "last_error", "updated_at"])
-            sent_count += 1
-        except Exception as exc:
-            logger.exception("Failed to send daily PDF for client_id=%s", settings_obj.client_id)
-            settings_obj.last_error = str(exc)
-            settings_obj.save(update_fields=["last_error", "updated_at"])
-
-    return sent_count
+    window = settings.REPORTS_DAILY_PDF_JITTER_SECONDS
+    with transaction.atomic():
+        run, created = DailyPdfRun.objects.get_or_create(run_date=now_msk.date())
+        if created:
+            client_ids = ReportSettings.objects.filter(daily_pdf_enabled=True).values_list("client_id", flat=True)
+            deliveries = DailyPdfDelivery.objects.bulk_create(
+                [DailyPdfDelivery(run=run, client_id=client_id) for client_id in client_ids]
+            )
+            delivery_ids = [delivery.id for delivery in deliveries]
+            DailyPdfRun.objects.filter(id=run.id).update(total=len(delivery_ids))
+        else:
+            delivery_ids = daily_delivery.stranded(run.id)
+            window = 0
+        if delivery_ids:
+            # Enqueued only once the rows exist; a failed dispatch leaves nothing half-created.
+            transaction.on_commit(partial(_enqueue, delivery_ids, window))
+
+    if created and not delivery_ids:
+        daily_delivery.finish_run(run.id)
+    if delivery_ids:
+        logger.info(
+            "reports.daily_pdf run %s date=%s clients=%s window=%ss",
+            "dispatched" if created else "resumed",
+            run.run_date,
+            len(delivery_ids),
+            window,
+        )
+    return len(delivery_ids)
+
+
+@shared_task(bind=True, acks_late=True, max_retries=MAX_RETRIES)
+def send_client_daily_pdf_task(self, delivery_id: int) -> str:
+    """Render and upload one client's daily PDF; safe to run more than once for the same delivery."""
+    if not daily_delivery.claim(delivery_id, self.request.id):
+        return "duplicate"
+    delivery = DailyPdfDelivery.objects.select_related("run", "client__owner").get(id=delivery_id)
+
+    slot = daily_delivery.acquire_slot()
+    if slot is None:
+        if self.request.retries >= self.max_retries:
+            logger.error("No daily PDF slot for client_id=%s after %s retries", delivery.client_id, self.request.retries)
+            delivery.status = Status.FAILED
+            delivery.last_error = "No delivery slot became free"
+            delivery.save(update_fields=["status", "last_error", "updated_at"])
+            daily_delivery.finish_run(delivery.run_id)
+            return Status.FAILED
+        DailyPdfDelivery.objects.filter(id=delivery_id).update(status=Status.PENDING, updated_at=timezone.now())
+        raise self.retry(countdown=settings.REPORTS_DAILY_PDF_SLOT_WAIT_SECONDS + random.uniform(0, 5))
+
+    try:
+        status = _deliver(delivery)
+    except Exception as exc:
+        logger.exception("Failed to send daily PDF for client_id=%s attempt=%s", delivery.client_id, delivery.attempts + 1)
+        delivery.attempts += 1
+        delivery.last_error = public_error(exc)
+        ReportSettings.objects.filter(client_id=delivery.client_id).update(
+            last_error=delivery.last_error, updated_at=timezone.now()
+        )
+        if delivery.attempts < settings.REPORTS_DAILY_PDF_MAX_ATTEMPTS and self.request.retries < self.max_retries:
+            delivery.status = Status.PENDING
+            delivery.save(update_fields=["status", "attempts", "last_error", "updated_at"])
+            raise self.retry(countdown=60 * 2 ** (delivery.attempts - 1))
+        status = Status.FAILED
+    finally:
+        daily_delivery.release_slot(slot)
+
+    delivery.status = status
+    delivery.save(update_fields=["status", "attempts", "last_error", "updated_at"])
+    daily_delivery.finish_run(delivery.run_id)
+    return status
+
+
+def _deliver(delivery) -> str:
+    settings_obj = ReportSettings.objects.filter(client_id=delivery.client_id).first()
+    if settings_obj is None or not settings_obj.daily_pdf_enabled:
+        return Status.SKIPPED
+    if settings_obj.last_sent_at and settings_obj.last_sent_at.astimezone(MSK).date() == delivery.run.run_date:
+        return Status.SKIPPED
+
+    client = delivery.client
+    pdf_bytes, filename = build_pdf_for_client(client=client, user=getattr(client, "owner", None))
+    send_pdf_to_client_telegram(client=client, filename=filename, pdf_bytes=pdf_bytes)
+
+    settings_obj.last_sent_at = timezone.now()
+    settings_obj.last_error = ""
+    settings_obj.save(update_fields=["last_sent_at", "last_error", "updated_at"])
+    return Status.SENT
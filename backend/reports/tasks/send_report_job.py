@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from reports.services.report_jobs import run_report_job
+
+
+@shared_task(acks_late=True)
+def send_report_job_task(job_id: int) -> str:
+    return run_report_job(job_id)
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from reports.services.pdf_store import sweep
+
+
+@shared_task
+def sweep_report_store_task() -> dict:
+    return sweep()
@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from clients.models import Client
+from reports.models import DailyPdfDelivery, DailyPdfRun, ReportSettings
+from reports.services import daily_delivery
+from reports.services.telegram_sender import TelegramSendError
+from reports.tasks.send_daily_pdf import MSK, send_client_daily_pdf_task, send_daily_pdf_task
+
+Status = DailyPdfDelivery.Status
+
+
+class FakeRedis:
+    """The sorted-set commands behind the delivery slots."""
+
+    def __init__(self):
+        self.members = {}
+
+    def pipeline(self, transaction=True):
+        self.results = []
+        return self
+
+    def zremrangebyscore(self, key, low, high):
+        for member, score in list(self.members.items()):
+            if score <= high:
+                del self.members[member]
+        self.results.append(None)
+
+    def zadd(self, key, mapping):
+        self.members.update(mapping)
+        self.results.append(None)
+
+    def zrank(self, key, member):
+        ranked = sorted(self.members, key=lambda item: (self.members[item], item))
+        self.results.append(ranked.index(member))
+
+    def expire(self, key, seconds):
+        self.results.append(None)
+
+    def execute(self):
+        return self.results
+
+    def zrem(self, key, member):
+        self.members.pop(member, None)
+
+
+@override_settings(REPORTS_DAILY_PDF_CONCURRENCY=0, REPORTS_DAILY_PDF_MAX_ATTEMPTS=2, REPORTS_DAILY_PDF_JITTER_SECONDS=600)
+class DailyPdfDeliveryTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.clients = [
+            Client.objects.create(
+                owner=user_model.objects.create_user(
+                    username=f"owner{idx}", email=f"owner{idx}@example.com", password="pass12345"
+                ),
+                name=f"Client {idx}",
+            )
+            for idx in range(3)
+        ]
+        for client in self.clients[:2]:
+            ReportSettings.objects.create(client=client, daily_pdf_enabled=True)
+        ReportSettings.objects.create(client=self.clients[2], daily_pdf_enabled=False)
+        self.now_msk = datetime.combine(timezone.localdate(), datetime.min.time(), tzinfo=MSK).replace(hour=20, minute=1)
+        self._patch("reports.tasks.send_daily_pdf._now_msk", return_value=self.now_msk)
+        self.build = self._patch("reports.tasks.send_daily_pdf.build_pdf_for_client", return_value=(b"%PDF", "report.pdf"))
+        self.send = self._patch("reports.tasks.send_daily_pdf.send_pdf_to_client_telegram")
+
+    def _patch(self, target, **kwargs):
+        patcher = patch(target, **kwargs)
+        mocked = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mocked
+
+    def _dispatch(self):
+        with patch.object(send_client_daily_pdf_task, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatched = send_daily_pdf_task()
+        return dispatched, [call.args[0][0] for call in apply_async.call_args_list], apply_async
+
+    def test_dispatch_enqueues_one_task_per_enabled_client_once(self):
+        dispatched, delivery_ids, apply_async = self._dispatch()
+
+        self.assertEqual(dispatched, 2)
+        deliveries = DailyPdfDelivery.objects.filter(id__in=delivery_ids)
+        self.assertEqual({delivery.client_id for delivery in deliveries}, {client.id for client in self.clients[:2]})
+        for call in apply_async.call_args_list:
+            self.assertLessEqual(0, call.kwargs["countdown"])
+            self.assertLessEqual(call.kwargs["countdown"], 600)
+        self.assertEqual(self._dispatch()[0], 0)
+        self.assertEqual(DailyPdfRun.objects.count(), 1)
+
+    def test_later_tick_re_enqueues_stranded_deliveries(self):
+        _, delivery_ids, _ = self._dispatch()
+        stranded = delivery_ids[0]
+        DailyPdfDelivery.objects.filter(id=stranded).update(updated_at=timezone.now() - timedelta(minutes=20))
+
+        dispatched, resumed_ids, apply_async = self._dispatch()
+
+        self.assertEqual((dispatched, resumed_ids), (1, [stranded]))
+        self.assertEqual(apply_async.call_args.kwargs["countdown"], 0)
+        self.assertEqual(DailyPdfDelivery.objects.count(), 2)
+
+    def test_dispatch_enqueues_nothing_if_it_fails_before_commit(self):
+        with patch.object(send_client_daily_pdf_task, "apply_async") as apply_async, patch.object(
+            DailyPdfRun.objects, "filter", side_effect=RuntimeError("db went away")
+        ):
+            with self.assertRaises(RuntimeError), self.captureOnCommitCallbacks(execute=True):
+                send_daily_pdf_task()
+
+        apply_async.assert_not_called()
+        self.assertFalse(DailyPdfRun.objects.exists())
+
+    def test_run_summary_is_written_by_the_last_delivery(self):
+        ReportSettings.objects.filter(client=self.clients[1]).update(last_sent_at=timezone.now())
+        _, delivery_ids, _ = self._dispatch()
+
+        results = [send_client_daily_pdf_task.apply(args=(delivery_id,)).get() for delivery_id in delivery_ids]
+
+        self.assertEqual(sorted(results), [Status.SENT, Status.SKIPPED])
+        run = DailyPdfRun.objects.get()
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual((run.total, run.sent, run.skipped, run.failed), (2, 1, 1, 0))
+        self.send.assert_called_once()
+
+    def test_duplicate_task_does_not_send_twice(self):
+        _, delivery_ids, _ = self._dispatch()
+
+        send_client_daily_pdf_task.apply(args=(delivery_ids[0],)).get()
+        result = send_client_daily_pdf_task.apply(args=(delivery_ids[0],)).get()
+
+        self.assertEqual(result, "duplicate")
+        self.send.assert_called_once()
+        self.assertIsNone(DailyPdfRun.objects.get().finished_at)
+
+    def test_failed_delivery_is_retried_then_recorded(self):
+        self.send.side_effect = TelegramSendError("telegram is down")
+        _, delivery_ids, _ = self._dispatch()
+
+        for delivery_id in delivery_ids:
+            send_client_daily_pdf_task.apply(args=(delivery_id,))
+
+        self.assertEqual(self.send.call_count, 4)
+        delivery = DailyPdfDelivery.objects.get(id=delivery_ids[0])
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_error), (Status.FAILED, 2, "telegram is down"))
+        run = DailyPdfRun.objects.get()
+        self.assertEqual((run.sent, run.failed), (0, 2))
+        self.assertEqual(ReportSettings.objects.get(client=self.clients[0]).last_error, "telegram is down")
+
+    def test_redelivered_message_resumes_its_own_claim(self):
+        _, delivery_ids, _ = self._dispatch()
+        DailyPdfDelivery.objects.filter(id=delivery_ids[0]).update(status=Status.SENDING, task_id="crashed-task")
+
+        other = send_client_daily_pdf_task.apply(args=(delivery_ids[0],), task_id="another-task").get()
+        redelivered = send_client_daily_pdf_task.apply(args=(delivery_ids[0],), task_id="crashed-task").get()
+
+        self.assertEqual((other, redelivered), ("duplicate", Status.SENT))
+        self.send.assert_called_once()
+
+    def test_delivery_fails_when_no_slot_frees_up(self):
+        _, delivery_ids, _ = self._dispatch()
+
+        with patch("reports.tasks.send_daily_pdf.daily_delivery.acquire_slot", return_value=None):
+            send_client_daily_pdf_task.apply(args=(delivery_ids[0],))
+
+        delivery = DailyPdfDelivery.objects.get(id=delivery_ids[0])
+        self.assertEqual((delivery.status, delivery.last_error), (Status.FAILED, "No delivery slot became free"))
+        self.send.assert_not_called()
+
+    def test_outside_the_delivery_hour_nothing_happens(self):
+        with patch("reports.tasks.send_daily_pdf._now_msk", return_value=self.now_msk - timedelta(hours=1)):
+            self.assertEqual(send_daily_pdf_task(), 0)
+
+        self.assertFalse(DailyPdfRun.objects.exists())
+
+    @override_settings(REPORTS_DAILY_PDF_CONCURRENCY=2)
+    def test_slots_limit_concurrent_deliveries(self):
+        with patch("reports.services.daily_delivery.get_redis", return_value=FakeRedis()):
+            first = daily_delivery.acquire_slot()
+            second = daily_delivery.acquire_slot()
+            self.assertIsNone(daily_delivery.acquire_slot())
+
+            daily_delivery.release_slot(first)
+
+            self.assertIsNotNone(daily_delivery.acquire_slot())
+        self.assertIsNotNone(second)
@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+from reportlab.platypus import Paragraph
+
+from reports.management.commands.benchmark_pdf import synthetic_report
+from reports.services.pdf_generator import _styles, _table_style, _to_cell, register_fonts, render_report_pdf
+
+
+class PdfRenderingTests(SimpleTestCase):
+    def setUp(self):
+        register_fonts()
+
+    def test_styles_are_built_once(self):
+        self.assertIs(_styles(), _styles())
+        self.assertIs(_table_style(frozenset({1, 2})), _table_style(frozenset({2, 1})))
+
+    def test_short_cells_stay_plain_strings(self):
+        self.assertEqual(_to_cell(1234, 60, numeric=True), "1234")
+        self.assertEqual(_to_cell(None, 100), "-")
+        self.assertIsInstance(_to_cell("/catalog/" + "very-long-section/" * 10, 100), Paragraph)
+        self.assertIsInstance(_to_cell("first line\nsecond line", 300), Paragraph)
+
+    def test_large_report_renders(self):
+        pdf_bytes = render_report_pdf(
+            synthetic_report(300),
+            client_name="Test Client",
+            owner_email="owner@example.com",
+            generated_at=timezone.localtime(timezone.now()),
+        )
+
+        self.assertTrue(pdf_bytes.startswith(b"%PDF"))
+
+    def test_benchmark_reports_each_size(self):
+        stdout = StringIO()
+
+        call_command("benchmark_pdf", rows=[5, 20], repeat=1, stdout=stdout)
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual([line.split(":")[0] for line in lines], ["rows=5", "rows=20"])
+        self.assertIn("peak=", lines[0])
@@ -0,0 +1,159 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from clients.models import Client
+from reports.services import pdf_store
+from reports.views import ReportDownloadView, pdf_file_response
+
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+class PdfStoreTests(TestCase):
+    def setUp(self):
+        storage = tempfile.TemporaryDirectory()
+        self.addCleanup(storage.cleanup)
+        storage_settings = override_settings(REPORTS_STORAGE_DIR=storage.name)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.root = storage.name
+
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.render = self._patch("reports.services.pdf_store.render_pdf_for_client", return_value=PDF)
+        self.version = self._patch("core.data_version.current", return_value=1)
+
+    def _patch(self, target, **kwargs):
+        patcher = patch(target, **kwargs)
+        mocked = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mocked
+
+    def _stored(self):
+        return pdf_store.stored_pdf_for_client(client=self.client_obj, user=self.user)
+
+    def test_same_inputs_reuse_the_stored_file(self):
+        path, filename, etag = self._stored()
+
+        self.assertEqual(self._stored(), (path, filename, etag))
+        self.render.assert_called_once()
+        self.assertEqual(path.read_bytes(), PDF)
+        self.assertEqual(path.name, f"{etag}.pdf")
+        self.assertEqual(os.listdir(path.parent), [path.name])
+
+    def test_new_data_renders_a_new_file(self):
+        first, _, _ = self._stored()
+        self.version.return_value = 2
+
+        second, _, _ = self._stored()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_unknown_data_version_is_rendered_without_storing(self):
+        self.version.return_value = None
+
+        self.assertIsNone(self._stored())
+        pdf_bytes, _ = pdf_store.build_pdf_for_client(client=self.client_obj, user=self.user)
+
+        self.assertEqual(pdf_bytes, PDF)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_download_renders_again_when_the_file_was_swept(self):
+        path, _, _ = self._stored()
+        request = RequestFactory().get("/api/reports/pdf/")
+        request.client = self.client_obj
+        request.user = self.user
+        real_open = open
+        swept = []
+
+        def sweep_then_open(file, *args, **kwargs):
+            if not swept:
+                swept.append(file)
+                path.unlink()
+            return real_open(file, *args, **kwargs)
+
+        with patch("reports.views.open", side_effect=sweep_then_open, create=True):
+            response = ReportDownloadView().get(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF)
+        self.assertEqual(self.render.call_count, 2)
+
+    def test_sweep_removes_least_recently_used_files(self):
+        paths = []
+        for version in range(3):
+            self.version.return_value = version
+            path, _, _ = self._stored()
+            os.utime(path, (1000 + version, 1000 + version))
+            paths.append(path)
+        os.utime(paths[0])
+        temp = paths[0].parent / f"partial{pdf_store.TEMP_SUFFIX}"
+        temp.write_bytes(b"%PDF")
+        os.utime(temp, (0, 0))
+
+        result = pdf_store.sweep(max_bytes=len(PDF) * 2)
+
+        self.assertEqual(result, {"removed": 2, "freed": len(PDF) + 4, "bytes": len(PDF) * 2})
+        self.assertEqual([path.exists() for path in paths], [True, False, True])
+        self.assertFalse(temp.exists())
+
+
+class PdfFileResponseTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        os.write(handle, PDF)
+        os.close(handle)
+        self.addCleanup(os.unlink, self.path)
+        self.factory = RequestFactory()
+
+    def _get(self, **headers):
+        request = self.factory.get("/api/reports/pdf/", headers=headers)
+        return pdf_file_response(request, self.path, filename="report.pdf", etag="abc")
+
+    def test_full_download(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF)
+        self.assertEqual(response["ETag"], '"abc"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    def test_matching_etag_is_not_modified(self):
+        self.assertEqual(self._get(if_none_match='"abc"').status_code, 304)
+
+    def test_range_returns_the_requested_bytes(self):
+        response = self._get(range="bytes=10-19")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), PDF[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(PDF)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+    def test_suffix_range(self):
+        response = self._get(range="bytes=-5")
+
+        self.assertEqual(b"".join(response.streaming_content), PDF[-5:])
+
+    def test_unsatisfiable_range(self):
+        response = self._get(range=f"bytes={len(PDF)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(PDF)}")
+
+    def test_invalid_range_is_ignored(self):
+        response = self._get(range="bytes=5-3")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF)
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self._get(range="bytes=0-9", if_range='"old"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PDF)
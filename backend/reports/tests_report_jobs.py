@@ -0,0 +1,136 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+import requests
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from clients.models import Client
+from reports.models import ReportJob, ReportSettings
+from reports.serializers import ReportJobSerializer
+from reports.services.report_jobs import GENERIC_ERROR, MANUAL_SEND_COOLDOWN, enqueue_report_job, run_report_job
+from reports.services import telegram_sender
+from reports.services.telegram_sender import TelegramSendError
+
+Status = ReportJob.Status
+
+
+class ReportJobTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.build = self._patch("reports.services.report_jobs.build_pdf_for_client", return_value=(b"%PDF", "report.pdf"))
+        self.send = self._patch("reports.services.report_jobs.send_pdf_to_client_telegram")
+        self.delay = self._patch("reports.tasks.send_report_job.send_report_job_task.delay")
+
+    def _patch(self, target, **kwargs):
+        patcher = patch(target, **kwargs)
+        mocked = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mocked
+
+    def _enqueue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return enqueue_report_job(self.client_obj, self.user)
+
+    def test_enqueue_returns_a_queued_job_and_schedules_it(self):
+        job, available_at = self._enqueue()
+
+        self.assertIsNone(available_at)
+        self.assertEqual(job.status, Status.QUEUED)
+        self.delay.assert_called_once_with(job.id)
+        self.build.assert_not_called()
+        self.assertEqual(ReportSettings.objects.get(client=self.client_obj).last_manual_sent_at, job.queued_at)
+
+    def test_cooldown_lets_one_request_through(self):
+        job, _ = self._enqueue()
+
+        second, available_at = self._enqueue()
+
+        self.assertIsNone(second)
+        self.assertEqual(available_at, job.queued_at + MANUAL_SEND_COOLDOWN)
+        self.assertEqual(ReportJob.objects.count(), 1)
+        self.delay.assert_called_once()
+
+    def test_cooldown_expires(self):
+        ReportSettings.objects.create(client=self.client_obj, last_manual_sent_at=timezone.now() - timedelta(minutes=11))
+
+        job, _ = self._enqueue()
+
+        self.assertIsNotNone(job)
+
+    def test_job_runs_through_every_step_once(self):
+        job, _ = self._enqueue()
+
+        self.assertEqual(run_report_job(job.id), Status.DONE)
+        self.assertEqual(run_report_job(job.id), "")
+
+        job.refresh_from_db()
+        self.send.assert_called_once_with(client=self.client_obj, filename="report.pdf", pdf_bytes=b"%PDF")
+        data = ReportJobSerializer(job).data
+        self.assertEqual(data["status"], Status.DONE)
+        self.assertTrue(all(value is not None and value >= 0 for value in data["timings"].values()))
+        self.assertIsNotNone(ReportSettings.objects.get(client=self.client_obj).last_sent_at)
+
+    def test_job_stranded_by_a_crashed_worker_is_taken_over(self):
+        job, _ = self._enqueue()
+        ReportJob.objects.filter(id=job.id).update(status=Status.SENDING, started_at=timezone.now())
+
+        self.assertEqual(run_report_job(job.id), "")
+
+        ReportJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(run_report_job(job.id), Status.DONE)
+        self.send.assert_called_once()
+
+    def test_failed_job_records_the_error_and_releases_the_cooldown(self):
+        self.send.side_effect = TelegramSendError("telegram is down")
+        job, _ = self._enqueue()
+
+        self.assertEqual(run_report_job(job.id), Status.FAILED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.error, "telegram is down")
+        self.assertIsNotNone(job.rendered_at)
+        report_settings = ReportSettings.objects.get(client=self.client_obj)
+        self.assertIsNone(report_settings.last_manual_sent_at)
+        self.assertEqual(report_settings.last_error, "telegram is down")
+        self.assertIsNotNone(self._enqueue()[0])
+
+    def test_unexpected_failure_is_reported_with_a_fixed_message(self):
+        self.build.side_effect = ValueError("relation analytics_app_dailystats does not exist")
+        job, _ = self._enqueue()
+
+        run_report_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.error, GENERIC_ERROR)
+
+    @override_settings(TELEGRAM_BOT_TOKEN="123456:SECRET-bot-token")
+    def test_bot_token_never_reaches_the_status_response(self):
+        self.client_obj.telegram_chat_id = "-100"
+        self.client_obj.save(update_fields=["telegram_chat_id"])
+        self.send.side_effect = telegram_sender.send_pdf_to_client_telegram
+        rejected = requests.Response()
+        rejected.status_code = 400
+        rejected.reason = "Bad Request"
+        rejected.url = "https://api.telegram.org/bot123456:SECRET-bot-token/sendDocument"
+        rejected._content = b'{"ok": false, "error_code": 400, "description": "Bad Request: chat not found"}'
+        unreachable = requests.ConnectionError(f"Max retries exceeded with url: {rejected.url}")
+
+        for outcome in (rejected, unreachable):
+            with patch.object(telegram_sender.requests, "post", side_effect=[outcome]):
+                ReportSettings.objects.filter(client=self.client_obj).update(last_manual_sent_at=None)
+                job, _ = self._enqueue()
+                run_report_job(job.id)
+
+            job.refresh_from_db()
+            data = json.dumps(ReportJobSerializer(job).data, default=str)
+            self.assertEqual(job.status, Status.FAILED)
+            self.assertNotIn("SECRET", data)
+            self.assertNotIn("SECRET", ReportSettings.objects.get(client=self.client_obj).last_error)
+        self.assertEqual(
+            ReportJob.objects.order_by("id").first().error, "Telegram API error 400: Bad Request: chat not found"
+        )
@@ -1,8 +1,10 @@
 from django.urls import path
 
-from reports.views import ReportSendNowView, ReportToggleDailyView
+from reports.views import ReportDownloadView, ReportJobStatusView, ReportSendNowView, ReportToggleDailyView
 
 urlpatterns = [
     path("send-now/", ReportSendNowView.as_view(), name="report_send_now"),
+    path("jobs/<int:job_id>/", ReportJobStatusView.as_view(), name="report_job_status"),
+    path("pdf/", ReportDownloadView.as_view(), name="report_download"),
     path("toggle-daily/", ReportToggleDailyView.as_view(), name="report_toggle_daily"),
 ]
@@ -1,29 +1,35 @@
-from datetime import timedelta
+import logging
+import os
+import re
 
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.http import content_disposition_header
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.permissions import IsClientUser
-from reports.models import ReportSettings
-from reports.serializers import DailyToggleSerializer
-from reports.services.pdf_generator import build_pdf_for_client
-from reports.services.telegram_sender import send_pdf_to_client_telegram
+from analytics_app.exceptions import ReportUnavailable
+from analytics_app.services.report_builder import ReportSectionTimeout
+from reports.models import ReportJob, ReportSettings
+from reports.serializers import DailyToggleSerializer, ReportJobSerializer
+from reports.services.pdf_generator import report_filename
+from reports.services.pdf_store import render_unstored_pdf, stored_pdf_for_client
+from reports.services.report_jobs import enqueue_report_job
 from subscriptions.permissions import HasActiveSubscription
 
+logger = logging.getLogger(__name__)
+
 
 class ReportSendNowView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
 
     def post(self, request):
-        client = request.client
-        settings_obj, _ = ReportSettings.objects.get_or_create(client=client)
-
-        now = timezone.now()
-        cooldown = timedelta(minutes=10)
-        if settings_obj.last_manual_sent_at and now < settings_obj.last_manual_sent_at + cooldown:
-            available_at = timezone.localtime(settings_obj.last_manual_sent_at + cooldown).strftime("%d.%m.%Y %H:%M")
+        job, available_at = enqueue_report_job(request.client, request.user)
+        if job is None:
+            available_at = timezone.localtime(available_at).strftime("%d.%m.%Y %H:%M")
             return Response(
                 {
                     "ok": False,
@@ -32,14 +38,112 @@ class ReportSendNowView(APIView):
                 status=status.HTTP_429_TOO_MANY_REQUESTS,
             )
 
-        pdf_bytes, filename = build_pdf_for_client(client=client, user=request.user)
-        send_pdf_to_client_telegram(client=client, filename=filename, pdf_bytes=pdf_bytes)
+        return Response(
+            {"ok": True, "detail": "PDF отчет поставлен в очередь.", **ReportJobSerializer(job).data},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ReportJobStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(ReportJob, id=job_id, client=request.client)
+        return Response(ReportJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def _byte_range(header, size):
+    """``(start, end)`` of a single-range Range header, None to send everything, or False if unsatisfiable.
+
+    An invalid range (``bytes=5-3``) is ignored, as RFC 9110 asks, rather than unsatisfiable.
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size or end < 0:
+        return False
+    return start, end
 
-        settings_obj.last_manual_sent_at = now
-        settings_obj.last_sent_at = now
-        settings_obj.last_error = ""
-        settings_obj.save(update_fields=["last_manual_sent_at", "last_sent_at", "last_error", "updated_at"])
-        return Response({"ok": True, "detail": "PDF отправлен в Telegram."}, status=status.HTTP_200_OK)
+
+def _read_range(file, length):
+    with file:
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def pdf_file_response(request, path, *, filename, etag):
+    """Stream a stored PDF, answering If-None-Match with 304 and a single Range with 206."""
+    quoted_etag = f'"{etag}"'
+    if quoted_etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]:
+        response = HttpResponseNotModified()
+        response["ETag"] = quoted_etag
+        return response
+
+    file = open(path, "rb")
+    size = os.fstat(file.fileno()).st_size
+    byte_range = _byte_range(request.headers.get("Range"), size)
+    if request.headers.get("If-Range", quoted_etag) != quoted_etag:
+        byte_range = None
+
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type="application/pdf")
+    elif byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = StreamingHttpResponse(_read_range(file, end - start + 1), status=206, content_type="application/pdf")
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["ETag"] = quoted_etag
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+class ReportDownloadView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsClientUser, HasActiveSubscription]
+
+    def get(self, request):
+        # A second lookup renders the file again if the sweeper removed it before it was opened.
+        for _ in range(2):
+            try:
+                stored = stored_pdf_for_client(client=request.client, user=request.user)
+                if stored is None:
+                    pdf_bytes = render_unstored_pdf(client=request.client, user=request.user)
+                    response = HttpResponse(pdf_bytes, content_type="application/pdf")
+                    response["Content-Disposition"] = content_disposition_header(True, report_filename(request.client))
+                    return response
+            except ReportSectionTimeout as exc:
+                logger.warning("reports.download timed out client_id=%s: %s", request.client.id, exc)
+                raise ReportUnavailable() from exc
+            path, filename, etag = stored
+            try:
+                return pdf_file_response(request, path, filename=filename, etag=etag)
+            except FileNotFoundError:
+                logger.info("reports.download file swept before it was opened client_id=%s", request.client.id)
+        return Response(
+            {"ok": False, "detail": "PDF отчет временно недоступен. Попробуйте позже."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
 
 
 class ReportToggleDailyView(APIView):
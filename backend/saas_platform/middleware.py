@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import HttpResponse
 
 
@@ -8,15 +9,35 @@ class TrackerCorsMiddleware:
     ALLOW_METHODS = "GET, POST, OPTIONS"
     ALLOW_HEADERS = "Content-Type, Authorization, X-Requested-With"
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if request.path.startswith(self.TRACK_PREFIX) and request.method == "OPTIONS":
+        if self.is_async:
+            return self.__acall__(request)
+        if self.is_preflight(request):
             response = HttpResponse(status=200)
         else:
             response = self.get_response(request)
+        return self.add_headers(request, response)
+
+    async def __acall__(self, request):
+        if self.is_preflight(request):
+            response = HttpResponse(status=200)
+        else:
+            response = await self.get_response(request)
+        return self.add_headers(request, response)
+
+    def is_preflight(self, request):
+        return request.path.startswith(self.TRACK_PREFIX) and request.method == "OPTIONS"
 
+    def add_headers(self, request, response):
         if request.path.startswith(self.TRACK_PREFIX):
             response["Access-Control-Allow-Origin"] = "*"
             response["Access-Control-Allow-Methods"] = self.ALLOW_METHODS
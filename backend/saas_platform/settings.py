@@ -106,10 +106,13 @@ DATABASES = {
 
 # ================= REDIS =================
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/1")
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": os.getenv("REDIS_URL", "redis://redis:6379/1"),
+        "LOCATION": REDIS_URL,
     }
 }
 
@@ -221,10 +224,17 @@ if YOOKASSA_SECRET_KEY.startswith("live_"):
     if "localhost" in PAYMENT_RETURN_URL or ":9000" in PAYMENT_RETURN_URL:
         raise ImproperlyConfigured("PAYMENT_RETURN_URL cannot contain localhost or :9000 in production.")
 
+# Token -> Client/Site resolution cache (core.tenant_cache). The local TTL bounds
+# how long another process can serve a tenant after it was changed or disabled.
+TENANT_CACHE_TTL = int(os.getenv("TENANT_CACHE_TTL", "300"))
+TENANT_CACHE_LOCAL_TTL = int(os.getenv("TENANT_CACHE_LOCAL_TTL", "30"))
+TENANT_CACHE_NEGATIVE_TTL = int(os.getenv("TENANT_CACHE_NEGATIVE_TTL", "30"))
+TENANT_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("TENANT_CACHE_LOCAL_MAX_ENTRIES", "10000"))
+
 # ================= CELERY =================
 
-CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://redis:6379/1")
-CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://redis:6379/1")
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
@@ -232,12 +242,29 @@ CELERY_TIMEZONE = "Europe/Moscow"
 CELERY_BEAT_SCHEDULE = {
     "send_daily_pdf_at_20_msk": {
         "task": "reports.tasks.send_daily_pdf.send_daily_pdf_task",
-        "schedule": crontab(hour=20, minute=0),
+        # The later ticks re-enqueue deliveries stranded by a crash; see daily_delivery.stranded.
+        "schedule": crontab(hour=20, minute="0,20,40"),
     },
     "notify_auto_renew_subscriptions_daily": {
         "task": "subscriptions.tasks.notify_auto_renew_subscriptions_task",
         "schedule": crontab(hour=12, minute=0),
     },
+    "create_hit_partitions_daily": {
+        "task": "tracker.tasks.create_partitions_task",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "prune_raw_tracking_data_daily": {
+        "task": "tracker.tasks.prune_raw_data_task",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    "build_daily_rollups_hourly": {
+        "task": "analytics_app.tasks.build_daily_rollups_task",
+        "schedule": crontab(minute=10),
+    },
+    "sweep_report_store_hourly": {
+        "task": "reports.tasks.sweep_report_store.sweep_report_store_task",
+        "schedule": crontab(minute=40),
+    },
 }
 
 # ================= EMAIL =================
@@ -250,9 +277,102 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "TrackNode <noreply@tracknode.local>")
 
+# ================= TRACKER =================
+
+TRACK_BATCH_MAX_RECORDS = int(os.getenv("TRACK_BATCH_MAX_RECORDS", "100"))
+
+# "sync" writes tracker hits to Postgres inside the request, "stream" appends
+# them to a Redis stream drained by `manage.py run_tracker_ingest`.
+TRACK_INGEST_MODE = os.getenv("TRACK_INGEST_MODE", "sync").lower()
+TRACK_INGEST_STREAM = os.getenv("TRACK_INGEST_STREAM", "tracker:ingest")
+TRACK_INGEST_DEAD_LETTER_STREAM = os.getenv("TRACK_INGEST_DEAD_LETTER_STREAM", "tracker:ingest:dead")
+TRACK_INGEST_GROUP = os.getenv("TRACK_INGEST_GROUP", "tracker-ingest")
+TRACK_INGEST_STREAM_MAXLEN = int(os.getenv("TRACK_INGEST_STREAM_MAXLEN", "1000000"))
+TRACK_INGEST_CHUNK_SIZE = int(os.getenv("TRACK_INGEST_CHUNK_SIZE", "500"))
+TRACK_INGEST_BLOCK_MS = int(os.getenv("TRACK_INGEST_BLOCK_MS", "2000"))
+TRACK_INGEST_CLAIM_IDLE_MS = int(os.getenv("TRACK_INGEST_CLAIM_IDLE_MS", "60000"))
+TRACK_INGEST_MAX_DELIVERIES = int(os.getenv("TRACK_INGEST_MAX_DELIVERIES", "5"))
+
+# Per-session hints (visit id, latest pageview) in Redis hashes, see core.session_state.
+TRACK_SESSION_STATE_ENABLED = os.getenv("TRACK_SESSION_STATE_ENABLED", "true").lower() == "true"
+TRACK_SESSION_STATE_TTL = int(os.getenv("TRACK_SESSION_STATE_TTL", "1800"))
+TRACK_SESSION_STATE_RETRY_SECONDS = int(os.getenv("TRACK_SESSION_STATE_RETRY_SECONDS", "30"))
+
+# Parsed user agents: per-process LRU, optionally shared through the Redis cache.
+TRACK_UA_CACHE_SIZE = int(os.getenv("TRACK_UA_CACHE_SIZE", "4096"))
+TRACK_UA_SHARED_CACHE = os.getenv("TRACK_UA_SHARED_CACHE", "false").lower() == "true"
+TRACK_UA_SHARED_CACHE_TTL = int(os.getenv("TRACK_UA_SHARED_CACHE_TTL", "86400"))
+
+# Views behind /api/track/*, /api/public/event/ and /api/analytics/event/:
+# "drf" (APIView classes), "lean" (plain Django views with precompiled
+# validation) or "async" (lean views as coroutines, for the ASGI profile in README).
+TRACK_API_VIEWS = os.getenv("TRACK_API_VIEWS", "drf").lower()
+
+# Monthly partitions of the hit tables (Postgres, see core.partitioning) are
+# created this many months ahead by `manage.py create_partitions` / beat.
+PARTITIONS_AHEAD_MONTHS = int(os.getenv("PARTITIONS_AHEAD_MONTHS", "3"))
+
+# Retention of raw hits (core.retention): SubscriptionPlan.retention_days
+# overrides RETENTION_RAW_DAYS per plan. Deletes run in pk-ordered chunks with a
+# pause, a lock timeout and a replica-lag check between them.
+RETENTION_RAW_DAYS = int(os.getenv("RETENTION_RAW_DAYS", "90"))
+RETENTION_TELEGRAM_LOG_DAYS = int(os.getenv("RETENTION_TELEGRAM_LOG_DAYS", "30"))
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "2000"))
+RETENTION_CHUNK_PAUSE = float(os.getenv("RETENTION_CHUNK_PAUSE", "0.2"))
+RETENTION_LOCK_TIMEOUT_MS = int(os.getenv("RETENTION_LOCK_TIMEOUT_MS", "2000"))
+RETENTION_MAX_REPLICATION_LAG = float(os.getenv("RETENTION_MAX_REPLICATION_LAG", "10"))
+RETENTION_MAX_SECONDS = int(os.getenv("RETENTION_MAX_SECONDS", "1800"))
+
+# Per-(client, day) rollups behind the dashboard (analytics_app.services.rollups).
+# The hourly job rebuilds the last ANALYTICS_ROLLUP_LOOKBACK_DAYS closed days.
+ANALYTICS_ROLLUPS_ENABLED = os.getenv("ANALYTICS_ROLLUPS_ENABLED", "true").lower() == "true"
+ANALYTICS_ROLLUP_LOOKBACK_DAYS = int(os.getenv("ANALYTICS_ROLLUP_LOOKBACK_DAYS", "2"))
+
+# Result cache for reports/metrics/devices (analytics_app.services.report_cache).
+# Periods that end within the rollup lookback are keyed by the client's data
+# version and kept ANALYTICS_CACHE_TTL seconds; older ones ANALYTICS_CACHE_SETTLED_TTL
+# seconds (0 = no expiry).
+ANALYTICS_CACHE_ENABLED = os.getenv("ANALYTICS_CACHE_ENABLED", "true").lower() == "true"
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+ANALYTICS_CACHE_SETTLED_TTL = int(os.getenv("ANALYTICS_CACHE_SETTLED_TTL", str(30 * 86400)))
+
+# Period unique visitors from per-day HyperLogLog sketches (analytics_app.services.uniques).
+# Periods of up to ANALYTICS_HLL_EXACT_MAX_DAYS days are still counted exactly.
+ANALYTICS_HLL_ENABLED = os.getenv("ANALYTICS_HLL_ENABLED", "true").lower() == "true"
+ANALYTICS_HLL_EXACT_MAX_DAYS = int(os.getenv("ANALYTICS_HLL_EXACT_MAX_DAYS", "7"))
+ANALYTICS_HLL_TTL_DAYS = int(os.getenv("ANALYTICS_HLL_TTL_DAYS", "3"))
+
+# Rows in the ranked report sections (top clicks, page conversion, engagement pages);
+# the paginated endpoints accept ?limit= up to ANALYTICS_PAGE_MAX_LIMIT.
+ANALYTICS_REPORT_TOP_K = int(os.getenv("ANALYTICS_REPORT_TOP_K", "50"))
+ANALYTICS_PAGE_MAX_LIMIT = int(os.getenv("ANALYTICS_PAGE_MAX_LIMIT", "200"))
+
+# Threads (each with its own DB connection) that compute the querying report
+# sections at once; 1 computes them one after another. The pool is per process
+# and shared by its reports, so Postgres sees up to web processes x
+# ANALYTICS_REPORT_WORKERS extra connections; each is reused for
+# ANALYTICS_REPORT_CONN_MAX_AGE seconds. A section running longer than
+# ANALYTICS_REPORT_SECTION_TIMEOUT seconds fails the report.
+ANALYTICS_REPORT_WORKERS = int(os.getenv("ANALYTICS_REPORT_WORKERS", "4"))
+ANALYTICS_REPORT_CONN_MAX_AGE = int(os.getenv("ANALYTICS_REPORT_CONN_MAX_AGE", "300"))
+ANALYTICS_REPORT_SECTION_TIMEOUT = float(os.getenv("ANALYTICS_REPORT_SECTION_TIMEOUT", "20"))
+
 # ================= REPORTS =================
 
-REPORTS_STORAGE_DIR = BASE_DIR / "reports_storage"
+# Rendered PDFs (reports.services.pdf_store); the hourly sweep deletes the least
+# recently used ones once the directory holds more than REPORTS_STORAGE_MAX_MB.
+REPORTS_STORAGE_DIR = Path(os.getenv("REPORTS_STORAGE_DIR", str(BASE_DIR / "reports_storage")))
+REPORTS_STORAGE_MAX_MB = int(os.getenv("REPORTS_STORAGE_MAX_MB", "512"))
+
+# The 20:00 MSK daily PDF run (reports.services.daily_delivery) enqueues one task
+# per client at a random delay within REPORTS_DAILY_PDF_JITTER_SECONDS. At most
+# REPORTS_DAILY_PDF_CONCURRENCY render/upload at once across workers (0 = no limit);
+# a failed delivery is retried with backoff up to REPORTS_DAILY_PDF_MAX_ATTEMPTS times.
+REPORTS_DAILY_PDF_JITTER_SECONDS = int(os.getenv("REPORTS_DAILY_PDF_JITTER_SECONDS", "600"))
+REPORTS_DAILY_PDF_CONCURRENCY = int(os.getenv("REPORTS_DAILY_PDF_CONCURRENCY", "4"))
+REPORTS_DAILY_PDF_MAX_ATTEMPTS = int(os.getenv("REPORTS_DAILY_PDF_MAX_ATTEMPTS", "3"))
+REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS = int(os.getenv("REPORTS_DAILY_PDF_SLOT_LEASE_SECONDS", "300"))
+REPORTS_DAILY_PDF_SLOT_WAIT_SECONDS = int(os.getenv("REPORTS_DAILY_PDF_SLOT_WAIT_SECONDS", "15"))
 
 # ================= LOGGING =================
 
@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from accounts.views import ChangePasswordView, LoginView, LogoutView, RegisterView
+from analytics_app import async_views as analytics_async_views
+from analytics_app import lean_views as analytics_lean_views
 from analytics_app.views import (
+    AnalyticsClicksView,
     AnalyticsDevicesView,
     AnalyticsEngagementView,
     AnalyticsOverviewView,
+    AnalyticsPagesView,
     AnalyticsSummaryView,
     AnalyticsUniqueDailyView,
     PublicAnalyticsEventCreateView,
@@ -18,6 +23,20 @@ from rest_framework.routers import DefaultRouter
 from subscriptions.views import YooKassaWebhookView
 from telegram_logs.views import TelegramWebhookView
 
+# Implementation of the public event endpoints for every TRACK_API_VIEWS setting.
+EVENT_VIEWS = {
+    "drf": (PublicEventCreateView, PublicAnalyticsEventCreateView),
+    "lean": (
+        analytics_lean_views.LeanPublicEventCreateView,
+        analytics_lean_views.LeanPublicAnalyticsEventCreateView,
+    ),
+    "async": (
+        analytics_async_views.AsyncPublicEventCreateView,
+        analytics_async_views.AsyncPublicAnalyticsEventCreateView,
+    ),
+}
+public_event_view, analytics_event_view = EVENT_VIEWS.get(settings.TRACK_API_VIEWS, EVENT_VIEWS["drf"])
+
 router = DefaultRouter()
 router.register("leads", LeadViewSet, basename="lead")
 
@@ -35,14 +54,16 @@ urlpatterns = [
     path("api/auth/change-password/", ChangePasswordView.as_view(), name="change_password"),
     path("api/auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/public/lead/", PublicLeadCreateView.as_view(), name="public_lead"),
-    path("api/public/event/", PublicEventCreateView.as_view(), name="public_event"),
-    path("api/analytics/event/", PublicAnalyticsEventCreateView.as_view(), name="analytics_event"),
+    path("api/public/event/", public_event_view.as_view(), name="public_event"),
+    path("api/analytics/event/", analytics_event_view.as_view(), name="analytics_event"),
     path("api/public/telegram/webhook/", TelegramWebhookView.as_view(), name="telegram_webhook"),
     path("api/subscriptions/yookassa/webhook/", YooKassaWebhookView.as_view(), name="yookassa_webhook_subscriptions"),
     path("api/payments/yookassa/webhook/", YooKassaWebhookView.as_view(), name="yookassa_webhook"),
     path("api/analytics/overview/", AnalyticsOverviewView.as_view(), name="analytics_overview"),
     path("api/analytics/engagement/", AnalyticsEngagementView.as_view(), name="analytics_engagement"),
     path("api/analytics/devices/", AnalyticsDevicesView.as_view(), name="analytics_devices"),
+    path("api/analytics/clicks/", AnalyticsClicksView.as_view(), name="analytics_clicks"),
+    path("api/analytics/pages/", AnalyticsPagesView.as_view(), name="analytics_pages"),
     path("api/analytics/unique-daily/", AnalyticsUniqueDailyView.as_view(), name="analytics_unique_daily"),
     path("api/analytics/summary/", AnalyticsSummaryView.as_view(), name="analytics_summary"),
     path("api/reports/", include("reports.urls")),
@@ -10,7 +10,7 @@ from subscriptions.models import Subscription, SubscriptionPayment, Subscription
 
 @admin.register(SubscriptionPlan)
 class SubscriptionPlanAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "price", "currency", "duration_days", "is_active", "updated_at")
+    list_display = ("id", "name", "price", "currency", "duration_days", "retention_days", "is_active", "updated_at")
     list_filter = ("is_active", "currency")
     search_fields = ("name",)
 
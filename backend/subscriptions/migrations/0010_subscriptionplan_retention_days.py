@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("subscriptions", "0009_fix_russian_verbose_names"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscriptionplan",
+            name="retention_days",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
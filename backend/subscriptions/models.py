@@ -8,6 +8,8 @@ class SubscriptionPlan(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default="RUB")
     duration_days = models.PositiveIntegerField()
+    # Days raw tracking rows are kept for clients on this plan; empty means RETENTION_RAW_DAYS.
+    retention_days = models.PositiveIntegerField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,67 @@
+"""Async versions of the /api/track/ write endpoints (TRACK_API_VIEWS=async).
+
+Parsing, validation and the token lookup happen on the event loop (the
+token usually resolves from the in-process tenant cache). In stream ingest
+mode the hit is XADDed with the asyncio Redis client and never touches a
+thread; in sync mode the storage handler runs through ``sync_to_async``.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from redis.exceptions import RedisError
+
+from core.lean_api import json_response
+from core.tenant_cache import site_cache
+from tracker import ingest_queue
+from tracker.lean_views import LeanTrackIngestView
+from tracker.services import site_by_token
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTrackIngestView(LeanTrackIngestView):
+    async def options(self, request, *args, **kwargs):
+        # TrackerCorsMiddleware answers preflights before they get here.
+        return super().options(request, *args, **kwargs)
+
+    async def post(self, request):
+        raw, data, response = self.validate(request)
+        if response is not None:
+            return response
+
+        token = data["token"]
+        found, site = site_cache.peek(token)
+        if not found:
+            site = await sync_to_async(site_by_token)(token)
+        if not site:
+            return self.invalid_token(token)
+
+        if ingest_queue.is_enabled():
+            records = self.queue_records(request, data, raw)
+            try:
+                await ingest_queue.aenqueue_records(records)
+            except RedisError:
+                logger.exception("track.%s failed to enqueue, storing synchronously path=%s", self.kind, request.path)
+            else:
+                return json_response({"ok": True, "queued": len(records)}, status=202)
+        return await sync_to_async(self.store)(request, site, data, raw)
+
+
+class AsyncVisitStartView(AsyncTrackIngestView):
+    kind = "visit_start"
+
+
+class AsyncPageViewCreateView(AsyncTrackIngestView):
+    kind = "pageview"
+
+
+class AsyncEventCreateView(AsyncTrackIngestView):
+    kind = "event"
+
+
+class AsyncTrackBatchView(AsyncTrackIngestView):
+    kind = "batch"
+
+
+class AsyncVisitEndView(AsyncTrackIngestView):
+    kind = "visit_end"
@@ -0,0 +1,220 @@
+"""Storage side of the tracker endpoints, shared by the DRF views and the async views.
+
+Each handler takes the resolved site, the validated payload and the raw
+request data and returns ``(response_body, status_code)``.
+"""
+import logging
+
+from django.utils import timezone
+
+from analytics_app.services.session_state import remember_page_view
+from core import data_version
+from tracker.services import (
+    build_event_mirror,
+    build_pageview_mirror,
+    build_visit_start_mirror,
+    client_by_token,
+    end_visit,
+    enqueue_form_submit_notification,
+    get_or_create_visit,
+    ingest_batch,
+    latest_analytics_page_view,
+    record_event,
+    record_pageview,
+    time_on_page_duration,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def store_visit_start(site, data, raw, *, context, origin):
+    visit = get_or_create_visit(
+        site,
+        data["session_id"],
+        context,
+        started_at=data.get("started_at") or timezone.now(),
+        referrer=data.get("referrer") or "",
+        visitor_id=data.get("visitor_id") or "",
+    )
+    client = client_by_token(data["token"])
+    if client:
+        try:
+            build_visit_start_mirror(
+                client,
+                visitor_id=data.get("visitor_id"),
+                url=raw.get("url"),
+                origin=origin,
+                referrer=data.get("referrer"),
+            ).save()
+        except Exception:
+            logger.exception(
+                "track.visit_start failed to mirror analytics event site_id=%s client_id=%s",
+                site.id,
+                client.id,
+            )
+    data_version.bump(site.token)
+    logger.info(
+        "track.visit_start created visit_id=%s site_id=%s visitor_id=%s session_id=%s",
+        visit.id,
+        site.id,
+        visit.visitor_id,
+        visit.session_id,
+    )
+    return {"ok": True, "visit_id": visit.id}, 201
+
+
+def store_pageview(site, data, raw, *, context, origin):
+    visit, pageview = record_pageview(
+        site,
+        data["session_id"],
+        context,
+        visitor_id=data.get("visitor_id") or "",
+        url=data["url"],
+        title=data.get("title", ""),
+        timestamp=data.get("timestamp") or timezone.now(),
+    )
+    client = client_by_token(data["token"])
+    if client:
+        try:
+            mirror = build_pageview_mirror(
+                client,
+                visit,
+                session_id=data["session_id"],
+                visitor_id=data.get("visitor_id"),
+                url=data["url"],
+            )
+            mirror.save()
+            remember_page_view(mirror)
+        except Exception:
+            logger.exception(
+                "track.pageview failed to mirror analytics pageview visit_id=%s client_id=%s",
+                visit.id,
+                client.id,
+            )
+    data_version.bump(site.token)
+    logger.info(
+        "track.pageview created pageview_id=%s visit_id=%s visitor_id=%s session_id=%s",
+        pageview.id,
+        visit.id,
+        visit.visitor_id,
+        visit.session_id,
+    )
+    return {"ok": True, "pageview_id": pageview.id}, 201
+
+
+def store_event(site, data, raw, *, context, origin):
+    event_type = data["type"]
+    payload = data.get("payload") or {}
+    duration_seconds = 0
+    if event_type == "time_on_page":
+        duration_seconds = time_on_page_duration(payload)
+        if duration_seconds <= 0:
+            visit = get_or_create_visit(site, data["session_id"], context, visitor_id=data.get("visitor_id") or "")
+            logger.info(
+                "track.event ignored invalid time_on_page duration visit_id=%s session_id=%s payload=%s",
+                visit.id,
+                data["session_id"],
+                payload,
+            )
+            return {"ok": True, "ignored": True}, 200
+
+    visit, event = record_event(
+        site,
+        data["session_id"],
+        context,
+        visitor_id=data.get("visitor_id") or "",
+        event_type=event_type,
+        payload=payload,
+        timestamp=data.get("timestamp") or timezone.now(),
+    )
+    client = client_by_token(data["token"])
+    if client:
+        try:
+            mirror = build_event_mirror(
+                client,
+                event_type=event_type,
+                payload=payload,
+                session_id=data["session_id"],
+                visitor_id=data.get("visitor_id"),
+                duration_seconds=duration_seconds,
+                latest_page_view=lambda: latest_analytics_page_view(client, data["session_id"]),
+                origin=origin,
+            )
+            if mirror is not None:
+                mirror.save()
+        except Exception:
+            logger.exception(
+                "track.event failed to mirror analytics event type=%s visit_id=%s client_id=%s",
+                event_type,
+                visit.id,
+                client.id,
+            )
+
+        if event_type == "form_submit":
+            enqueue_form_submit_notification(event, client)
+    data_version.bump(site.token)
+    logger.info(
+        "track.event created event_id=%s visit_id=%s type=%s visitor_id=%s session_id=%s",
+        event.id,
+        visit.id,
+        event.type,
+        visit.visitor_id,
+        visit.session_id,
+    )
+    return {"ok": True, "event_id": event.id}, 201
+
+
+def store_batch(site, data, raw, *, context, origin):
+    result = ingest_batch(
+        site,
+        client_by_token(data["token"]),
+        session_id=data["session_id"],
+        visitor_id=data.get("visitor_id") or "",
+        records=data["records"],
+        context=context,
+        origin=origin,
+    )
+    return (
+        {
+            "ok": True,
+            "visit_id": result["visit"].id,
+            "pageview_ids": [pageview.id for pageview in result["pageviews"]],
+            "event_ids": [event.id for event in result["events"]],
+            "ignored": result["ignored"],
+        },
+        201,
+    )
+
+
+def store_visit_end(site, data, raw, *, context, origin):
+    visit = end_visit(
+        site,
+        data["session_id"],
+        context,
+        visitor_id=data.get("visitor_id") or "",
+        ended_at=data.get("ended_at") or timezone.now(),
+        duration=data.get("duration"),
+    )
+    logger.info("track.visit_end updated visit_id=%s duration=%s", visit.id, visit.duration)
+    return {"ok": True, "visit_id": visit.id, "duration": visit.duration}, 200
+
+
+def queue_entries(kind, data, raw):
+    """The raw records a hit turns into on the ingest stream."""
+    if kind != "batch":
+        return [(kind, raw)]
+    shared = {
+        "token": data["token"],
+        "session_id": data["session_id"],
+        "visitor_id": data.get("visitor_id") or "",
+    }
+    return [(record["kind"], {**record["raw"], **shared}) for record in data["records"]]
+
+
+HANDLERS = {
+    "visit_start": store_visit_start,
+    "pageview": store_pageview,
+    "event": store_event,
+    "batch": store_batch,
+    "visit_end": store_visit_end,
+}
@@ -0,0 +1,309 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import ResponseError
+
+from core.redis_client import get_async_redis, get_redis
+from tracker.serializers import TrackBatchSerializer, VisitEndSerializer
+from tracker.services import client_by_token, end_visit, ingest_batch, site_by_token, visit_context
+
+logger = logging.getLogger(__name__)
+
+RECORD_SERIALIZERS = {**TrackBatchSerializer.RECORD_SERIALIZERS, "visit_end": VisitEndSerializer}
+
+# Records without an explicit client timestamp get the time the web worker
+# accepted them, not the time the consumer got around to them.
+RECEIVED_AT_FIELDS = {
+    "visit_start": "started_at",
+    "pageview": "timestamp",
+    "event": "timestamp",
+    "visit_end": "ended_at",
+}
+
+
+def is_enabled() -> bool:
+    return settings.TRACK_INGEST_MODE == "stream"
+
+
+def _request_data(data) -> dict:
+    if hasattr(data, "dict"):
+        return data.dict()
+    return dict(data)
+
+
+def build_record(kind, data, *, ip, user_agent, origin) -> dict:
+    return {
+        "kind": kind,
+        "data": _request_data(data),
+        "ip": ip,
+        "user_agent": user_agent or "",
+        "origin": origin,
+        "received_at": timezone.now().isoformat(),
+    }
+
+
+def _add_records(pipe, records):
+    for record in records:
+        pipe.xadd(
+            settings.TRACK_INGEST_STREAM,
+            {"record": json.dumps(record, ensure_ascii=False, default=str)},
+            maxlen=settings.TRACK_INGEST_STREAM_MAXLEN,
+            approximate=True,
+        )
+    return pipe
+
+
+def enqueue_records(records, conn=None) -> list:
+    conn = conn or get_redis()
+    return _add_records(conn.pipeline(transaction=False), records).execute()
+
+
+async def aenqueue_records(records, conn=None) -> list:
+    conn = conn or get_async_redis()
+    return await _add_records(conn.pipeline(transaction=False), records).execute()
+
+
+def ensure_group(conn) -> None:
+    try:
+        conn.xgroup_create(settings.TRACK_INGEST_STREAM, settings.TRACK_INGEST_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _validate(record):
+    kind = record.get("kind")
+    serializer_class = RECORD_SERIALIZERS.get(kind)
+    if serializer_class is None:
+        return None, {"kind": [f"Unsupported record kind: {kind!r}."]}
+    data = dict(record.get("data") or {})
+    received_at_field = RECEIVED_AT_FIELDS[kind]
+    if not data.get(received_at_field):
+        data[received_at_field] = record.get("received_at")
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def _process_session(token, session_id, items):
+    site = site_by_token(token) if token else None
+    if site is None:
+        return [], [(entry_id, fields, "invalid token") for entry_id, fields, _ in items]
+
+    acked = []
+    rejected = []
+    # Runs of consecutive records sent with the same ip, user agent and origin,
+    # as (sender, batch_records, visit_ends); each run is stored with its own
+    # context, like the sync endpoints store each request.
+    runs = []
+    for entry_id, fields, record in items:
+        validated, errors = _validate(record)
+        if errors:
+            rejected.append((entry_id, fields, json.dumps(errors, ensure_ascii=False, default=str)))
+            continue
+        acked.append(entry_id)
+        sender = (record.get("ip"), record.get("user_agent"), record.get("origin"))
+        if not runs or runs[-1][0] != sender:
+            runs.append((sender, [], []))
+        if record["kind"] == "visit_end":
+            runs[-1][2].append(validated)
+        else:
+            runs[-1][1].append({"kind": record["kind"], "data": validated, "raw": record["data"]})
+
+    if not acked:
+        return acked, rejected
+
+    visitor_id = next(
+        (entry[2]["data"].get("visitor_id") for entry in reversed(items) if entry[2]["data"].get("visitor_id")),
+        "",
+    )
+    client = client_by_token(token)
+    with transaction.atomic():
+        for (ip, user_agent, origin), batch_records, visit_ends in runs:
+            context = visit_context(user_agent, ip)
+            if batch_records:
+                ingest_batch(
+                    site,
+                    client,
+                    session_id=session_id,
+                    visitor_id=visitor_id,
+                    records=batch_records,
+                    context=context,
+                    origin=origin,
+                )
+            for validated in visit_ends:
+                end_visit(
+                    site,
+                    session_id,
+                    context,
+                    visitor_id=validated.get("visitor_id") or "",
+                    ended_at=validated.get("ended_at"),
+                    duration=validated.get("duration"),
+                )
+    return acked, rejected
+
+
+def dead_letter(conn, items) -> None:
+    if not items:
+        return
+    pipe = conn.pipeline(transaction=False)
+    for entry_id, fields, reason in items:
+        pipe.xadd(
+            settings.TRACK_INGEST_DEAD_LETTER_STREAM,
+            {
+                "record": (fields or {}).get(b"record", b""),
+                "source_id": entry_id,
+                "reason": reason,
+                "failed_at": timezone.now().isoformat(),
+            },
+            maxlen=settings.TRACK_INGEST_STREAM_MAXLEN,
+            approximate=True,
+        )
+        pipe.xack(settings.TRACK_INGEST_STREAM, settings.TRACK_INGEST_GROUP, entry_id)
+    pipe.execute()
+    logger.warning("track.ingest dead-lettered entries count=%s", len(items))
+
+
+def process_entries(conn, entries) -> dict:
+    sessions = {}
+    rejected = []
+    for entry_id, fields in entries:
+        if fields is None:
+            # Trimmed out of the stream by MAXLEN before it was acknowledged.
+            conn.xack(settings.TRACK_INGEST_STREAM, settings.TRACK_INGEST_GROUP, entry_id)
+            continue
+        try:
+            record = json.loads(_decode(fields[b"record"]))
+        except (KeyError, ValueError):
+            rejected.append((entry_id, fields, "malformed record"))
+            continue
+        data = record.get("data") or {}
+        sessions.setdefault((data.get("token"), data.get("session_id")), []).append((entry_id, fields, record))
+
+    acked = []
+    failed = 0
+    for (token, session_id), items in sessions.items():
+        try:
+            session_acked, session_rejected = _process_session(token, session_id, items)
+        except Exception:
+            # Left pending: reclaim_stale() redelivers them after TRACK_INGEST_CLAIM_IDLE_MS.
+            failed += len(items)
+            logger.exception("track.ingest failed to store session entries session_id=%s count=%s", session_id, len(items))
+            continue
+        acked.extend(session_acked)
+        rejected.extend(session_rejected)
+
+    dead_letter(conn, rejected)
+    if acked:
+        conn.xack(settings.TRACK_INGEST_STREAM, settings.TRACK_INGEST_GROUP, *acked)
+    return {"acked": len(acked), "dead_lettered": len(rejected), "failed": failed}
+
+
+def consume(conn, consumer, *, count=None, block_ms=None) -> dict:
+    response = conn.xreadgroup(
+        settings.TRACK_INGEST_GROUP,
+        consumer,
+        {settings.TRACK_INGEST_STREAM: ">"},
+        count=count or settings.TRACK_INGEST_CHUNK_SIZE,
+        # BLOCK 0 waits forever in Redis; 0 here means "do not block".
+        block=(settings.TRACK_INGEST_BLOCK_MS if block_ms is None else block_ms) or None,
+    )
+    entries = response[0][1] if response else []
+    if not entries:
+        return {"read": 0, "acked": 0, "dead_lettered": 0, "failed": 0}
+    return {"read": len(entries), **process_entries(conn, entries)}
+
+
+def _stream_id_key(entry_id):
+    return tuple(int(part) for part in entry_id.split("-"))
+
+
+def _delivery_counts(conn, consumer, entry_ids, count) -> dict:
+    """Delivery counters of ``entry_ids`` from the consumer's pending list, paging past other entries."""
+    wanted = set(entry_ids)
+    ordered = sorted(wanted, key=_stream_id_key)
+    start, end = ordered[0], ordered[-1]
+    deliveries = {}
+    while len(deliveries) < len(wanted):
+        rows = conn.xpending_range(
+            settings.TRACK_INGEST_STREAM,
+            settings.TRACK_INGEST_GROUP,
+            min=start,
+            max=end,
+            count=count,
+            consumername=consumer,
+        )
+        for row in rows:
+            entry_id = _decode(row["message_id"])
+            if entry_id in wanted:
+                deliveries[entry_id] = row["times_delivered"]
+        if len(rows) < count:
+            break
+        start = "(" + _decode(rows[-1]["message_id"])
+    return deliveries
+
+
+def reclaim_stale(conn, consumer, *, count=None) -> dict:
+    count = count or settings.TRACK_INGEST_CHUNK_SIZE
+    _, entries, *_ = conn.xautoclaim(
+        settings.TRACK_INGEST_STREAM,
+        settings.TRACK_INGEST_GROUP,
+        consumer,
+        min_idle_time=settings.TRACK_INGEST_CLAIM_IDLE_MS,
+        start_id="0-0",
+        count=count,
+    )
+    if not entries:
+        return {"read": 0, "acked": 0, "dead_lettered": 0, "failed": 0}
+
+    deliveries = _delivery_counts(conn, consumer, [_decode(entry_id) for entry_id, _ in entries], count)
+    exhausted = []
+    retry = []
+    for entry_id, fields in entries:
+        if deliveries.get(_decode(entry_id), 0) > settings.TRACK_INGEST_MAX_DELIVERIES:
+            exhausted.append((entry_id, fields, "max deliveries exceeded"))
+        else:
+            retry.append((entry_id, fields))
+    dead_letter(conn, exhausted)
+    result = process_entries(conn, retry)
+    result["dead_lettered"] += len(exhausted)
+    return {"read": len(entries), **result}
+
+
+def stream_stats(conn=None) -> dict:
+    conn = conn or get_redis()
+    stats = {
+        "stream": settings.TRACK_INGEST_STREAM,
+        "length": conn.xlen(settings.TRACK_INGEST_STREAM),
+        "dead_letter_length": conn.xlen(settings.TRACK_INGEST_DEAD_LETTER_STREAM),
+        "consumers": 0,
+        "pending": 0,
+        "lag": None,
+        "oldest_pending_age_seconds": None,
+    }
+    try:
+        groups = conn.xinfo_groups(settings.TRACK_INGEST_STREAM)
+    except ResponseError:
+        return stats
+    for group in groups:
+        if _decode(group["name"]) != settings.TRACK_INGEST_GROUP:
+            continue
+        stats["consumers"] = group["consumers"]
+        stats["pending"] = group["pending"]
+        stats["lag"] = group.get("lag")
+    if stats["pending"]:
+        summary = conn.xpending(settings.TRACK_INGEST_STREAM, settings.TRACK_INGEST_GROUP)
+        oldest_id = _decode(summary.get("min") or "")
+        if oldest_id:
+            oldest_ms = int(oldest_id.split("-", 1)[0])
+            stats["oldest_pending_age_seconds"] = round(max(0, time.time() * 1000 - oldest_ms) / 1000, 1)
+    return stats
@@ -0,0 +1,159 @@
+from django.db import IntegrityError, connection, transaction
+
+from tracker.models import Visit
+
+CONTEXT_FIELDS = ("ip_address", "user_agent", "device_type", "os", "browser", "browser_family", "is_ios_browser")
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def _column_values(model, values: dict):
+    columns = []
+    params = []
+    for field_name, value in values.items():
+        field = model._meta.get_field(field_name)
+        columns.append(_quote(field.column))
+        params.append(field.get_db_prep_save(value, connection))
+    return columns, params
+
+
+def _visit_assignments(ended_at_given: bool) -> list[str]:
+    table = _quote(Visit._meta.db_table)
+    visitor_id = _quote("visitor_id")
+    referrer = _quote("referrer")
+    assignments = [
+        f"{visitor_id} = CASE WHEN EXCLUDED.{visitor_id} <> '' THEN EXCLUDED.{visitor_id} ELSE {table}.{visitor_id} END",
+        f"{referrer} = CASE WHEN {table}.{referrer} = '' THEN EXCLUDED.{referrer} ELSE {table}.{referrer} END",
+    ]
+    for field_name in CONTEXT_FIELDS:
+        column = _quote(Visit._meta.get_field(field_name).column)
+        assignments.append(f"{column} = COALESCE(EXCLUDED.{column}, {table}.{column})")
+    if ended_at_given:
+        ended_at = _quote("ended_at")
+        assignments.append(f"{ended_at} = EXCLUDED.{ended_at}")
+    return assignments
+
+
+def _upsert_visit_postgres(values: dict, child, duration):
+    table = _quote(Visit._meta.db_table)
+    columns, params = _column_values(Visit, values)
+    assignments = _visit_assignments("ended_at" in values)
+    if duration is not None:
+        assignments.append(f"{_quote('duration')} = EXCLUDED.{_quote('duration')}")
+    elif "ended_at" in values:
+        # visit_end without an explicit duration: measure it against the stored start.
+        assignments.append(
+            f"{_quote('duration')} = GREATEST(0, FLOOR(EXTRACT(EPOCH FROM (EXCLUDED.{_quote('ended_at')} - {table}.{_quote('started_at')}))))::integer"
+        )
+
+    returning = [_quote(field.column) for field in Visit._meta.concrete_fields]
+    sql = (
+        f"WITH visit AS ("
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({_quote('site_id')}, {_quote('session_id')}) DO UPDATE SET {', '.join(assignments)} "
+        f"RETURNING {', '.join(returning)})"
+    )
+    if child is None:
+        sql += f" SELECT {', '.join(returning)}, NULL FROM visit"
+    else:
+        child_model, child_values = child
+        child_columns, child_params = _column_values(child_model, child_values)
+        sql += (
+            f", child AS ("
+            f"INSERT INTO {_quote(child_model._meta.db_table)} ({_quote('visit_id')}, {', '.join(child_columns)}) "
+            f"SELECT visit.{_quote('id')}, {', '.join(['%s'] * len(child_columns))} FROM visit "
+            f"RETURNING {_quote('id')})"
+            f" SELECT visit.*, child.{_quote('id')} FROM visit, child"
+        )
+        params += child_params
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    field_names = [field.attname for field in Visit._meta.concrete_fields]
+    visit = Visit.from_db(connection.alias, field_names, row[: len(field_names)])
+    child_obj = None
+    if child is not None:
+        child_model, child_values = child
+        child_obj = child_model(id=row[-1], visit=visit, **child_values)
+    return visit, child_obj
+
+
+def _upsert_visit_orm(site, session_id, values: dict, child, duration):
+    lookup = {"site": site, "session_id": session_id}
+    with transaction.atomic():
+        visit = Visit.objects.select_for_update().filter(**lookup).first()
+        if visit is None:
+            try:
+                with transaction.atomic():
+                    visit = Visit.objects.create(**values)
+            except IntegrityError:
+                visit = Visit.objects.select_for_update().get(**lookup)
+            else:
+                return visit, _create_child(visit, child)
+
+        updates = []
+        if values["visitor_id"] and visit.visitor_id != values["visitor_id"]:
+            visit.visitor_id = values["visitor_id"]
+            updates.append("visitor_id")
+        if values["referrer"] and not visit.referrer:
+            visit.referrer = values["referrer"]
+            updates.append("referrer")
+        for field_name in CONTEXT_FIELDS:
+            field_value = values.get(field_name)
+            if field_value is not None and getattr(visit, field_name) != field_value:
+                setattr(visit, field_name, field_value)
+                updates.append(field_name)
+        if "ended_at" in values:
+            visit.ended_at = values["ended_at"]
+            visit.duration = (
+                duration
+                if duration is not None
+                else max(0, int((values["ended_at"] - visit.started_at).total_seconds()))
+            )
+            updates.extend(["ended_at", "duration"])
+        if updates:
+            visit.save(update_fields=updates)
+        return visit, _create_child(visit, child)
+
+
+def _create_child(visit, child):
+    if child is None:
+        return None
+    child_model, child_values = child
+    return child_model.objects.create(visit=visit, **child_values)
+
+
+def upsert_visit(site, session_id, context, *, visitor_id="", referrer="", started_at, ended_at=None, duration=None, child=None):
+    """Insert or update the (site, session_id) visit, optionally inserting one child row.
+
+    ``child`` is ``(PageView, fields)`` or ``(Event, fields)``. On PostgreSQL
+    this is a single ``INSERT ... ON CONFLICT ... RETURNING`` statement with
+    the child insert chained in a CTE; other backends use an ORM fallback.
+    Returns ``(visit, child_instance_or_None)``.
+    """
+    values = {
+        "site_id": site.id,
+        "session_id": session_id,
+        "visitor_id": visitor_id or "",
+        "referrer": referrer or "",
+        "started_at": started_at,
+        "duration": 0,
+        **{field_name: context.get(field_name) for field_name in CONTEXT_FIELDS},
+    }
+    if values["is_ios_browser"] is None:
+        values["is_ios_browser"] = False
+    if ended_at is not None:
+        values["ended_at"] = ended_at
+        values["duration"] = (
+            duration if duration is not None else max(0, int((ended_at - started_at).total_seconds()))
+        )
+    if connection.vendor == "postgresql":
+        visit, child_obj = _upsert_visit_postgres(values, child, duration)
+    else:
+        visit, child_obj = _upsert_visit_orm(site, session_id, values, child, duration)
+    visit.site = site
+    return visit, child_obj
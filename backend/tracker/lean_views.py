@@ -0,0 +1,108 @@
+"""The /api/track/ write endpoints without the DRF request cycle (TRACK_API_VIEWS=lean).
+
+Beacons have a fixed, tiny schema: the body is parsed once with orjson and
+checked against the precompiled schemas in tracker.schemas. Status codes and
+bodies are the same as the DRF views in tracker.views.
+"""
+import logging
+
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from redis.exceptions import RedisError
+
+from core.lean_api import BadRequestBody, bad_request_body, error_response, json_response, parse_body
+from tracker import ingest_queue
+from tracker.handlers import HANDLERS, queue_entries
+from tracker.schemas import SCHEMAS
+from tracker.services import client_ip, extract_visit_context, site_by_token
+
+logger = logging.getLogger(__name__)
+
+
+class LeanTrackIngestView(View):
+    http_method_names = ["post", "options"]
+    kind = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def validate(self, request):
+        """``(raw, validated_data, None)``, or ``(None, None, error_response)``."""
+        try:
+            raw = parse_body(request)
+        except BadRequestBody as exc:
+            return None, None, bad_request_body(exc)
+        logger.debug("track.%s request origin=%s body=%s", self.kind, request.headers.get("Origin"), raw)
+        data, errors = SCHEMAS[self.kind].validate(raw)
+        if errors is not None:
+            return None, None, json_response(errors, status=400)
+        return raw, data, None
+
+    def invalid_token(self, token):
+        logger.warning("Track request rejected: invalid token token=%s", (token[:6] + "***") if token else "***")
+        return error_response("Invalid token.", 403)
+
+    def queue_records(self, request, data, raw):
+        return [
+            ingest_queue.build_record(
+                kind,
+                record,
+                ip=client_ip(request),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+                origin=request.headers.get("Origin"),
+            )
+            for kind, record in queue_entries(self.kind, data, raw)
+        ]
+
+    def store(self, request, site, data, raw):
+        try:
+            body, status_code = HANDLERS[self.kind](
+                site,
+                data,
+                raw,
+                context=extract_visit_context(request),
+                origin=request.headers.get("Origin"),
+            )
+        except Exception:
+            logger.exception("track.api exception path=%s method=%s", request.path, request.method)
+            raise
+        return json_response(body, status=status_code)
+
+    def post(self, request):
+        raw, data, response = self.validate(request)
+        if response is not None:
+            return response
+        site = site_by_token(data["token"])
+        if not site:
+            return self.invalid_token(data["token"])
+        if ingest_queue.is_enabled():
+            records = self.queue_records(request, data, raw)
+            try:
+                ingest_queue.enqueue_records(records)
+            except RedisError:
+                logger.exception("track.%s failed to enqueue, storing synchronously path=%s", self.kind, request.path)
+            else:
+                return json_response({"ok": True, "queued": len(records)}, status=202)
+        return self.store(request, site, data, raw)
+
+
+class LeanVisitStartView(LeanTrackIngestView):
+    kind = "visit_start"
+
+
+class LeanPageViewCreateView(LeanTrackIngestView):
+    kind = "pageview"
+
+
+class LeanEventCreateView(LeanTrackIngestView):
+    kind = "event"
+
+
+class LeanTrackBatchView(LeanTrackIngestView):
+    kind = "batch"
+
+
+class LeanVisitEndView(LeanTrackIngestView):
+    kind = "visit_end"
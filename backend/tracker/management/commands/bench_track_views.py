@@ -0,0 +1,128 @@
+import json
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.throttling import ScopedRateThrottle
+
+from analytics_app.lean_views import LeanPublicAnalyticsEventCreateView
+from analytics_app.serializers import PublicAnalyticsEventSerializer
+from analytics_app.views import PublicAnalyticsEventCreateView
+from clients.models import Client
+from tracker import lean_views, views
+from tracker.handlers import HANDLERS
+from tracker.models import Site
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+
+def _scenarios(token, api_key):
+    shared = {"token": token, "session_id": "bench-session", "visitor_id": "bench-visitor"}
+    return [
+        (
+            "pageview",
+            "/api/track/pageview/",
+            {**shared, "url": "https://example.com/pricing?utm_source=vk", "title": "Pricing"},
+            views.PageViewCreateView,
+            lean_views.LeanPageViewCreateView,
+        ),
+        (
+            "event",
+            "/api/track/event/",
+            {**shared, "type": "click", "payload": {"text": "Buy", "id": "buy"}, "timestamp": "2024-05-01T10:00:00Z"},
+            views.EventCreateView,
+            lean_views.LeanEventCreateView,
+        ),
+        (
+            "batch(5)",
+            "/api/track/batch/",
+            {
+                **shared,
+                "records": [{"kind": "pageview", "url": f"https://example.com/p/{index}"} for index in range(3)]
+                + [{"kind": "event", "type": "scroll", "payload": {"depth": 50}}] * 2,
+            },
+            views.TrackBatchView,
+            lean_views.LeanTrackBatchView,
+        ),
+        (
+            "analytics page_view",
+            f"/api/analytics/event/?api_key={api_key}",
+            {
+                "event_type": "page_view",
+                "session_id": "bench-session",
+                "visitor_id": "bench-visitor",
+                "url": "https://example.com/pricing",
+                "pathname": "/pricing",
+            },
+            PublicAnalyticsEventCreateView,
+            LeanPublicAnalyticsEventCreateView,
+        ),
+    ]
+
+
+def _noop_handler(site, data, raw, *, context, origin):
+    return {"ok": True}, 201
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests per second per core for the public write endpoints: DRF views vs the lean views. "
+        "Storage is stubbed out unless --with-storage is given, so the numbers are the view layer alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Requests per scenario and view layer.")
+        parser.add_argument("--token", help="Site token to use (default: first active site).")
+        parser.add_argument(
+            "--with-storage",
+            action="store_true",
+            help="Run the real storage handlers inside a transaction that is rolled back.",
+        )
+
+    def _run(self, view, factory, path, body, count) -> float:
+        payload = json.dumps(body)
+        started = time.perf_counter()
+        for _ in range(count):
+            request = factory.post(path, payload, content_type="application/json", HTTP_USER_AGENT=USER_AGENT)
+            response = view(request)
+            if response.status_code >= 300:
+                raise CommandError(f"{path} returned {response.status_code}: {response.content[:200]!r}")
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        site = Site.objects.filter(is_active=True, token=options["token"]).first() if options["token"] else None
+        site = site or Site.objects.filter(is_active=True).first()
+        client = Client.objects.filter(api_key=site.token, is_active=True).first() if site else None
+        if site is None or client is None:
+            raise CommandError("Need an active Site whose token is an active Client api_key.")
+
+        count = options["requests"]
+        factory = RequestFactory()
+        with ExitStack() as stack:
+            stack.enter_context(patch.dict(ScopedRateThrottle.THROTTLE_RATES, {"public_analytics_event": f"{count * 10}/day"}))
+            if options["with_storage"]:
+                stack.enter_context(transaction.atomic())
+            else:
+                stack.enter_context(patch.dict(HANDLERS, {kind: _noop_handler for kind in HANDLERS}))
+                stack.enter_context(
+                    patch.object(PublicAnalyticsEventSerializer, "create", lambda self, data: {"kind": "page_view", "id": None})
+                )
+
+            self.stdout.write(f"requests={count} per scenario, storage={'on' if options['with_storage'] else 'stubbed'}")
+            for name, path, body, drf_view, lean_view in _scenarios(site.token, client.api_key):
+                drf_view, lean_view = drf_view.as_view(), lean_view.as_view()
+                # Warm up caches (tenant lookup, UA parsing, compiled URL regexes).
+                self._run(drf_view, factory, path, body, 50)
+                self._run(lean_view, factory, path, body, 50)
+                drf = self._run(drf_view, factory, path, body, count)
+                lean = self._run(lean_view, factory, path, body, count)
+                self.stdout.write(
+                    f"{name:<20} drf: {count / drf:8.0f} req/s ({drf / count * 1e6:6.1f} us)   "
+                    f"lean: {count / lean:8.0f} req/s ({lean / count * 1e6:6.1f} us)   x{drf / lean:.1f}"
+                )
+
+            if options["with_storage"]:
+                transaction.set_rollback(True)
@@ -0,0 +1,63 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracker.user_agent import _parse, parse_ua, reset_ua_cache, ua_cache_stats
+
+# Shapes seen on real tracker traffic, most frequent first. Version numbers are
+# expanded per run so the corpus has the long tail a real site gets.
+CORPUS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_{m} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.{m} Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 YaBrowser/24.{m}.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-A525F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 YaBrowser/24.{m}.1.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{v}.0) Gecko/20100101 Firefox/{v}.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36 Edg/{v}.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.{m} Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_{m} like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Instagram 330.0.0.{m}",
+    "Mozilla/5.0 (Linux; Android 14; SM-X200) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{v}.0.0.0 Safari/537.36 OPR/{m}.0.0.0",
+    "Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)",
+    "",
+)
+
+
+def build_corpus(size: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(CORPUS))]
+    return [
+        rng.choices(CORPUS, weights=weights)[0].format(v=rng.randint(118, 125), m=rng.randint(0, 6))
+        for _ in range(size)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark tracker user-agent parsing: raw user_agents.parse vs the cached fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hits", type=int, default=20000, help="Number of simulated tracker hits.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def _run(self, func, corpus) -> float:
+        started = time.perf_counter()
+        for user_agent in corpus:
+            func(user_agent)
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        corpus = build_corpus(options["hits"], seed=options["seed"])
+        self.stdout.write(f"hits={len(corpus)} distinct={len(set(corpus))}")
+
+        raw = self._run(_parse, corpus)
+        reset_ua_cache()
+        cached = self._run(parse_ua, corpus)
+        stats = ua_cache_stats()
+
+        self.stdout.write(f"user_agents.parse: {raw:.3f}s ({raw / len(corpus) * 1e6:.1f} us/hit)")
+        self.stdout.write(f"parse_ua:          {cached:.3f}s ({cached / len(corpus) * 1e6:.1f} us/hit)")
+        self.stdout.write(f"speedup: x{raw / cached:.1f}")
+        self.stdout.write(f"stats: {stats}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.partitioning import PARTITIONED_TABLES, ensure_partitions, is_partitioned, partitions
+
+
+class Command(BaseCommand):
+    help = "Create the monthly partitions of the tracker/analytics hit tables ahead of time (Postgres only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, help="Months ahead of the current one (default: PARTITIONS_AHEAD_MONTHS).")
+        parser.add_argument("--table", choices=sorted(PARTITIONED_TABLES), action="append", help="Limit to these tables.")
+        parser.add_argument("--list", action="store_true", help="Only print the existing partitions.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(f"Partitioning needs PostgreSQL, the database is {connection.vendor}; nothing to do.")
+            return
+        for table in options["table"] or PARTITIONED_TABLES:
+            if options["list"]:
+                with connection.cursor() as cursor:
+                    if not is_partitioned(cursor, table):
+                        self.stdout.write(f"{table}: not partitioned")
+                        continue
+                    names = [name for name, _, _ in partitions(cursor, table)]
+                self.stdout.write(f"{table}: {', '.join(names) or '-'}")
+                continue
+            created = ensure_partitions(table, ahead=options["ahead"])
+            self.stdout.write(f"{table}: created {', '.join(created) if created else 'nothing'}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.retention import RAW_TABLES, prune_raw_data
+from telegram_logs.models import TelegramUpdateLog
+
+TABLES = sorted([model._meta.db_table for model, *_ in RAW_TABLES] + [TelegramUpdateLog._meta.db_table])
+
+
+class Command(BaseCommand):
+    help = "Delete raw tracking rows older than their retention period (RETENTION_* settings, plan retention_days)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be deleted.")
+        parser.add_argument("--table", choices=TABLES, action="append", help="Limit to these tables.")
+
+    def handle(self, *args, **options):
+        report = prune_raw_data(dry_run=options["dry_run"], tables=options["table"])
+        verb = "would delete" if options["dry_run"] else "deleted"
+        for table, item in report.items():
+            partitions = f", partitions: {', '.join(item['partitions'])}" if item["partitions"] else ""
+            self.stdout.write(f"{table}: {verb} {item['rows']} rows, {item['bytes']} bytes{partitions}")
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from redis.exceptions import RedisError
+
+from core.redis_client import get_redis
+from tracker import ingest_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Consume the tracker ingest stream and write queued records to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--consumer",
+            default=f"{socket.gethostname()}-{os.getpid()}",
+            help="Consumer name inside the stream group.",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain what is currently queued and exit.")
+        parser.add_argument("--stats", action="store_true", help="Print stream length, pending entries and lag, then exit.")
+        parser.add_argument("--stats-interval", type=int, default=60, help="Seconds between lag log lines.")
+
+    def _stop(self, signum, frame):
+        logger.info("Tracker ingest consumer stopping signal=%s pid=%s", signum, os.getpid())
+        self.running = False
+
+    def handle(self, *args, **options):
+        # XREADGROUP blocks for TRACK_INGEST_BLOCK_MS; the socket must outlast it on an idle stream.
+        conn = get_redis(socket_timeout=settings.REDIS_SOCKET_TIMEOUT + settings.TRACK_INGEST_BLOCK_MS / 1000)
+        if options["stats"]:
+            self.stdout.write(json.dumps(ingest_queue.stream_stats(conn), ensure_ascii=False))
+            return
+
+        consumer = options["consumer"]
+        ingest_queue.ensure_group(conn)
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        logger.info(
+            "Tracker ingest consumer started stream=%s group=%s consumer=%s pid=%s",
+            settings.TRACK_INGEST_STREAM,
+            settings.TRACK_INGEST_GROUP,
+            consumer,
+            os.getpid(),
+        )
+
+        last_stats_at = 0.0
+        while self.running:
+            close_old_connections()
+            try:
+                reclaimed = ingest_queue.reclaim_stale(conn, consumer)
+                result = ingest_queue.consume(conn, consumer, block_ms=0 if options["once"] else None)
+            except RedisError:
+                logger.exception("Tracker ingest redis error consumer=%s", consumer)
+                time.sleep(1)
+                continue
+
+            if result["read"] or reclaimed["read"]:
+                logger.info(
+                    "Tracker ingest chunk consumer=%s read=%s acked=%s dead_lettered=%s failed=%s reclaimed=%s",
+                    consumer,
+                    result["read"],
+                    result["acked"] + reclaimed["acked"],
+                    result["dead_lettered"] + reclaimed["dead_lettered"],
+                    result["failed"] + reclaimed["failed"],
+                    reclaimed["read"],
+                )
+            elif options["once"]:
+                break
+
+            if time.monotonic() - last_stats_at >= options["stats_interval"]:
+                last_stats_at = time.monotonic()
+                try:
+                    logger.info("Tracker ingest stream stats %s", ingest_queue.stream_stats(conn))
+                except RedisError:
+                    logger.exception("Tracker ingest failed to read stream stats")
+        close_old_connections()
+        logger.info("Tracker ingest consumer stopped consumer=%s", consumer)
@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_visits(apps, schema_editor):
+    Visit = apps.get_model("tracker", "Visit")
+    PageView = apps.get_model("tracker", "PageView")
+    Event = apps.get_model("tracker", "Event")
+
+    duplicates = (
+        Visit.objects.values("site_id", "session_id")
+        .annotate(visits=Count("id"), first_started_at=Min("started_at"))
+        .filter(visits__gt=1)
+    )
+    for row in duplicates.iterator():
+        # Keep the visit the ingest path was writing to (latest started_at) and fold the rest into it.
+        visit_ids = list(
+            Visit.objects.filter(site_id=row["site_id"], session_id=row["session_id"])
+            .order_by("-started_at", "-id")
+            .values_list("id", flat=True)
+        )
+        keep_id, drop_ids = visit_ids[0], visit_ids[1:]
+        PageView.objects.filter(visit_id__in=drop_ids).update(visit_id=keep_id)
+        Event.objects.filter(visit_id__in=drop_ids).update(visit_id=keep_id)
+        Visit.objects.filter(id=keep_id).update(started_at=row["first_started_at"])
+        Visit.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0004_visit_device_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_visits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0005_merge_duplicate_visits"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="visit",
+            constraint=models.UniqueConstraint(fields=("site", "session_id"), name="tracker_visit_site_session_uniq"),
+        ),
+    ]
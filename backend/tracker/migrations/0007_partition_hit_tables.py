@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from core.partitioning import convert_table, is_supported, unconvert_table
+
+TABLES = ("tracker_pageview", "tracker_event")
+
+
+def partition_tables(apps, schema_editor):
+    if not is_supported(schema_editor.connection):
+        return
+    for table in TABLES:
+        convert_table(schema_editor, table)
+
+
+def unpartition_tables(apps, schema_editor):
+    if not is_supported(schema_editor.connection):
+        return
+    for table in TABLES:
+        unconvert_table(schema_editor, table)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0006_visit_unique_site_session"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
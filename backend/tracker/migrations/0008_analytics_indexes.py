@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tracker", "0007_partition_hit_tables"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="visit",
+            index=models.Index(
+                fields=["site", "started_at"],
+                include=["visitor_id", "session_id", "device_type", "os", "browser_family"],
+                name="tracker_visit_site_started_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["visit", "type", "timestamp"], name="tracker_event_visit_type_idx"),
+        ),
+    ]
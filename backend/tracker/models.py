@@ -45,12 +45,21 @@ class Visit(models.Model):
         indexes = [
             models.Index(fields=["site", "visitor_id", "started_at"]),
             models.Index(fields=["site", "session_id", "started_at"]),
+            # Covers the analytics visit scans (site + started_at range) as index-only scans.
+            models.Index(
+                fields=["site", "started_at"],
+                include=["visitor_id", "session_id", "device_type", "os", "browser_family"],
+                name="tracker_visit_site_started_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["site", "session_id"], name="tracker_visit_site_session_uniq"),
         ]
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
-        logger.info(
+        logger.debug(
             "tracker.visit saved id=%s site_id=%s visitor_id=%s session_id=%s new=%s duration=%s",
             self.pk,
             self.site_id,
@@ -79,3 +88,6 @@ class Event(models.Model):
 
     class Meta:
         ordering = ("-timestamp",)
+        indexes = [
+            models.Index(fields=["visit", "type", "timestamp"], name="tracker_event_visit_type_idx"),
+        ]
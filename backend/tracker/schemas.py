@@ -0,0 +1,48 @@
+from core.schema import CompiledSerializer, Invalid
+from tracker.serializers import (
+    PageViewSerializer,
+    TrackBatchSerializer,
+    TrackEventSerializer,
+    VisitEndSerializer,
+    VisitStartSerializer,
+)
+
+VISIT_START = CompiledSerializer(VisitStartSerializer)
+PAGEVIEW = CompiledSerializer(PageViewSerializer)
+EVENT = CompiledSerializer(TrackEventSerializer)
+VISIT_END = CompiledSerializer(VisitEndSerializer)
+
+RECORD_SCHEMAS = {
+    "visit_start": VISIT_START,
+    "pageview": PAGEVIEW,
+    "event": EVENT,
+}
+
+
+def _validate_batch(attrs):
+    # Mirrors TrackBatchSerializer.validate.
+    shared = {
+        "token": attrs["token"],
+        "session_id": attrs["session_id"],
+        "visitor_id": attrs.get("visitor_id") or "",
+    }
+    records = []
+    for record in attrs["records"]:
+        kind = record.get("kind")
+        schema = RECORD_SCHEMAS.get(kind)
+        if schema is None or kind not in TrackBatchSerializer.RECORD_SERIALIZERS:
+            raise Invalid
+        records.append({"kind": kind, "data": schema.fast_validate({**record, **shared}), "raw": record})
+    attrs["records"] = records
+    return attrs
+
+
+BATCH = CompiledSerializer(TrackBatchSerializer, validate_hook=_validate_batch)
+
+SCHEMAS = {
+    "visit_start": VISIT_START,
+    "pageview": PAGEVIEW,
+    "event": EVENT,
+    "batch": BATCH,
+    "visit_end": VISIT_END,
+}
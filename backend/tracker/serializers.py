@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers
 
@@ -40,3 +41,41 @@ class VisitEndSerializer(BaseTrackSerializer):
 
     def get_ended_at(self):
         return self.validated_data.get("ended_at") or timezone.now()
+
+
+class TrackBatchSerializer(BaseTrackSerializer):
+    RECORD_SERIALIZERS = {
+        "visit_start": VisitStartSerializer,
+        "pageview": PageViewSerializer,
+        "event": TrackEventSerializer,
+    }
+
+    records = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.TRACK_BATCH_MAX_RECORDS,
+    )
+
+    def validate(self, attrs):
+        shared = {
+            "token": attrs["token"],
+            "session_id": attrs["session_id"],
+            "visitor_id": attrs.get("visitor_id") or "",
+        }
+        records = []
+        errors = {}
+        for index, record in enumerate(attrs["records"]):
+            kind = record.get("kind")
+            serializer_class = self.RECORD_SERIALIZERS.get(kind)
+            if serializer_class is None:
+                errors[index] = {"kind": [f"Unsupported record kind: {kind!r}."]}
+                continue
+            serializer = serializer_class(data={**record, **shared})
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                continue
+            records.append({"kind": kind, "data": serializer.validated_data, "raw": record})
+        if errors:
+            raise serializers.ValidationError({"records": errors})
+        attrs["records"] = records
+        return attrs
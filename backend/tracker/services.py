@@ -0,0 +1,463 @@
+import hashlib
+import logging
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from analytics_app.models import ClickEvent as AnalyticsClickEvent
+from analytics_app.models import Event as AnalyticsEvent
+from analytics_app.models import PageView as AnalyticsPageView
+from analytics_app.services import uniques
+from analytics_app.services.engagement import url_pathname
+from analytics_app.services.session_state import latest_page_view, remember_page_view
+from analytics_app.services.sources import classify as classify_source
+from clients.tenancy import get_active_client
+from core import data_version
+from core.session_state import session_state
+from core.tenant_cache import site_cache
+from tracker.ingest_sql import upsert_visit
+from tracker.models import Event, PageView, Site, Visit
+from tracker.tasks import send_tracker_form_submit_notification_task
+from tracker.user_agent import parse_ua
+
+logger = logging.getLogger(__name__)
+
+
+def client_ip(request):
+    forwarded = (request.META.get("HTTP_X_FORWARDED_FOR") or "").split(",")[0].strip()
+    return forwarded or request.META.get("REMOTE_ADDR")
+
+
+def extract_visit_context(request):
+    return visit_context(request.META.get("HTTP_USER_AGENT", ""), client_ip(request))
+
+
+def visit_context(user_agent_string, ip):
+    user_agent_string = user_agent_string or ""
+    ua = parse_ua(user_agent_string)
+    return {
+        "ip_address": ip,
+        "user_agent": user_agent_string,
+        "device_type": ua.device_type,
+        "os": ua.os,
+        "browser": ua.browser,
+        "browser_family": ua.browser_family,
+        "is_ios_browser": ua.is_ios_browser,
+    }
+
+
+def _load_site(token: str):
+    site = Site.objects.filter(token=token, is_active=True).first()
+    if site:
+        return site
+
+    # Compatibility path: promote legacy client api_key to Site token once.
+    legacy_client = get_active_client(token)
+    if legacy_client:
+        return Site.objects.create(token=token, domain=legacy_client.name, is_active=True)
+    return None
+
+
+def site_by_token(token: str):
+    return site_cache.get(token, _load_site)
+
+
+def client_by_token(token: str):
+    return get_active_client(token)
+
+
+def safe_url(value: str, fallback: str = "https://tracker.local/") -> str:
+    raw = (value or "").strip()
+    if not raw:
+        return fallback
+    parsed = urlparse(raw)
+    if parsed.scheme and parsed.netloc:
+        return raw
+    return fallback
+
+
+def _query_param(query_dict, key):
+    value = (query_dict.get(key) or [""])[0]
+    value = (value or "").strip()
+    return value or None
+
+
+def pageview_payload_from_url(url: str):
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query or "")
+    return {
+        "pathname": parsed.path or "/",
+        "query_string": parsed.query or None,
+        "utm_source": _query_param(query, "utm_source"),
+        "utm_medium": _query_param(query, "utm_medium"),
+        "utm_campaign": _query_param(query, "utm_campaign"),
+        "utm_term": _query_param(query, "utm_term"),
+        "utm_content": _query_param(query, "utm_content"),
+    }
+
+
+def compose_page_url(page: str, origin: str, fallback: str = "https://tracker.local/") -> str:
+    raw_page = (page or "").strip()
+    if raw_page:
+        parsed = urlparse(raw_page)
+        if parsed.scheme and parsed.netloc:
+            return raw_page
+    base = safe_url(origin, fallback=fallback)
+    if not raw_page:
+        return base
+    return urljoin(base, raw_page)
+
+
+def _visit_scope(site_id) -> str:
+    return f"site:{site_id}"
+
+
+def context_fingerprint(context) -> str:
+    raw = "|".join(f"{key}={context.get(key)}" for key in sorted(context))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def remember_visit(visit, fingerprint) -> None:
+    fields = {
+        "visit_id": visit.id,
+        "visitor_id": visit.visitor_id,
+        "referrer": visit.referrer,
+        "started_at": visit.started_at.isoformat(),
+        "fingerprint": fingerprint,
+    }
+    # Only publish ids that made it to the database.
+    transaction.on_commit(lambda: session_state.update(_visit_scope(visit.site_id), visit.session_id, fields))
+
+
+def _cached_visit(site, session_id, context, fingerprint, *, referrer="", visitor_id=""):
+    """The visit from session state, or None when it is unknown or this hit would change it."""
+    state = session_state.get(_visit_scope(site.id), session_id)
+    if not state.get("visit_id") or state.get("fingerprint") != fingerprint:
+        return None
+    if visitor_id and state.get("visitor_id") != visitor_id:
+        return None
+    if referrer and not state.get("referrer"):
+        return None
+    return Visit(
+        id=int(state["visit_id"]),
+        site=site,
+        session_id=session_id,
+        visitor_id=state.get("visitor_id", ""),
+        referrer=state.get("referrer", ""),
+        started_at=parse_datetime(state["started_at"]),
+        **context,
+    )
+
+
+def _record(site, session_id, context, *, started_at=None, referrer="", visitor_id="", ended_at=None, duration=None, child=None):
+    fingerprint = context_fingerprint(context)
+    visit = None
+    if ended_at is None:
+        visit = _cached_visit(site, session_id, context, fingerprint, referrer=referrer, visitor_id=visitor_id)
+    if visit is not None:
+        child_obj = None
+        if child is not None:
+            child_model, child_values = child
+            child_obj = child_model.objects.create(visit=visit, **child_values)
+    else:
+        visit, child_obj = upsert_visit(
+            site,
+            session_id,
+            context,
+            visitor_id=visitor_id,
+            referrer=referrer,
+            started_at=started_at or timezone.now(),
+            ended_at=ended_at,
+            duration=duration,
+            child=child,
+        )
+        # Warm sessions were counted when their visit was first stored.
+        uniques.record_visit(site.token, visit)
+    # Rewritten on every hit so the hash TTL tracks session inactivity.
+    remember_visit(visit, fingerprint)
+    return visit, child_obj
+
+
+def get_or_create_visit(site, session_id, context, started_at=None, referrer="", visitor_id=""):
+    visit, _ = _record(site, session_id, context, started_at=started_at, referrer=referrer, visitor_id=visitor_id)
+    return visit
+
+
+def record_pageview(site, session_id, context, *, visitor_id="", url, title="", timestamp=None):
+    """Store a pageview, creating or refreshing its visit, in one statement when the session is cold."""
+    return _record(
+        site,
+        session_id,
+        context,
+        visitor_id=visitor_id,
+        child=(PageView, {"url": url, "title": title, "timestamp": timestamp or timezone.now()}),
+    )
+
+
+def record_event(site, session_id, context, *, visitor_id="", event_type, payload, timestamp=None):
+    return _record(
+        site,
+        session_id,
+        context,
+        visitor_id=visitor_id,
+        child=(Event, {"type": event_type, "payload": payload, "timestamp": timestamp or timezone.now()}),
+    )
+
+
+def end_visit(site, session_id, context, *, visitor_id="", ended_at=None, duration=None):
+    visit, _ = _record(
+        site,
+        session_id,
+        context,
+        visitor_id=visitor_id,
+        ended_at=ended_at or timezone.now(),
+        duration=duration,
+    )
+    return visit
+
+
+def latest_analytics_page_view(client, session_id):
+    return latest_page_view(client, session_id)
+
+
+def time_on_page_duration(payload) -> int:
+    try:
+        return int(payload.get("duration_seconds") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_visit_start_mirror(client, *, visitor_id, url, origin, referrer):
+    page_url = safe_url(url or origin or referrer)
+    return AnalyticsEvent(
+        client=client,
+        visitor_id=visitor_id or "",
+        event_type=AnalyticsEvent.EventType.VISIT,
+        page_url=page_url,
+        pathname=url_pathname(page_url),
+    )
+
+
+def build_pageview_mirror(client, visit, *, session_id, visitor_id, url):
+    page_url = safe_url(url)
+    payload = pageview_payload_from_url(page_url)
+    source, channel = classify_source(payload["utm_source"], payload["utm_medium"], visit.referrer, payload["query_string"])
+    return AnalyticsPageView(
+        client=client,
+        visitor_id=visitor_id or "",
+        session_id=session_id,
+        url=page_url,
+        pathname=payload["pathname"],
+        query_string=payload["query_string"],
+        referrer=visit.referrer or None,
+        utm_source=payload["utm_source"],
+        utm_medium=payload["utm_medium"],
+        utm_campaign=payload["utm_campaign"],
+        utm_term=payload["utm_term"],
+        utm_content=payload["utm_content"],
+        source=source,
+        channel=channel,
+    )
+
+
+def build_event_mirror(client, *, event_type, payload, session_id, visitor_id, duration_seconds, latest_page_view, origin):
+    """Return the unsaved analytics_app row mirroring a tracker event, or None.
+
+    ``latest_page_view`` is a callable so the "latest pageview for this session"
+    lookup only runs for the event types that need it.
+    """
+    visitor_id = visitor_id or ""
+    if event_type == "form_submit":
+        page_view = latest_page_view()
+        page_url = safe_url(
+            payload.get("url")
+            or payload.get("page_url")
+            or (page_view.url if page_view else "")
+            or origin
+        )
+        return AnalyticsEvent(
+            client=client,
+            visitor_id=visitor_id,
+            event_type=AnalyticsEvent.EventType.FORM_SUBMIT,
+            element_id=(payload.get("id") or "")[:255],
+            page_url=page_url,
+            pathname=url_pathname(page_url),
+        )
+    if event_type == "click":
+        path = (payload.get("path") or "").strip()
+        if not path:
+            page_view = latest_page_view()
+            path = page_view.pathname if page_view else "/"
+        return AnalyticsClickEvent(
+            client=client,
+            visitor_id=visitor_id,
+            session_id=session_id,
+            page_pathname=path,
+            element_text=((payload.get("text") or "")[:100]),
+            element_id=((payload.get("id") or "")[:255]),
+            element_class=((payload.get("class") or "")[:255]),
+        )
+    if event_type == "time_on_page":
+        page_view = latest_page_view()
+        page = ((payload.get("page") or payload.get("path") or "").strip() or "/")
+        page_url = compose_page_url(
+            page=page,
+            origin=(
+                payload.get("url")
+                or payload.get("page_url")
+                or (page_view.url if page_view else "")
+                or origin
+            ),
+        )
+        return AnalyticsEvent(
+            client=client,
+            visitor_id=visitor_id,
+            event_type=AnalyticsEvent.EventType.TIME_ON_PAGE,
+            element_id=page[:255],
+            page_url=page_url,
+            pathname=url_pathname(page_url),
+            duration_seconds=duration_seconds,
+        )
+    return None
+
+
+def enqueue_form_submit_notification(event, client):
+    try:
+        send_tracker_form_submit_notification_task.delay(event.id, client.id)
+    except Exception:
+        logger.exception(
+            "track.event failed to enqueue telegram form-submit notify event_id=%s client_id=%s",
+            event.id,
+            client.id,
+        )
+
+
+def ingest_batch(site, client, *, session_id, visitor_id, records, context, origin):
+    """Store a validated batch of tracker records for one session.
+
+    The site, client and visit are resolved once; tracker rows and their
+    analytics_app mirrors are written with one ``bulk_create`` per table.
+    """
+    visit_start = next((record for record in records if record["kind"] == "visit_start"), None)
+    visit = get_or_create_visit(
+        site,
+        session_id,
+        context,
+        started_at=(visit_start["data"].get("started_at") if visit_start else None),
+        referrer=((visit_start["data"].get("referrer") or "") if visit_start else ""),
+        visitor_id=visitor_id,
+    )
+
+    pageviews = []
+    events = []
+    mirrors = {AnalyticsEvent: [], AnalyticsPageView: [], AnalyticsClickEvent: []}
+    batch_page_views = []
+    stored_page_view = []
+    ignored = 0
+
+    def latest_page_view():
+        if batch_page_views:
+            return batch_page_views[-1]
+        if not stored_page_view:
+            stored_page_view.append(latest_analytics_page_view(client, session_id))
+        return stored_page_view[0]
+
+    for record in records:
+        kind = record["kind"]
+        data = record["data"]
+        if kind == "visit_start":
+            if client:
+                mirrors[AnalyticsEvent].append(
+                    build_visit_start_mirror(
+                        client,
+                        visitor_id=visitor_id,
+                        url=record["raw"].get("url"),
+                        origin=origin,
+                        referrer=data.get("referrer"),
+                    )
+                )
+        elif kind == "pageview":
+            pageviews.append(
+                PageView(
+                    visit=visit,
+                    url=data["url"],
+                    title=data.get("title", ""),
+                    timestamp=data.get("timestamp") or timezone.now(),
+                )
+            )
+            if client:
+                mirror = build_pageview_mirror(client, visit, session_id=session_id, visitor_id=visitor_id, url=data["url"])
+                mirrors[AnalyticsPageView].append(mirror)
+                batch_page_views.append(mirror)
+        elif kind == "event":
+            event_type = data["type"]
+            payload = data.get("payload") or {}
+            duration_seconds = 0
+            if event_type == "time_on_page":
+                duration_seconds = time_on_page_duration(payload)
+                if duration_seconds <= 0:
+                    ignored += 1
+                    continue
+            events.append(
+                Event(
+                    visit=visit,
+                    type=event_type,
+                    payload=payload,
+                    timestamp=data.get("timestamp") or timezone.now(),
+                )
+            )
+            if client:
+                mirror = build_event_mirror(
+                    client,
+                    event_type=event_type,
+                    payload=payload,
+                    session_id=session_id,
+                    visitor_id=visitor_id,
+                    duration_seconds=duration_seconds,
+                    latest_page_view=latest_page_view,
+                    origin=origin,
+                )
+                if mirror is not None:
+                    mirrors[type(mirror)].append(mirror)
+
+    PageView.objects.bulk_create(pageviews)
+    Event.objects.bulk_create(events)
+    if client:
+        for model, rows in mirrors.items():
+            if not rows:
+                continue
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create(rows)
+                if model is AnalyticsPageView:
+                    remember_page_view(rows[-1])
+            except Exception:
+                logger.exception(
+                    "track.batch failed to mirror analytics rows model=%s count=%s visit_id=%s client_id=%s",
+                    model.__name__,
+                    len(rows),
+                    visit.id,
+                    client.id,
+                )
+        for event in events:
+            if event.type == "form_submit":
+                transaction.on_commit(lambda event=event: enqueue_form_submit_notification(event, client))
+
+    data_version.bump(site.token)
+    logger.info(
+        "track.batch stored visit_id=%s site_id=%s session_id=%s pageviews=%s events=%s ignored=%s",
+        visit.id,
+        site.id,
+        session_id,
+        len(pageviews),
+        len(events),
+        ignored,
+    )
+    return {
+        "visit": visit,
+        "pageviews": pageviews,
+        "events": events,
+        "ignored": ignored,
+    }
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.tenant_cache import site_cache
+from tracker.models import Site
+
+
+@receiver(post_save, sender=Site, dispatch_uid="tracker.invalidate_site_cache_on_save")
+@receiver(post_delete, sender=Site, dispatch_uid="tracker.invalidate_site_cache_on_delete")
+def invalidate_site_cache(sender, instance, **kwargs):
+    site_cache.invalidate(instance.token)
@@ -6,6 +6,7 @@ from celery import shared_task
 from django.utils import timezone
 
 from clients.models import Client
+from core import data_version
 from leads.services import send_telegram_message
 from tracker.models import Event
 
@@ -85,9 +86,32 @@ def send_tracker_form_submit_notification_task(event_id: int, client_id: int) ->
             payload_for_update["telegram_notified_at"] = timezone.now().isoformat()
             event.payload = payload_for_update
             event.save(update_fields=["payload"])
+            data_version.bump(client.api_key)
     except Exception:
         logger.exception(
             "tracker.form_submit telegram notify failed event_id=%s client_id=%s",
             event_id,
             client_id,
         )
+
+
+@shared_task
+def create_partitions_task(ahead: int | None = None) -> dict:
+    from core.partitioning import PARTITIONED_TABLES, ensure_partitions
+
+    created = {table: ensure_partitions(table, ahead=ahead) for table in PARTITIONED_TABLES}
+    logger.info("tracker.partitions ensured created=%s", {table: names for table, names in created.items() if names})
+    return created
+
+
+@shared_task
+def prune_raw_data_task() -> dict:
+    from core.retention import prune_raw_data
+
+    report = prune_raw_data()
+    logger.info(
+        "tracker.retention rows=%s bytes=%s",
+        sum(item["rows"] for item in report.values()),
+        sum(item["bytes"] for item in report.values()),
+    )
+    return report
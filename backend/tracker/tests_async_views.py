@@ -0,0 +1,119 @@
+from unittest.mock import AsyncMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from analytics_app.async_views import AsyncPublicAnalyticsEventCreateView, AsyncPublicEventCreateView
+from analytics_app.models import Event as AnalyticsEvent
+from analytics_app.models import PageView as AnalyticsPageView
+from clients.models import Client
+from core.tenant_cache import client_cache, site_cache
+from tracker.async_views import AsyncPageViewCreateView, AsyncTrackBatchView, AsyncVisitEndView, AsyncVisitStartView
+from tracker.models import PageView, Site, Visit
+
+urlpatterns = [
+    path("api/track/visit-start/", AsyncVisitStartView.as_view()),
+    path("api/track/pageview/", AsyncPageViewCreateView.as_view()),
+    path("api/track/batch/", AsyncTrackBatchView.as_view()),
+    path("api/track/visit-end/", AsyncVisitEndView.as_view()),
+    path("api/public/event/", AsyncPublicEventCreateView.as_view()),
+    path("api/analytics/event/", AsyncPublicAnalyticsEventCreateView.as_view()),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncTrackerViewTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        site_cache.clear_local()
+        client_cache.clear_local()
+        cache.clear()
+
+    def _track(self, endpoint, body):
+        return self.async_client.post(
+            f"/api/track/{endpoint}/",
+            {"token": self.client_obj.api_key, "session_id": "session-1", "visitor_id": "visitor-1", **body},
+            content_type="application/json",
+        )
+
+    async def test_visit_and_pageview_are_stored(self):
+        response = await self._track("visit-start", {"referrer": "https://google.com/"})
+        self.assertEqual(response.status_code, 201)
+        visit_id = response.json()["visit_id"]
+
+        response = await self._track("pageview", {"url": "https://test.local/pricing", "title": "Pricing"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Access-Control-Allow-Origin"], "*")
+
+        response = await self._track("visit-end", {"duration": 30})
+        self.assertEqual(response.json(), {"ok": True, "visit_id": visit_id, "duration": 30})
+
+        self.assertEqual(await Visit.objects.acount(), 1)
+        self.assertEqual(await PageView.objects.filter(visit_id=visit_id).acount(), 1)
+        self.assertEqual(await AnalyticsPageView.objects.filter(client=self.client_obj).acount(), 1)
+
+    async def test_invalid_token_and_body(self):
+        response = await self.async_client.post(
+            "/api/track/pageview/",
+            {"token": "nope", "session_id": "s", "url": "https://test.local/"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {"detail": "Invalid token."})
+
+        response = await self.async_client.post("/api/track/pageview/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        response = await self._track("pageview", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("url", response.json())
+
+    @override_settings(TRACK_INGEST_MODE="stream")
+    async def test_stream_mode_enqueues_without_touching_the_database(self):
+        with patch("tracker.ingest_queue.aenqueue_records", new_callable=AsyncMock) as enqueue:
+            response = await self._track(
+                "batch",
+                {"records": [{"kind": "visit_start"}, {"kind": "pageview", "url": "https://test.local/"}]},
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {"ok": True, "queued": 2})
+        records = enqueue.await_args.args[0]
+        self.assertEqual([record["kind"] for record in records], ["visit_start", "pageview"])
+        self.assertEqual(records[1]["data"]["session_id"], "session-1")
+        self.assertEqual(await Visit.objects.acount(), 0)
+
+    async def test_public_event_requires_api_key(self):
+        response = await self.async_client.post(
+            "/api/public/event/", {"event_type": "visit"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+        response = await self.async_client.post(
+            "/api/public/event/",
+            {"event_type": "visit", "page_url": "https://test.local/"},
+            content_type="application/json",
+            headers={"X-API-KEY": self.client_obj.api_key},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await AnalyticsEvent.objects.filter(id=response.json()["id"]).aexists())
+
+    async def test_analytics_event_is_throttled(self):
+        body = {"event_type": "page_view", "session_id": "s-1", "url": "https://test.local/", "pathname": "/"}
+        rates = {"public_analytics_event": "1/minute"}
+        with patch("rest_framework.throttling.ScopedRateThrottle.THROTTLE_RATES", rates):
+            first = await self.async_client.post(
+                f"/api/analytics/event/?api_key={self.client_obj.api_key}", body, content_type="application/json"
+            )
+            second = await self.async_client.post(
+                f"/api/analytics/event/?api_key={self.client_obj.api_key}", body, content_type="application/json"
+            )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn("Retry-After", second)
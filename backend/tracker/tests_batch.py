@@ -0,0 +1,95 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from analytics_app.models import ClickEvent as AnalyticsClickEvent
+from analytics_app.models import Event as AnalyticsEvent
+from analytics_app.models import PageView as AnalyticsPageView
+from clients.models import Client
+from tracker.models import Event as TrackerEvent
+from tracker.models import PageView, Site, Visit
+
+
+class TrackBatchTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(
+            username="owner",
+            email="owner@example.com",
+            password="pass12345",
+        )
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.http = APIClient()
+
+    def _post(self, records, token=None):
+        return self.http.post(
+            "/api/track/batch/",
+            {
+                "token": token or self.client_obj.api_key,
+                "session_id": "session-1",
+                "visitor_id": "visitor-1",
+                "records": records,
+            },
+            format="json",
+        )
+
+    @patch("tracker.services.send_tracker_form_submit_notification_task.delay")
+    def test_mixed_records_are_stored_for_tracker_and_analytics(self, mocked_task):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(
+                [
+                    {"kind": "visit_start", "referrer": "https://google.com/", "url": "https://test.local/"},
+                    {"kind": "pageview", "url": "https://test.local/pricing?utm_source=vk", "title": "Pricing"},
+                    {"kind": "event", "type": "click", "payload": {"text": "Buy", "id": "buy"}},
+                    {"kind": "event", "type": "time_on_page", "payload": {"page": "/pricing", "duration_seconds": 12}},
+                    {"kind": "event", "type": "time_on_page", "payload": {"page": "/pricing", "duration_seconds": 0}},
+                    {"kind": "event", "type": "form_submit", "payload": {"id": "contact"}},
+                ]
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["pageview_ids"]), 1)
+        self.assertEqual(len(response.data["event_ids"]), 3)
+        self.assertEqual(response.data["ignored"], 1)
+        self.assertEqual(Visit.objects.count(), 1)
+        self.assertEqual(Visit.objects.get().referrer, "https://google.com/")
+        self.assertEqual(PageView.objects.count(), 1)
+        self.assertEqual(TrackerEvent.objects.count(), 3)
+
+        page_view = AnalyticsPageView.objects.get()
+        self.assertEqual(page_view.pathname, "/pricing")
+        self.assertEqual(page_view.utm_source, "vk")
+        self.assertEqual(page_view.referrer, "https://google.com/")
+        self.assertEqual((page_view.source, page_view.channel), ("vk", AnalyticsPageView.Channel.SOCIAL))
+        click = AnalyticsClickEvent.objects.get()
+        self.assertEqual(click.page_pathname, "/pricing")
+        self.assertEqual(click.element_text, "Buy")
+        time_on_page = AnalyticsEvent.objects.get(event_type=AnalyticsEvent.EventType.TIME_ON_PAGE)
+        self.assertEqual(time_on_page.duration_seconds, 12)
+        self.assertEqual(time_on_page.page_url, "https://test.local/pricing")
+        form_submit = AnalyticsEvent.objects.get(event_type=AnalyticsEvent.EventType.FORM_SUBMIT)
+        self.assertEqual(form_submit.page_url, "https://test.local/pricing?utm_source=vk")
+        self.assertTrue(AnalyticsEvent.objects.filter(event_type=AnalyticsEvent.EventType.VISIT).exists())
+        mocked_task.assert_called_once()
+
+    def test_invalid_record_rejects_whole_batch(self):
+        response = self._post(
+            [
+                {"kind": "pageview", "url": "https://test.local/"},
+                {"kind": "pageview"},
+                {"kind": "unknown"},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data["records"].keys()), {1, 2})
+        self.assertEqual(PageView.objects.count(), 0)
+
+    def test_invalid_token_is_rejected(self):
+        response = self._post([{"kind": "pageview", "url": "https://test.local/"}], token="bad-token")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Visit.objects.count(), 0)
@@ -0,0 +1,146 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework.test import APIClient
+
+from clients.models import Client
+from tracker import ingest_queue
+from tracker.models import Event as TrackerEvent
+from tracker.models import PageView, Site, Visit
+
+
+@override_settings(TRACK_INGEST_MODE="stream")
+class TrackIngestQueueTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(
+            username="owner",
+            email="owner@example.com",
+            password="pass12345",
+        )
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.http = APIClient()
+
+    def _entry(self, entry_id, kind, ip="127.0.0.1", user_agent="Mozilla/5.0", origin="https://test.local", **data):
+        record = ingest_queue.build_record(
+            kind,
+            {"token": self.client_obj.api_key, "session_id": "session-1", **data},
+            ip=ip,
+            user_agent=user_agent,
+            origin=origin,
+        )
+        return entry_id, {b"record": json.dumps(record).encode("utf-8")}
+
+    @patch("tracker.views.ingest_queue.enqueue_records")
+    def test_pageview_is_queued_with_202(self, enqueue_records):
+        response = self.http.post(
+            "/api/track/pageview/",
+            {"token": self.client_obj.api_key, "session_id": "session-1", "url": "https://test.local/"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["queued"], 1)
+        record = enqueue_records.call_args.args[0][0]
+        self.assertEqual(record["kind"], "pageview")
+        self.assertEqual(record["data"]["url"], "https://test.local/")
+        self.assertEqual(PageView.objects.count(), 0)
+
+    @patch("tracker.views.ingest_queue.enqueue_records", side_effect=RedisConnectionError("down"))
+    def test_redis_failure_falls_back_to_sync_write(self, _enqueue_records):
+        response = self.http.post(
+            "/api/track/pageview/",
+            {"token": self.client_obj.api_key, "session_id": "session-1", "url": "https://test.local/"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(PageView.objects.count(), 1)
+
+    def test_invalid_token_is_rejected_before_queueing(self):
+        response = self.http.post(
+            "/api/track/pageview/",
+            {"token": "missing", "session_id": "session-1", "url": "https://test.local/"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_process_entries_stores_valid_and_dead_letters_invalid(self):
+        conn = MagicMock()
+        entries = [
+            self._entry(b"1-0", "visit_start", visitor_id="visitor-1"),
+            self._entry(b"2-0", "pageview", url="https://test.local/pricing"),
+            self._entry(b"3-0", "event", type="click", payload={"path": "/pricing"}),
+            self._entry(b"4-0", "pageview"),
+            self._entry(b"5-0", "visit_end", duration=42),
+        ]
+
+        result = ingest_queue.process_entries(conn, entries)
+
+        self.assertEqual(result, {"acked": 4, "dead_lettered": 1, "failed": 0})
+        visit = Visit.objects.get(site=self.site, session_id="session-1")
+        self.assertEqual(visit.visitor_id, "visitor-1")
+        self.assertEqual(visit.duration, 42)
+        self.assertEqual(PageView.objects.filter(visit=visit).count(), 1)
+        self.assertEqual(TrackerEvent.objects.filter(visit=visit).count(), 1)
+        conn.xack.assert_called_once_with("tracker:ingest", "tracker-ingest", b"1-0", b"2-0", b"3-0", b"5-0")
+        dead_pipe = conn.pipeline.return_value
+        self.assertEqual(dead_pipe.xadd.call_args.args[0], "tracker:ingest:dead")
+        self.assertEqual(dead_pipe.xadd.call_args.args[1]["source_id"], b"4-0")
+
+    @patch("tracker.ingest_queue.ingest_batch")
+    def test_each_record_keeps_the_context_it_was_sent_with(self, ingest_batch):
+        entries = [
+            self._entry(b"1-0", "pageview", url="https://test.local/"),
+            self._entry(b"2-0", "pageview", url="https://test.local/a", ip="10.0.0.2", origin="https://other.local"),
+            self._entry(b"3-0", "pageview", url="https://test.local/b", ip="10.0.0.2", origin="https://other.local"),
+            self._entry(b"4-0", "pageview", url="https://test.local/c"),
+        ]
+
+        result = ingest_queue.process_entries(MagicMock(), entries)
+
+        self.assertEqual(result, {"acked": 4, "dead_lettered": 0, "failed": 0})
+        calls = [
+            (call.kwargs["context"]["ip_address"], call.kwargs["origin"], len(call.kwargs["records"]))
+            for call in ingest_batch.call_args_list
+        ]
+        self.assertEqual(
+            calls,
+            [
+                ("127.0.0.1", "https://test.local", 1),
+                ("10.0.0.2", "https://other.local", 2),
+                ("127.0.0.1", "https://test.local", 1),
+            ],
+        )
+
+    @patch("tracker.ingest_queue.ingest_batch", side_effect=RuntimeError("db down"))
+    def test_failed_session_is_left_pending(self, _ingest_batch):
+        conn = MagicMock()
+
+        result = ingest_queue.process_entries(conn, [self._entry(b"1-0", "pageview", url="https://test.local/")])
+
+        self.assertEqual(result, {"acked": 0, "dead_lettered": 0, "failed": 1})
+        conn.xack.assert_not_called()
+
+    def test_reclaim_reads_delivery_counts_past_the_first_pending_page(self):
+        conn = MagicMock()
+        entries = [
+            self._entry(b"2-0", "pageview", url="https://test.local/"),
+            self._entry(b"4-0", "pageview", url="https://test.local/pricing"),
+        ]
+        conn.xautoclaim.return_value = [b"0-0", entries, []]
+        conn.xpending_range.side_effect = [
+            [{"message_id": b"2-0", "times_delivered": 2}, {"message_id": b"3-0", "times_delivered": 1}],
+            [{"message_id": b"4-0", "times_delivered": 9}],
+        ]
+
+        result = ingest_queue.reclaim_stale(conn, "consumer-1", count=2)
+
+        self.assertEqual(result, {"read": 2, "acked": 1, "dead_lettered": 1, "failed": 0})
+        self.assertEqual(conn.xpending_range.call_args_list[1].kwargs["min"], "(3-0")
+        self.assertEqual(conn.xpending_range.call_args_list[1].kwargs["max"], "4-0")
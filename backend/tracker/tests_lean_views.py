@@ -0,0 +1,183 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from analytics_app.lean_views import LeanPublicAnalyticsEventCreateView
+from analytics_app.schemas import PUBLIC_ANALYTICS_EVENT, PUBLIC_EVENT
+from analytics_app.views import PublicAnalyticsEventCreateView
+from clients.models import Client
+from core.schema import Invalid
+from core.tenant_cache import client_cache, site_cache
+from tracker import lean_views, views
+from tracker.models import Site
+from tracker.schemas import SCHEMAS
+
+BASE = {"token": "tok", "session_id": "s-1"}
+
+TRACK_PAYLOADS = {
+    "visit_start": [
+        {**BASE, "visitor_id": "v-1", "referrer": "https://google.com/", "started_at": "2024-05-01T10:00:00+03:00"},
+        {**BASE, "referrer": None, "started_at": "2024-05-01T10:00:00"},
+        {**BASE, "visitor_id": "  v-2  ", "referrer": ""},
+        {**BASE, "started_at": "yesterday"},
+        {**BASE, "started_at": 1714557600},
+        {"session_id": "s-1"},
+        {**BASE, "token": ""},
+        {**BASE, "token": "   "},
+        {**BASE, "token": None},
+        {**BASE, "session_id": "x" * 65},
+    ],
+    "pageview": [
+        {**BASE, "url": "https://example.com/", "title": "Home", "timestamp": "2024-05-01T07:00:00Z"},
+        {**BASE, "url": "https://example.com/", "title": ""},
+        {**BASE, "url": 42},
+        {**BASE, "url": True},
+        {**BASE, "url": ["https://example.com/"]},
+        {**BASE, "url": "https://example.com/", "title": "t" * 513},
+        {**BASE},
+    ],
+    "event": [
+        {**BASE, "type": "click", "payload": {"text": "Buy"}},
+        {**BASE, "type": "time_on_page", "payload": {"duration_seconds": 12}, "timestamp": "2024-05-01"},
+        {**BASE, "type": "click", "payload": None},
+        {**BASE, "type": "click", "payload": [1, 2]},
+        {**BASE, "type": ""},
+    ],
+    "visit_end": [
+        {**BASE, "duration": 30, "ended_at": "2024-05-01T10:00:30Z"},
+        {**BASE, "duration": "30"},
+        {**BASE, "duration": 30.0},
+        {**BASE, "duration": -1},
+        {**BASE, "duration": True},
+    ],
+    "batch": [
+        {**BASE, "records": [{"kind": "visit_start"}, {"kind": "pageview", "url": "https://example.com/"}]},
+        {**BASE, "records": [{"kind": "event", "type": "click", "token": "other"}]},
+        {**BASE, "records": [{"kind": "visit_end"}]},
+        {**BASE, "records": [{"kind": "pageview"}, "nope"]},
+        {**BASE, "records": []},
+        {**BASE, "records": {"kind": "pageview"}},
+        {**BASE, "records": [{"kind": "pageview", "url": "https://example.com/"}] * 101},
+    ],
+}
+
+ANALYTICS_PAYLOADS = [
+    {"event_type": "page_view", "session_id": "s-1", "url": "https://example.com/a?b=c", "pathname": "/a"},
+    {"event_type": "session_end", "session_id": "s-1", "duration_seconds": 12, "max_scroll_depth": 80},
+    {"event_type": "click_event", "session_id": "s-1", "element_text": "Buy", "referrer": None},
+    {"event_type": "page_view", "session_id": "s-1", "url": "not a url"},
+    {"event_type": "page_view", "session_id": "s-1", "max_scroll_depth": 101},
+    {"event_type": "unknown", "session_id": "s-1"},
+    {"event_type": "", "session_id": "s-1"},
+    {"session_id": "s-1"},
+]
+
+PUBLIC_EVENT_PAYLOADS = [
+    {"event_type": "visit", "page_url": "https://example.com/", "visitor_id": "v-1"},
+    {"event_type": "click", "page_url": "https://example.com/", "element_id": None, "utm_source": "vk"},
+    {"event_type": "nope", "page_url": "https://example.com/"},
+    {"event_type": "visit", "page_url": "example"},
+]
+
+
+def _dump(value):
+    return json.loads(json.dumps(value, default=str, sort_keys=True))
+
+
+class CompiledSerializerTests(SimpleTestCase):
+    def assertSameAsSerializer(self, schema, payload):
+        serializer = schema.serializer_class(data=payload)
+        valid = serializer.is_valid()
+        data, errors = schema.validate(payload)
+        if valid:
+            self.assertIsNone(errors, payload)
+            self.assertEqual(_dump(data), _dump(serializer.validated_data), payload)
+        else:
+            self.assertIsNone(data, payload)
+            self.assertEqual(_dump(errors), _dump(serializer.errors), payload)
+        try:
+            fast = schema.fast_validate(payload)
+        except Invalid:
+            return False
+        self.assertTrue(valid, payload)
+        self.assertEqual(_dump(fast), _dump(serializer.validated_data), payload)
+        return True
+
+    def test_tracker_schemas_match_serializers(self):
+        for kind, payloads in TRACK_PAYLOADS.items():
+            for index, payload in enumerate(payloads):
+                with self.subTest(kind=kind, payload=payload):
+                    fast = self.assertSameAsSerializer(SCHEMAS[kind], payload)
+                    if index == 0:
+                        self.assertTrue(fast, "the common beacon shape must take the fast path")
+
+    def test_analytics_schemas_match_serializers(self):
+        for payload in ANALYTICS_PAYLOADS:
+            with self.subTest(payload=payload):
+                self.assertSameAsSerializer(PUBLIC_ANALYTICS_EVENT, payload)
+        for payload in PUBLIC_EVENT_PAYLOADS:
+            with self.subTest(payload=payload):
+                self.assertSameAsSerializer(PUBLIC_EVENT, payload)
+
+
+class LeanViewResponseTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=user, name="Test Client")
+        Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        site_cache.clear_local()
+        client_cache.clear_local()
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def _call(self, view_class, path, body, content_type="application/json"):
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        response = view_class.as_view()(self.factory.post(path, body, content_type=content_type))
+        if hasattr(response, "render"):
+            response.render()
+        return response.status_code, json.loads(response.content)
+
+    def assertSameResponse(self, drf_view, lean_view, path, body, **kwargs):
+        drf = self._call(drf_view, path, body, **kwargs)
+        lean = self._call(lean_view, path, body, **kwargs)
+        # Ids differ between the two writes; compare the response shape instead.
+        for response in (drf, lean):
+            for key in ("visit_id", "pageview_id", "event_id", "id"):
+                if isinstance(response[1], dict) and isinstance(response[1].get(key), int):
+                    response[1][key] = "<id>"
+        self.assertEqual(drf, lean, body)
+
+    def test_track_views_respond_like_drf(self):
+        token = self.client_obj.api_key
+        cases = [
+            (views.VisitStartView, lean_views.LeanVisitStartView, {"token": token, "session_id": "s-1"}),
+            (views.PageViewCreateView, lean_views.LeanPageViewCreateView, {"token": token, "session_id": "s-1", "url": "https://test.local/"}),
+            (views.PageViewCreateView, lean_views.LeanPageViewCreateView, {"token": token, "session_id": "s-1"}),
+            (views.PageViewCreateView, lean_views.LeanPageViewCreateView, {"token": "nope", "session_id": "s-1", "url": "u"}),
+            (views.EventCreateView, lean_views.LeanEventCreateView, {"token": token, "session_id": "s-1", "type": "time_on_page"}),
+            (views.VisitEndView, lean_views.LeanVisitEndView, {"token": token, "session_id": "s-1", "duration": 5}),
+        ]
+        for drf_view, lean_view, body in cases:
+            with self.subTest(view=lean_view.__name__, body=body):
+                self.assertSameResponse(drf_view, lean_view, "/api/track/", body)
+
+        self.assertSameResponse(views.PageViewCreateView, lean_views.LeanPageViewCreateView, "/api/track/", "{nope")
+        self.assertSameResponse(
+            views.PageViewCreateView,
+            lean_views.LeanPageViewCreateView,
+            "/api/track/",
+            f"token={token}&session_id=s-1&url=https%3A%2F%2Ftest.local%2F",
+            content_type="application/x-www-form-urlencoded",
+        )
+
+    def test_analytics_event_responds_like_drf(self):
+        path = f"/api/analytics/event/?api_key={self.client_obj.api_key}"
+        for body in ANALYTICS_PAYLOADS[:1] + ANALYTICS_PAYLOADS[3:]:
+            with self.subTest(body=body):
+                self.assertSameResponse(PublicAnalyticsEventCreateView, LeanPublicAnalyticsEventCreateView, path, body)
+        self.assertSameResponse(
+            PublicAnalyticsEventCreateView, LeanPublicAnalyticsEventCreateView, "/api/analytics/event/", ANALYTICS_PAYLOADS[0]
+        )
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from analytics_app.models import PageView
+from analytics_app.services.periods import default_period_days, period_bounds
+from clients.models import Client
+from core.partitioning import (
+    PARTITIONED_TABLES,
+    add_months,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    partition_name,
+    partitions,
+)
+
+
+class PartitionNamingTests(SimpleTestCase):
+    def test_month_start_uses_utc(self):
+        moscow = dt_timezone(timedelta(hours=3))
+        value = datetime(2026, 3, 1, 1, 30, tzinfo=moscow)
+        self.assertEqual(month_start(value), datetime(2026, 2, 1, tzinfo=dt_timezone.utc))
+
+    def test_add_months_crosses_years(self):
+        start = datetime(2026, 11, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(add_months(start, 2), datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(add_months(start, -11), datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+
+    def test_partition_name(self):
+        start = datetime(2026, 4, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(partition_name("tracker_event", start), "tracker_event_p202604")
+
+
+@skipUnless(connection.vendor == "postgresql", "partitioning is Postgres only")
+class PartitionedTablesTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="owner", email="owner@example.com", password="pass12345")
+        self.client_obj = Client.objects.create(owner=user, name="Test Client")
+
+    def test_hit_tables_are_partitioned_ahead(self):
+        ensure_partitions("tracker_pageview", ahead=2)
+        with connection.cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                self.assertTrue(is_partitioned(cursor, table), table)
+            names = [name for name, _, _ in partitions(cursor, "tracker_pageview")]
+        last = add_months(month_start(timezone.now()), 2)
+        self.assertIn(partition_name("tracker_pageview", last), names)
+
+    def test_ensure_partitions_is_idempotent(self):
+        ensure_partitions("tracker_event", ahead=1)
+        self.assertEqual(ensure_partitions("tracker_event", ahead=1), [])
+
+    def test_rows_in_default_partition_move_to_new_month(self):
+        future = add_months(month_start(timezone.now()), 12)
+        view = PageView.objects.create(
+            client=self.client_obj, session_id="s1", url="https://example.com/", pathname="/"
+        )
+        PageView.objects.filter(pk=view.pk).update(created_at=future + timedelta(days=3))
+
+        created = ensure_partitions("analytics_app_pageview", ahead=12)
+
+        self.assertIn(partition_name("analytics_app_pageview", future), created)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {partition_name('analytics_app_pageview', future)}")
+            self.assertEqual(cursor.fetchall(), [(view.pk,)])
+
+    def test_default_period_prunes_partitions(self):
+        ensure_partitions("analytics_app_pageview", since=add_months(month_start(timezone.now()), -6))
+        from_dt, to_dt = period_bounds(*default_period_days())
+        queryset = PageView.objects.filter(client=self.client_obj, created_at__gte=from_dt, created_at__lte=to_dt)
+
+        plan = queryset.explain()
+
+        with connection.cursor() as cursor:
+            scanned = {name for name, _, _ in partitions(cursor, "analytics_app_pageview") if name in plan}
+        self.assertLessEqual(len(scanned), 2, plan)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analytics_app.models import PageView
+from clients.models import Client
+from core.retention import prune_raw_data
+from subscriptions.models import Subscription, SubscriptionPlan
+from telegram_logs.models import TelegramUpdateLog
+from tracker.models import PageView as TrackerPageView
+from tracker.models import Site, Visit
+
+
+@override_settings(
+    RETENTION_RAW_DAYS=90,
+    RETENTION_TELEGRAM_LOG_DAYS=30,
+    RETENTION_CHUNK_SIZE=2,
+    RETENTION_CHUNK_PAUSE=0,
+)
+class RetentionTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.client_obj = Client.objects.create(
+            owner=user_model.objects.create_user(username="owner", email="owner@example.com", password="pass12345"),
+            name="Test Client",
+        )
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.now = timezone.now()
+
+    def _page_view(self, client, days_ago):
+        view = PageView.objects.create(client=client, session_id="s1", url="https://test.local/", pathname="/")
+        PageView.objects.filter(pk=view.pk).update(created_at=self.now - timedelta(days=days_ago))
+        return view
+
+    def _visit(self, session_id, days_ago, pageview_days_ago=()):
+        visit = Visit.objects.create(site=self.site, session_id=session_id, started_at=self.now - timedelta(days=days_ago))
+        for ago in pageview_days_ago:
+            TrackerPageView.objects.create(visit=visit, url="https://test.local/", timestamp=self.now - timedelta(days=ago))
+        return visit
+
+    def test_old_rows_are_deleted_in_chunks(self):
+        old = [self._page_view(self.client_obj, 120) for _ in range(5)]
+        recent = self._page_view(self.client_obj, 10)
+
+        report = prune_raw_data()
+
+        self.assertEqual(report["analytics_app_pageview"]["rows"], len(old))
+        self.assertEqual(list(PageView.objects.values_list("pk", flat=True)), [recent.pk])
+
+    def test_plan_retention_overrides_default(self):
+        plan = SubscriptionPlan.objects.create(name="Pro", price=1, duration_days=30, retention_days=365)
+        Subscription.objects.create(
+            client=self.client_obj, plan=plan, status=Subscription.Status.ACTIVE, paid_until=self.now + timedelta(days=10)
+        )
+        other = Client.objects.create(
+            owner=get_user_model().objects.create_user(username="other", email="other@example.com", password="pass12345"),
+            name="Other Client",
+        )
+        kept = self._page_view(self.client_obj, 200)
+        self._page_view(other, 200)
+
+        prune_raw_data()
+
+        self.assertEqual(list(PageView.objects.values_list("pk", flat=True)), [kept.pk])
+
+    def test_expired_plan_falls_back_to_default(self):
+        plan = SubscriptionPlan.objects.create(name="Pro", price=1, duration_days=30, retention_days=365)
+        Subscription.objects.create(
+            client=self.client_obj, plan=plan, status=Subscription.Status.EXPIRED, paid_until=self.now - timedelta(days=1)
+        )
+        self._page_view(self.client_obj, 200)
+
+        prune_raw_data()
+
+        self.assertFalse(PageView.objects.exists())
+
+    def test_visit_is_kept_while_it_has_recent_hits(self):
+        expired = self._visit("old", 120, pageview_days_ago=(120, 119))
+        active = self._visit("long", 95, pageview_days_ago=(95, 5))
+
+        prune_raw_data()
+
+        self.assertFalse(Visit.objects.filter(pk=expired.pk).exists())
+        self.assertTrue(Visit.objects.filter(pk=active.pk).exists())
+        self.assertEqual(TrackerPageView.objects.filter(visit=active).count(), 1)
+
+    def test_telegram_logs_use_their_own_retention(self):
+        log = TelegramUpdateLog.objects.create(update_id=1)
+        TelegramUpdateLog.objects.filter(pk=log.pk).update(created_at=self.now - timedelta(days=45))
+
+        prune_raw_data(tables=["telegram_logs_telegramupdatelog"])
+
+        self.assertFalse(TelegramUpdateLog.objects.exists())
+
+    def test_dry_run_deletes_nothing(self):
+        self._page_view(self.client_obj, 120)
+
+        report = prune_raw_data(dry_run=True)
+
+        self.assertEqual(report["analytics_app_pageview"]["rows"], 1)
+        self.assertEqual(PageView.objects.count(), 1)
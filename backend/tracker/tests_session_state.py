@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from analytics_app.models import ClickEvent as AnalyticsClickEvent
+from clients.models import Client
+from core.session_state import session_state
+from tracker.models import PageView, Site, Visit
+
+
+class FakeRedis:
+    """Just enough of the hash commands used by core.session_state."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return {k.encode(): v.encode() for k, v in self.hashes.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+
+class SessionStateTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(
+            username="owner",
+            email="owner@example.com",
+            password="pass12345",
+        )
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+        self.http = APIClient()
+        self.redis = FakeRedis()
+        patcher = patch("core.session_state.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        session_state.resume()
+
+    def _post(self, path, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.http.post(
+                path,
+                {"token": self.client_obj.api_key, "session_id": "session-1", **payload},
+                format="json",
+                HTTP_USER_AGENT="Mozilla/5.0 (X11; Linux x86_64)",
+            )
+
+    def test_warm_session_skips_visit_and_latest_pageview_lookups(self):
+        self._post("/api/track/visit-start/", {"visitor_id": "visitor-1"})
+        self._post("/api/track/pageview/", {"url": "https://test.local/pricing"})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._post("/api/track/event/", {"type": "click", "payload": {"text": "Buy"}})
+
+        self.assertEqual(response.status_code, 201)
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        self.assertNotIn('FROM "tracker_visit"', sql)
+        self.assertNotIn('FROM "analytics_app_pageview"', sql)
+        self.assertEqual(Visit.objects.count(), 1)
+        self.assertEqual(AnalyticsClickEvent.objects.get().page_pathname, "/pricing")
+
+    def test_cold_state_falls_back_to_database(self):
+        self._post("/api/track/pageview/", {"url": "https://test.local/a"})
+        self.redis.hashes.clear()
+
+        response = self._post("/api/track/pageview/", {"url": "https://test.local/b"})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Visit.objects.count(), 1)
+        self.assertEqual(PageView.objects.count(), 2)
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from clients.models import Client
+from clients.tenancy import get_active_client
+from core.tenant_cache import client_cache, site_cache
+from tracker.models import Site
+from tracker.services import client_by_token, site_by_token
+
+
+class TenantCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        client_cache.clear_local()
+        site_cache.clear_local()
+        user_model = get_user_model()
+        self.user = user_model.objects.create_user(
+            username="owner",
+            email="owner@example.com",
+            password="pass12345",
+        )
+        self.client_obj = Client.objects.create(owner=self.user, name="Test Client")
+        self.site = Site.objects.create(token=self.client_obj.api_key, domain="test.local", is_active=True)
+
+    def test_steady_state_resolution_needs_no_queries(self):
+        site_by_token(self.site.token)
+        client_by_token(self.client_obj.api_key)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(site_by_token(self.site.token).id, self.site.id)
+            self.assertEqual(client_by_token(self.client_obj.api_key).id, self.client_obj.id)
+
+    def test_shared_tier_is_used_after_local_miss(self):
+        site_by_token(self.site.token)
+        site_cache.clear_local()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(site_by_token(self.site.token).id, self.site.id)
+
+    def test_invalid_token_is_negatively_cached(self):
+        self.assertIsNone(site_by_token("missing-token"))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(site_by_token("missing-token"))
+            self.assertIsNone(get_active_client("missing-token"))
+
+    def test_deactivation_invalidates_cached_entries(self):
+        get_active_client(self.client_obj.api_key)
+        site_by_token(self.site.token)
+
+        self.client_obj.is_active = False
+        self.client_obj.save()
+        self.site.is_active = False
+        self.site.save()
+
+        self.assertIsNone(get_active_client(self.client_obj.api_key))
+        self.assertIsNone(site_by_token(self.site.token))
+
+    def test_delete_invalidates_cached_site(self):
+        site_by_token(self.site.token)
+        token = self.site.token
+        self.site.delete()
+        self.client_obj.is_active = False
+        self.client_obj.save()
+
+        self.assertIsNone(site_by_token(token))
+
+    def test_new_site_clears_negative_entry(self):
+        self.assertIsNone(site_by_token("fresh-token"))
+        site = Site.objects.create(token="fresh-token", domain="fresh.local", is_active=True)
+
+        self.assertEqual(site_by_token("fresh-token").id, site.id)
+
+    def test_cached_instances_are_copies(self):
+        first = get_active_client(self.client_obj.api_key)
+        first.name = "Changed in request"
+
+        self.assertEqual(get_active_client(self.client_obj.api_key).name, "Test Client")
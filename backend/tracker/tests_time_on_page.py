@@ -43,6 +43,7 @@ class TrackTimeOnPageEventTests(TestCase):
         self.assertEqual(analytics_event.duration_seconds, 7)
         self.assertEqual(analytics_event.element_id, "/pricing")
         self.assertEqual(analytics_event.page_url, "https://tracker.local/pricing")
+        self.assertEqual(analytics_event.pathname, "/pricing")
 
     def test_time_on_page_event_is_ignored_when_duration_is_invalid(self):
         response = self.http.post(
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from tracker.management.commands.bench_ua_parsing import build_corpus
+from tracker.user_agent import FAST_PATH, _parse, parse_ua, reset_ua_cache, ua_cache_stats
+
+
+class UserAgentParsingTests(SimpleTestCase):
+    def setUp(self):
+        reset_ua_cache()
+
+    def test_fast_path_agrees_with_full_parser(self):
+        matched = 0
+        for user_agent in set(build_corpus(2000)):
+            for pattern, info in FAST_PATH:
+                if pattern.fullmatch(user_agent):
+                    matched += 1
+                    self.assertEqual(info, _parse(user_agent), user_agent)
+        self.assertGreater(matched, 0)
+
+    def test_cached_result_matches_full_parser(self):
+        for user_agent in set(build_corpus(500)):
+            self.assertEqual(parse_ua(user_agent), _parse(user_agent), user_agent)
+
+    def test_repeated_user_agents_hit_cache(self):
+        user_agent = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+        parse_ua(user_agent)
+        parse_ua(user_agent)
+        parse_ua("Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0")
+
+        stats = ua_cache_stats()
+        self.assertEqual(stats["fast_path_hits"], 1)
+        self.assertEqual(stats["lru_hits"], 1)
+        self.assertEqual(stats["lru_misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3, places=3)
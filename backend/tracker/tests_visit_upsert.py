@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tracker.models import Event, PageView, Site, Visit
+from tracker.services import end_visit, get_or_create_visit, record_event, record_pageview, visit_context
+
+
+@skipUnless(connection.vendor == "postgresql", "ON CONFLICT upsert path is PostgreSQL-only")
+class VisitUpsertTests(TestCase):
+    def setUp(self):
+        self.site = Site.objects.create(domain="test.local", is_active=True)
+        self.context = visit_context("Mozilla/5.0 (X11; Linux x86_64) Firefox/125.0", "10.0.0.1")
+
+    def test_cold_pageview_is_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            visit, pageview = record_pageview(self.site, "session-1", self.context, url="https://test.local/")
+
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn("ON CONFLICT", queries.captured_queries[0]["sql"])
+        self.assertEqual(PageView.objects.get().visit_id, visit.id)
+        self.assertEqual(pageview.visit_id, visit.id)
+
+    def test_repeated_hits_update_the_same_visit(self):
+        first = get_or_create_visit(self.site, "session-1", self.context, referrer="https://ya.ru/")
+        other_context = {**self.context, "ip_address": "10.0.0.2", "os": None}
+        second, event = record_event(
+            self.site,
+            "session-1",
+            other_context,
+            visitor_id="visitor-1",
+            event_type="click",
+            payload={"text": "Buy"},
+        )
+
+        self.assertEqual(first.id, second.id)
+        visit = Visit.objects.get()
+        self.assertEqual(visit.visitor_id, "visitor-1")
+        self.assertEqual(visit.referrer, "https://ya.ru/")
+        self.assertEqual(visit.ip_address, "10.0.0.2")
+        self.assertEqual(visit.os, self.context["os"])
+        self.assertEqual(Event.objects.get().payload, {"text": "Buy"})
+
+    def test_end_visit_measures_duration_from_stored_start(self):
+        started_at = timezone.now() - timedelta(seconds=90)
+        get_or_create_visit(self.site, "session-1", self.context, started_at=started_at)
+
+        visit = end_visit(self.site, "session-1", self.context, ended_at=started_at + timedelta(seconds=75))
+
+        self.assertEqual(visit.duration, 75)
+        self.assertEqual(Visit.objects.get().duration, 75)
+
+    def test_session_is_unique_per_site(self):
+        Visit.objects.create(site=self.site, session_id="session-1")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Visit.objects.create(site=self.site, session_id="session-1")
@@ -1,11 +1,39 @@
+from django.conf import settings
 from django.urls import path
 
-from tracker.views import EventCreateView, PageViewCreateView, TrackStatsView, VisitEndView, VisitStartView
+from tracker import async_views, lean_views, views
+
+# Implementation of each write endpoint for every TRACK_API_VIEWS setting.
+WRITE_VIEWS = {
+    "drf": {
+        "visit_start": views.VisitStartView,
+        "pageview": views.PageViewCreateView,
+        "event": views.EventCreateView,
+        "batch": views.TrackBatchView,
+        "visit_end": views.VisitEndView,
+    },
+    "lean": {
+        "visit_start": lean_views.LeanVisitStartView,
+        "pageview": lean_views.LeanPageViewCreateView,
+        "event": lean_views.LeanEventCreateView,
+        "batch": lean_views.LeanTrackBatchView,
+        "visit_end": lean_views.LeanVisitEndView,
+    },
+    "async": {
+        "visit_start": async_views.AsyncVisitStartView,
+        "pageview": async_views.AsyncPageViewCreateView,
+        "event": async_views.AsyncEventCreateView,
+        "batch": async_views.AsyncTrackBatchView,
+        "visit_end": async_views.AsyncVisitEndView,
+    },
+}
+write_views = WRITE_VIEWS.get(settings.TRACK_API_VIEWS, WRITE_VIEWS["drf"])
 
 urlpatterns = [
-    path("visit-start/", VisitStartView.as_view(), name="track_visit_start"),
-    path("pageview/", PageViewCreateView.as_view(), name="track_pageview"),
-    path("event/", EventCreateView.as_view(), name="track_event"),
-    path("visit-end/", VisitEndView.as_view(), name="track_visit_end"),
-    path("stats/", TrackStatsView.as_view(), name="track_stats"),
+    path("visit-start/", write_views["visit_start"].as_view(), name="track_visit_start"),
+    path("pageview/", write_views["pageview"].as_view(), name="track_pageview"),
+    path("event/", write_views["event"].as_view(), name="track_event"),
+    path("batch/", write_views["batch"].as_view(), name="track_batch"),
+    path("visit-end/", write_views["visit_end"].as_view(), name="track_visit_end"),
+    path("stats/", views.TrackStatsView.as_view(), name="track_stats"),
 ]
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from user_agents import parse as parse_user_agent
+
+logger = logging.getLogger(__name__)
+
+UserAgentInfo = namedtuple("UserAgentInfo", ["device_type", "os", "browser", "browser_family", "is_ios_browser"])
+
+UNKNOWN = UserAgentInfo(None, None, None, None, False)
+
+# Exact shapes of the most common browser UAs, each checked against
+# user_agents.parse in tests_user_agent. Anything with an extra token
+# (Edg/, OPR/, YaBrowser/, in-app browsers ...) falls through to the full parser.
+FAST_PATH = (
+    (
+        re.compile(
+            r"Mozilla/5\.0 \(Windows NT [\d.]+; Win64; x64\) AppleWebKit/537\.36 "
+            r"\(KHTML, like Gecko\) Chrome/[\d.]+ Safari/537\.36"
+        ),
+        UserAgentInfo("desktop", "Windows", "Chrome", "Chrome", False),
+    ),
+    (
+        re.compile(
+            r"Mozilla/5\.0 \(Macintosh; Intel Mac OS X [\d_]+\) AppleWebKit/537\.36 "
+            r"\(KHTML, like Gecko\) Chrome/[\d.]+ Safari/537\.36"
+        ),
+        UserAgentInfo("desktop", "Mac OS X", "Chrome", "Chrome", False),
+    ),
+    (
+        re.compile(
+            r"Mozilla/5\.0 \(Linux; Android [\d.]+; K\) AppleWebKit/537\.36 "
+            r"\(KHTML, like Gecko\) Chrome/[\d.]+ Mobile Safari/537\.36"
+        ),
+        UserAgentInfo("mobile", "Android", "Chrome Mobile", "Chrome Mobile", False),
+    ),
+    (
+        re.compile(
+            r"Mozilla/5\.0 \(iPhone; CPU iPhone OS [\d_]+ like Mac OS X\) AppleWebKit/[\d.]+ "
+            r"\(KHTML, like Gecko\) Version/[\d.]+ Mobile/\w+ Safari/[\d.]+"
+        ),
+        UserAgentInfo("mobile", "iOS", "Mobile Safari", "Mobile Safari", True),
+    ),
+    (
+        re.compile(r"Mozilla/5\.0 \(Windows NT [\d.]+; Win64; x64; rv:[\d.]+\) Gecko/20100101 Firefox/[\d.]+"),
+        UserAgentInfo("desktop", "Windows", "Firefox", "Firefox", False),
+    ),
+)
+
+_fast_path_hits = 0
+_shared_hits = 0
+
+
+def _parse(user_agent_string: str) -> UserAgentInfo:
+    try:
+        ua = parse_user_agent(user_agent_string)
+        if ua.is_mobile:
+            device_type = "mobile"
+        elif ua.is_tablet:
+            device_type = "tablet"
+        else:
+            device_type = "desktop"
+        return UserAgentInfo(
+            device_type,
+            ua.os.family or None,
+            ua.browser.family or None,
+            ua.browser.family or None,
+            (ua.os.family or "") == "iOS",
+        )
+    except Exception:
+        return UNKNOWN
+
+
+def _shared_key(user_agent_string: str) -> str:
+    return "ua:" + hashlib.sha1(user_agent_string.encode("utf-8")).hexdigest()
+
+
+def _parse_shared(user_agent_string: str) -> UserAgentInfo:
+    global _shared_hits
+    key = _shared_key(user_agent_string)
+    try:
+        cached = cache.get(key)
+    except Exception:
+        logger.exception("ua cache read failed")
+        cached = None
+    if cached is not None:
+        _shared_hits += 1
+        return UserAgentInfo(*cached)
+    info = _parse(user_agent_string)
+    try:
+        cache.set(key, tuple(info), timeout=settings.TRACK_UA_SHARED_CACHE_TTL)
+    except Exception:
+        logger.exception("ua cache write failed")
+    return info
+
+
+@lru_cache(maxsize=settings.TRACK_UA_CACHE_SIZE)
+def _parse_cached(user_agent_string: str) -> UserAgentInfo:
+    if settings.TRACK_UA_SHARED_CACHE:
+        return _parse_shared(user_agent_string)
+    return _parse(user_agent_string)
+
+
+def parse_ua(user_agent_string: str) -> UserAgentInfo:
+    global _fast_path_hits
+    if not user_agent_string:
+        return _parse_cached("")
+    for pattern, info in FAST_PATH:
+        if pattern.fullmatch(user_agent_string):
+            _fast_path_hits += 1
+            return info
+    return _parse_cached(user_agent_string)
+
+
+def ua_cache_stats() -> dict:
+    info = _parse_cached.cache_info()
+    lookups = _fast_path_hits + info.hits + info.misses
+    return {
+        "fast_path_hits": _fast_path_hits,
+        "lru_hits": info.hits,
+        "lru_misses": info.misses,
+        "shared_hits": _shared_hits,
+        "lru_size": info.currsize,
+        "lru_maxsize": info.maxsize,
+        "hit_rate": round((_fast_path_hits + info.hits) / lookups, 4) if lookups else None,
+    }
+
+
+def reset_ua_cache() -> None:
+    global _fast_path_hits, _shared_hits
+    _parse_cached.cache_clear()
+    _fast_path_hits = 0
+    _shared_hits = 0
@@ -1,442 +1,123 @@
 import logging
-from urllib.parse import parse_qs, urljoin, urlparse
 
-from django.utils import timezone
+from redis.exceptions import RedisError
 from rest_framework import permissions, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from user_agents import parse as parse_user_agent
 
-from analytics_app.models import ClickEvent as AnalyticsClickEvent
-from analytics_app.models import Event as AnalyticsEvent
-from analytics_app.models import PageView as AnalyticsPageView
-from clients.models import Client
+from tracker import ingest_queue
+from tracker.handlers import HANDLERS, queue_entries
 from tracker.models import Event, PageView, Site, Visit
 from tracker.serializers import (
     PageViewSerializer,
+    TrackBatchSerializer,
     TrackEventSerializer,
     VisitEndSerializer,
     VisitStartSerializer,
 )
-from tracker.tasks import send_tracker_form_submit_notification_task
+from tracker.services import client_ip, extract_visit_context, site_by_token
 
 logger = logging.getLogger(__name__)
 
 
-def _client_ip(request):
-    forwarded = (request.META.get("HTTP_X_FORWARDED_FOR") or "").split(",")[0].strip()
-    return forwarded or request.META.get("REMOTE_ADDR")
-
-
-def _extract_visit_context(request):
-    user_agent_string = request.META.get("HTTP_USER_AGENT", "") or ""
-    ip = _client_ip(request)
-    try:
-        ua = parse_user_agent(user_agent_string)
-        if ua.is_mobile:
-            device_type = "mobile"
-        elif ua.is_tablet:
-            device_type = "tablet"
-        else:
-            device_type = "desktop"
-        os_family = ua.os.family or None
-        browser_name = ua.browser.family or None
-        browser_family = ua.browser.family or None
-        is_ios_browser = (ua.os.family or "") == "iOS"
-    except Exception:
-        device_type = None
-        os_family = None
-        browser_name = None
-        browser_family = None
-        is_ios_browser = False
-
-    return {
-        "ip_address": ip,
-        "user_agent": user_agent_string,
-        "device_type": device_type,
-        "os": os_family,
-        "browser": browser_name,
-        "browser_family": browser_family,
-        "is_ios_browser": is_ios_browser,
-    }
-
-
-def _site_by_token(token: str):
-    site = Site.objects.filter(token=token, is_active=True).first()
-    if site:
-        return site
-
-    # Compatibility path: promote legacy client api_key to Site token once.
-    legacy_client = Client.objects.filter(api_key=token, is_active=True).first()
-    if legacy_client:
-        return Site.objects.create(token=token, domain=legacy_client.name, is_active=True)
-    return None
-
-
-def _client_by_token(token: str):
-    return Client.objects.filter(api_key=token, is_active=True).first()
-
-
-def _safe_url(value: str, fallback: str = "https://tracker.local/") -> str:
-    raw = (value or "").strip()
-    if not raw:
-        return fallback
-    parsed = urlparse(raw)
-    if parsed.scheme and parsed.netloc:
-        return raw
-    return fallback
-
-
-def _query_param(query_dict, key):
-    value = (query_dict.get(key) or [""])[0]
-    value = (value or "").strip()
-    return value or None
-
-
-def _pageview_payload_from_url(url: str):
-    parsed = urlparse(url)
-    query = parse_qs(parsed.query or "")
-    return {
-        "pathname": parsed.path or "/",
-        "query_string": parsed.query or None,
-        "utm_source": _query_param(query, "utm_source"),
-        "utm_medium": _query_param(query, "utm_medium"),
-        "utm_campaign": _query_param(query, "utm_campaign"),
-        "utm_term": _query_param(query, "utm_term"),
-        "utm_content": _query_param(query, "utm_content"),
-    }
-
-
-def _compose_page_url(page: str, origin: str, fallback: str = "https://tracker.local/") -> str:
-    raw_page = (page or "").strip()
-    if raw_page:
-        parsed = urlparse(raw_page)
-        if parsed.scheme and parsed.netloc:
-            return raw_page
-    base = _safe_url(origin, fallback=fallback)
-    if not raw_page:
-        return base
-    return urljoin(base, raw_page)
-
-
 class TrackBaseAPIView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get_site(self, token):
-        site = _site_by_token(token)
+        site = site_by_token(token)
         if not site:
             logger.warning("Track request rejected: invalid token token=%s", (token[:6] + "***") if token else "***")
             raise PermissionDenied("Invalid token.")
         return site
 
-    def get_or_create_visit(self, site, session_id, request, started_at=None, referrer="", visitor_id=""):
-        context = _extract_visit_context(request)
-        visit = (
-            Visit.objects.filter(site=site, session_id=session_id)
-            .order_by("-started_at")
-            .first()
-        )
-        if visit:
-            updates = []
-            if visitor_id and visit.visitor_id != visitor_id:
-                visit.visitor_id = visitor_id
-                updates.append("visitor_id")
-            if referrer and not visit.referrer:
-                visit.referrer = referrer
-                updates.append("referrer")
-            for field_name, field_value in context.items():
-                if field_value is None:
-                    continue
-                current = getattr(visit, field_name)
-                if current != field_value:
-                    setattr(visit, field_name, field_value)
-                    updates.append(field_name)
-            if updates:
-                visit.save(update_fields=updates)
-            return visit
-        return Visit.objects.create(
-            site=site,
-            visitor_id=visitor_id or "",
-            session_id=session_id,
-            ip_address=context["ip_address"],
-            user_agent=context["user_agent"],
-            device_type=context["device_type"],
-            os=context["os"],
-            browser=context["browser"],
-            browser_family=context["browser_family"],
-            is_ios_browser=context["is_ios_browser"],
-            referrer=referrer or "",
-            started_at=started_at or timezone.now(),
-        )
-
     def handle_exception(self, exc):
         logger.exception("track.api exception path=%s method=%s", self.request.path, self.request.method)
         return super().handle_exception(exc)
 
 
-class VisitStartView(TrackBaseAPIView):
-    def post(self, request):
-        logger.info("track.visit_start request origin=%s body=%s", request.headers.get("Origin"), dict(request.data))
-        serializer = VisitStartSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+class TrackIngestView(TrackBaseAPIView):
+    kind = None
+    serializer_class = None
 
-        site = self.get_site(serializer.validated_data["token"])
-        visit = self.get_or_create_visit(
-            site=site,
-            session_id=serializer.validated_data["session_id"],
-            request=request,
-            started_at=serializer.get_started_at(),
-            referrer=serializer.validated_data.get("referrer") or "",
-            visitor_id=serializer.validated_data.get("visitor_id") or "",
-        )
-        client = _client_by_token(serializer.validated_data["token"])
-        if client:
-            try:
-                event_url = _safe_url(
-                    request.data.get("url") or request.headers.get("Origin") or serializer.validated_data.get("referrer")
-                )
-                AnalyticsEvent.objects.create(
-                    client=client,
-                    visitor_id=serializer.validated_data.get("visitor_id") or "",
-                    event_type=AnalyticsEvent.EventType.VISIT,
-                    page_url=event_url,
-                )
-            except Exception:
-                logger.exception(
-                    "track.visit_start failed to mirror analytics event site_id=%s client_id=%s",
-                    site.id,
-                    client.id,
-                )
-        logger.info(
-            "track.visit_start created visit_id=%s site_id=%s visitor_id=%s session_id=%s",
-            visit.id,
-            site.id,
-            visit.visitor_id,
-            visit.session_id,
-        )
-        return Response({"ok": True, "visit_id": visit.id}, status=status.HTTP_201_CREATED)
+    def log_request(self, request, serializer):
+        logger.info("track.%s request origin=%s body=%s", self.kind, request.headers.get("Origin"), dict(request.data))
 
+    def enqueue(self, request, data):
+        """Hand the hit over to the ingest stream; None means "store it synchronously"."""
+        raw = request.data.dict() if hasattr(request.data, "dict") else request.data
+        entries = [
+            ingest_queue.build_record(
+                kind,
+                record,
+                ip=client_ip(request),
+                user_agent=request.META.get("HTTP_USER_AGENT", ""),
+                origin=request.headers.get("Origin"),
+            )
+            for kind, record in queue_entries(self.kind, data, raw)
+        ]
+        try:
+            ingest_queue.enqueue_records(entries)
+        except RedisError:
+            logger.exception("track.%s failed to enqueue, storing synchronously path=%s", self.kind, request.path)
+            return None
+        return Response({"ok": True, "queued": len(entries)}, status=status.HTTP_202_ACCEPTED)
 
-class PageViewCreateView(TrackBaseAPIView):
     def post(self, request):
-        logger.info("track.pageview request origin=%s body=%s", request.headers.get("Origin"), dict(request.data))
-        serializer = PageViewSerializer(data=request.data)
+        serializer = self.serializer_class(data=request.data)
+        if self.kind != "batch":
+            self.log_request(request, serializer)
         serializer.is_valid(raise_exception=True)
-
-        site = self.get_site(serializer.validated_data["token"])
-        visit = self.get_or_create_visit(
+        if self.kind == "batch":
+            self.log_request(request, serializer)
+
+        data = serializer.validated_data
+        site = self.get_site(data["token"])
+        if ingest_queue.is_enabled():
+            response = self.enqueue(request, data)
+            if response is not None:
+                return response
+        body, status_code = HANDLERS[self.kind](
             site,
-            serializer.validated_data["session_id"],
-            request,
-            visitor_id=serializer.validated_data.get("visitor_id") or "",
+            data,
+            request.data,
+            context=extract_visit_context(request),
+            origin=request.headers.get("Origin"),
         )
-        pageview = PageView.objects.create(
-            visit=visit,
-            url=serializer.validated_data["url"],
-            title=serializer.validated_data.get("title", ""),
-            timestamp=serializer.get_timestamp(),
-        )
-        client = _client_by_token(serializer.validated_data["token"])
-        if client:
-            try:
-                safe_url = _safe_url(serializer.validated_data["url"])
-                payload = _pageview_payload_from_url(safe_url)
-                AnalyticsPageView.objects.create(
-                    client=client,
-                    visitor_id=serializer.validated_data.get("visitor_id") or "",
-                    session_id=serializer.validated_data["session_id"],
-                    url=safe_url,
-                    pathname=payload["pathname"],
-                    query_string=payload["query_string"],
-                    referrer=visit.referrer or None,
-                    utm_source=payload["utm_source"],
-                    utm_medium=payload["utm_medium"],
-                    utm_campaign=payload["utm_campaign"],
-                    utm_term=payload["utm_term"],
-                    utm_content=payload["utm_content"],
-                )
-            except Exception:
-                logger.exception(
-                    "track.pageview failed to mirror analytics pageview visit_id=%s client_id=%s",
-                    visit.id,
-                    client.id,
-                )
-        logger.info(
-            "track.pageview created pageview_id=%s visit_id=%s visitor_id=%s session_id=%s",
-            pageview.id,
-            visit.id,
-            visit.visitor_id,
-            visit.session_id,
-        )
-        return Response({"ok": True, "pageview_id": pageview.id}, status=status.HTTP_201_CREATED)
+        return Response(body, status=status_code)
 
 
-class EventCreateView(TrackBaseAPIView):
-    def post(self, request):
-        logger.info("track.event request origin=%s body=%s", request.headers.get("Origin"), dict(request.data))
-        serializer = TrackEventSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+class VisitStartView(TrackIngestView):
+    kind = "visit_start"
+    serializer_class = VisitStartSerializer
 
-        site = self.get_site(serializer.validated_data["token"])
-        visit = self.get_or_create_visit(
-            site,
-            serializer.validated_data["session_id"],
-            request,
-            visitor_id=serializer.validated_data.get("visitor_id") or "",
-        )
-        event_type = serializer.validated_data["type"]
-        payload = serializer.validated_data.get("payload") or {}
-        duration_seconds = 0
-        if event_type == "time_on_page":
-            try:
-                duration_seconds = int(payload.get("duration_seconds") or 0)
-            except (TypeError, ValueError):
-                duration_seconds = 0
-            if duration_seconds <= 0:
-                logger.info(
-                    "track.event ignored invalid time_on_page duration visit_id=%s session_id=%s payload=%s",
-                    visit.id,
-                    serializer.validated_data["session_id"],
-                    payload,
-                )
-                return Response({"ok": True, "ignored": True}, status=status.HTTP_200_OK)
 
-        event = Event.objects.create(
-            visit=visit,
-            type=event_type,
-            payload=payload,
-            timestamp=serializer.get_timestamp(),
-        )
-        client = _client_by_token(serializer.validated_data["token"])
-        if client:
-            try:
-                if event_type == "form_submit":
-                    latest_page_view = (
-                        AnalyticsPageView.objects.filter(
-                            client=client,
-                            session_id=serializer.validated_data["session_id"],
-                        )
-                        .order_by("-created_at")
-                        .first()
-                    )
-                    AnalyticsEvent.objects.create(
-                        client=client,
-                        visitor_id=serializer.validated_data.get("visitor_id") or "",
-                        event_type=AnalyticsEvent.EventType.FORM_SUBMIT,
-                        element_id=(payload.get("id") or "")[:255],
-                        page_url=_safe_url(
-                            payload.get("url")
-                            or payload.get("page_url")
-                            or (latest_page_view.url if latest_page_view else "")
-                            or request.headers.get("Origin")
-                        ),
-                    )
-                elif event_type == "click":
-                    latest_page_view = (
-                        AnalyticsPageView.objects.filter(
-                            client=client,
-                            session_id=serializer.validated_data["session_id"],
-                        )
-                        .order_by("-created_at")
-                        .first()
-                    )
-                    AnalyticsClickEvent.objects.create(
-                        client=client,
-                        visitor_id=serializer.validated_data.get("visitor_id") or "",
-                        session_id=serializer.validated_data["session_id"],
-                        page_pathname=((payload.get("path") or "").strip() or (latest_page_view.pathname if latest_page_view else "/")),
-                        element_text=((payload.get("text") or "")[:100]),
-                        element_id=((payload.get("id") or "")[:255]),
-                        element_class=((payload.get("class") or "")[:255]),
-                    )
-                elif event_type == "time_on_page":
-                    latest_page_view = (
-                        AnalyticsPageView.objects.filter(
-                            client=client,
-                            session_id=serializer.validated_data["session_id"],
-                        )
-                        .order_by("-created_at")
-                        .first()
-                    )
-                    page = ((payload.get("page") or payload.get("path") or "").strip() or "/")
-                    page_url = _compose_page_url(
-                        page=page,
-                        origin=(
-                            payload.get("url")
-                            or payload.get("page_url")
-                            or (latest_page_view.url if latest_page_view else "")
-                            or request.headers.get("Origin")
-                        ),
-                    )
-                    AnalyticsEvent.objects.create(
-                        client=client,
-                        visitor_id=serializer.validated_data.get("visitor_id") or "",
-                        event_type=AnalyticsEvent.EventType.TIME_ON_PAGE,
-                        element_id=page[:255],
-                        page_url=page_url,
-                        duration_seconds=duration_seconds,
-                    )
-            except Exception:
-                logger.exception(
-                    "track.event failed to mirror analytics event type=%s visit_id=%s client_id=%s",
-                    serializer.validated_data["type"],
-                    visit.id,
-                    client.id,
-                )
+class PageViewCreateView(TrackIngestView):
+    kind = "pageview"
+    serializer_class = PageViewSerializer
 
-            if event_type == "form_submit":
-                try:
-                    send_tracker_form_submit_notification_task.delay(event.id, client.id)
-                except Exception:
-                    logger.exception(
-                        "track.event failed to enqueue telegram form-submit notify event_id=%s client_id=%s",
-                        event.id,
-                        client.id,
-                    )
-        logger.info(
-            "track.event created event_id=%s visit_id=%s type=%s visitor_id=%s session_id=%s",
-            event.id,
-            visit.id,
-            event.type,
-            visit.visitor_id,
-            visit.session_id,
-        )
-        return Response({"ok": True, "event_id": event.id}, status=status.HTTP_201_CREATED)
 
+class EventCreateView(TrackIngestView):
+    kind = "event"
+    serializer_class = TrackEventSerializer
 
-class VisitEndView(TrackBaseAPIView):
-    def post(self, request):
-        logger.info("track.visit_end request origin=%s body=%s", request.headers.get("Origin"), dict(request.data))
-        serializer = VisitEndSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
 
-        site = self.get_site(serializer.validated_data["token"])
-        visit = (
-            Visit.objects.filter(site=site, session_id=serializer.validated_data["session_id"])
-            .order_by("-started_at")
-            .first()
+class TrackBatchView(TrackIngestView):
+    kind = "batch"
+    serializer_class = TrackBatchSerializer
+
+    def log_request(self, request, serializer):
+        logger.info(
+            "track.batch request origin=%s session_id=%s records=%s",
+            request.headers.get("Origin"),
+            serializer.validated_data["session_id"],
+            len(serializer.validated_data["records"]),
         )
-        if not visit:
-            visit = self.get_or_create_visit(
-                site,
-                serializer.validated_data["session_id"],
-                request,
-                visitor_id=serializer.validated_data.get("visitor_id") or "",
-            )
-        elif (serializer.validated_data.get("visitor_id") or "") and visit.visitor_id != serializer.validated_data.get("visitor_id"):
-            visit.visitor_id = serializer.validated_data.get("visitor_id") or ""
-            visit.save(update_fields=["visitor_id"])
 
-        ended_at = serializer.get_ended_at()
-        duration = serializer.validated_data.get("duration")
-        if duration is None:
-            duration = max(0, int((ended_at - visit.started_at).total_seconds()))
-        visit.ended_at = ended_at
-        visit.duration = duration
-        visit.save(update_fields=["ended_at", "duration"])
-        logger.info("track.visit_end updated visit_id=%s duration=%s", visit.id, visit.duration)
-        return Response({"ok": True, "visit_id": visit.id, "duration": visit.duration}, status=status.HTTP_200_OK)
+
+class VisitEndView(TrackIngestView):
+    kind = "visit_end"
+    serializer_class = VisitEndSerializer
 
 
 class TrackStatsView(TrackBaseAPIView):
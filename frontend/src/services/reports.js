@@ -10,6 +10,11 @@ export async function sendPdfNow() {
   return response.data;
 }
 
+export async function getReportJob(jobId) {
+  const response = await api.get(`/api/reports/jobs/${jobId}/`);
+  return response.data;
+}
+
 export async function toggleDailyPdf(enabled) {
   const response = await api.post("/api/reports/toggle-daily/", { enabled });
   return response.data;